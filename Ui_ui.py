@@ -257,25 +257,14 @@ class Ui_ui(object):
         spacerItem2 = QtGui.QSpacerItem(19, 34, QtGui.QSizePolicy.Minimum, QtGui.QSizePolicy.Preferred)
         self.verticalLayout.addItem(spacerItem2)
         self.gridLayout_2.addLayout(self.verticalLayout, 4, 1, 3, 1)
-        self.table_segmentList = QtGui.QTableWidget(self.groupBox_8)
+        self.table_segmentList = QtGui.QTableView(self.groupBox_8)
         sizePolicy = QtGui.QSizePolicy(QtGui.QSizePolicy.Expanding, QtGui.QSizePolicy.Expanding)
         sizePolicy.setHorizontalStretch(0)
         sizePolicy.setVerticalStretch(0)
         sizePolicy.setHeightForWidth(self.table_segmentList.sizePolicy().hasHeightForWidth())
         self.table_segmentList.setSizePolicy(sizePolicy)
         self.table_segmentList.setObjectName(_fromUtf8("table_segmentList"))
-        self.table_segmentList.setColumnCount(5)
-        self.table_segmentList.setRowCount(0)
-        item = QtGui.QTableWidgetItem()
-        self.table_segmentList.setHorizontalHeaderItem(0, item)
-        item = QtGui.QTableWidgetItem()
-        self.table_segmentList.setHorizontalHeaderItem(1, item)
-        item = QtGui.QTableWidgetItem()
-        self.table_segmentList.setHorizontalHeaderItem(2, item)
-        item = QtGui.QTableWidgetItem()
-        self.table_segmentList.setHorizontalHeaderItem(3, item)
-        item = QtGui.QTableWidgetItem()
-        self.table_segmentList.setHorizontalHeaderItem(4, item)
+        self.table_segmentList.setSelectionBehavior(QtGui.QAbstractItemView.SelectRows)
         self.gridLayout_2.addWidget(self.table_segmentList, 5, 0, 1, 1)
         self.horizontalLayout_3 = QtGui.QHBoxLayout()
         self.horizontalLayout_3.setObjectName(_fromUtf8("horizontalLayout_3"))
@@ -287,6 +276,12 @@ class Ui_ui(object):
         self.pushButton_segListSave.setEnabled(True)
         self.pushButton_segListSave.setObjectName(_fromUtf8("pushButton_segListSave"))
         self.horizontalLayout_3.addWidget(self.pushButton_segListSave)
+        self.pushButton_segListBatch = QtGui.QPushButton(self.groupBox_8)
+        self.pushButton_segListBatch.setObjectName(_fromUtf8("pushButton_segListBatch"))
+        self.horizontalLayout_3.addWidget(self.pushButton_segListBatch)
+        self.pushButton_segListExport = QtGui.QPushButton(self.groupBox_8)
+        self.pushButton_segListExport.setObjectName(_fromUtf8("pushButton_segListExport"))
+        self.horizontalLayout_3.addWidget(self.pushButton_segListExport)
         spacerItem3 = QtGui.QSpacerItem(40, 20, QtGui.QSizePolicy.Expanding, QtGui.QSizePolicy.Minimum)
         self.horizontalLayout_3.addItem(spacerItem3)
         self.pushButton_segListClear = QtGui.QPushButton(self.groupBox_8)
@@ -443,6 +438,18 @@ class Ui_ui(object):
         self.spin_arclines.setMinimum(6)
         self.spin_arclines.setObjectName(_fromUtf8("spin_arclines"))
         self.formLayout_3.setWidget(0, QtGui.QFormLayout.FieldRole, self.spin_arclines)
+        self.checkBox_arcTolerance = QtGui.QCheckBox(self.groupBox_4)
+        self.checkBox_arcTolerance.setObjectName(_fromUtf8("checkBox_arcTolerance"))
+        self.formLayout_3.setWidget(1, QtGui.QFormLayout.LabelRole, self.checkBox_arcTolerance)
+        self.spin_arcTolerance = QtGui.QDoubleSpinBox(self.groupBox_4)
+        self.spin_arcTolerance.setEnabled(False)
+        self.spin_arcTolerance.setDecimals(3)
+        self.spin_arcTolerance.setMinimum(0.001)
+        self.spin_arcTolerance.setMaximum(1000.0)
+        self.spin_arcTolerance.setSingleStep(0.01)
+        self.spin_arcTolerance.setProperty("value", 0.05)
+        self.spin_arcTolerance.setObjectName(_fromUtf8("spin_arcTolerance"))
+        self.formLayout_3.setWidget(1, QtGui.QFormLayout.FieldRole, self.spin_arcTolerance)
         self.verticalLayout_4.addWidget(self.groupBox_4)
         spacerItem4 = QtGui.QSpacerItem(20, 40, QtGui.QSizePolicy.Minimum, QtGui.QSizePolicy.Expanding)
         self.verticalLayout_4.addItem(spacerItem4)
@@ -452,6 +459,12 @@ class Ui_ui(object):
         self.horizontalLayout_12.setObjectName(_fromUtf8("horizontalLayout_12"))
         self.horizontalLayout_6 = QtGui.QHBoxLayout()
         self.horizontalLayout_6.setObjectName(_fromUtf8("horizontalLayout_6"))
+        self.checkBox_close = QtGui.QCheckBox(ui)
+        self.checkBox_close.setObjectName(_fromUtf8("checkBox_close"))
+        self.horizontalLayout_6.addWidget(self.checkBox_close)
+        self.checkBox_preview = QtGui.QCheckBox(ui)
+        self.checkBox_preview.setObjectName(_fromUtf8("checkBox_preview"))
+        self.horizontalLayout_6.addWidget(self.checkBox_preview)
         self.checkBox_asSegments = QtGui.QCheckBox(ui)
         self.checkBox_asSegments.setObjectName(_fromUtf8("checkBox_asSegments"))
         self.horizontalLayout_6.addWidget(self.checkBox_asSegments)
@@ -480,6 +493,8 @@ class Ui_ui(object):
 
         self.retranslateUi(ui)
         QtCore.QObject.connect(self.pushButton_dlgClose, QtCore.SIGNAL(_fromUtf8("clicked()")), ui.reject)
+        QtCore.QObject.connect(self.checkBox_arcTolerance, QtCore.SIGNAL(_fromUtf8("toggled(bool)")), self.spin_arcTolerance.setEnabled)
+        QtCore.QObject.connect(self.checkBox_arcTolerance, QtCore.SIGNAL(_fromUtf8("toggled(bool)")), self.spin_arclines.setDisabled)
         QtCore.QMetaObject.connectSlotsByName(ui)
         ui.setTabOrder(self.radioButton_radialSurvey, self.radioButton_boundarySurvey)
         ui.setTabOrder(self.radioButton_boundarySurvey, self.radioButton_defaultNorth)
@@ -493,7 +508,9 @@ class Ui_ui(object):
         ui.setTabOrder(self.radioButton_polarCoordAngle, self.pushButton_segListSave)
         ui.setTabOrder(self.pushButton_segListSave, self.lineEdit_crs)
         ui.setTabOrder(self.lineEdit_crs, self.pushButton_segListLoad)
-        ui.setTabOrder(self.pushButton_segListLoad, self.pushButton_segListClear)
+        ui.setTabOrder(self.pushButton_segListLoad, self.pushButton_segListBatch)
+        ui.setTabOrder(self.pushButton_segListBatch, self.pushButton_segListExport)
+        ui.setTabOrder(self.pushButton_segListExport, self.pushButton_segListClear)
         ui.setTabOrder(self.pushButton_segListClear, self.pushButton_segListRowUp)
         ui.setTabOrder(self.pushButton_segListRowUp, self.pushButton_segListRowDn)
         ui.setTabOrder(self.pushButton_segListRowDn, self.pushButton_segListRowDel)
@@ -529,13 +546,12 @@ class Ui_ui(object):
         self.pushButton_segListRowUp.setText(QtGui.QApplication.translate("ui", "Up", None, QtGui.QApplication.UnicodeUTF8))
         self.pushButton_segListRowDn.setText(QtGui.QApplication.translate("ui", "Down", None, QtGui.QApplication.UnicodeUTF8))
         self.pushButton_segListRowDel.setText(QtGui.QApplication.translate("ui", "Remove", None, QtGui.QApplication.UnicodeUTF8))
-        self.table_segmentList.horizontalHeaderItem(0).setText(QtGui.QApplication.translate("ui", "Azimuth", None, QtGui.QApplication.UnicodeUTF8))
-        self.table_segmentList.horizontalHeaderItem(1).setText(QtGui.QApplication.translate("ui", "Distance", None, QtGui.QApplication.UnicodeUTF8))
-        self.table_segmentList.horizontalHeaderItem(2).setText(QtGui.QApplication.translate("ui", "Vertical Angle", None, QtGui.QApplication.UnicodeUTF8))
-        self.table_segmentList.horizontalHeaderItem(3).setText(QtGui.QApplication.translate("ui", "Radius", None, QtGui.QApplication.UnicodeUTF8))
-        self.table_segmentList.horizontalHeaderItem(4).setText(QtGui.QApplication.translate("ui", "Direction", None, QtGui.QApplication.UnicodeUTF8))
         self.pushButton_segListLoad.setText(QtGui.QApplication.translate("ui", "Import List", None, QtGui.QApplication.UnicodeUTF8))
         self.pushButton_segListSave.setText(QtGui.QApplication.translate("ui", "Export List", None, QtGui.QApplication.UnicodeUTF8))
+        self.pushButton_segListBatch.setToolTip(QtGui.QApplication.translate("ui", "Draw every traverse of one or more batch files", None, QtGui.QApplication.UnicodeUTF8))
+        self.pushButton_segListBatch.setText(QtGui.QApplication.translate("ui", "Batch Import", None, QtGui.QApplication.UnicodeUTF8))
+        self.pushButton_segListExport.setToolTip(QtGui.QApplication.translate("ui", "Write the computed vertices, or the segments when drawing as segments, to a CSV or GeoJSON file", None, QtGui.QApplication.UnicodeUTF8))
+        self.pushButton_segListExport.setText(QtGui.QApplication.translate("ui", "Export", None, QtGui.QApplication.UnicodeUTF8))
         self.pushButton_segListClear.setText(QtGui.QApplication.translate("ui", "Clear List", None, QtGui.QApplication.UnicodeUTF8))
         self.surveyGrpBox.setTitle(QtGui.QApplication.translate("ui", "Survey type", None, QtGui.QApplication.UnicodeUTF8))
         self.radioButton_radialSurvey.setText(QtGui.QApplication.translate("ui", "Polar / Radial", None, QtGui.QApplication.UnicodeUTF8))
@@ -555,6 +571,13 @@ class Ui_ui(object):
         self.arcNodesLabel.setToolTip(QtGui.QApplication.translate("ui", "The more lines the smoother the arc will be", None, QtGui.QApplication.UnicodeUTF8))
         self.arcNodesLabel.setText(QtGui.QApplication.translate("ui", "Arc lines", None, QtGui.QApplication.UnicodeUTF8))
         self.spin_arclines.setToolTip(QtGui.QApplication.translate("ui", "The more lines the smoother the arc will be", None, QtGui.QApplication.UnicodeUTF8))
+        self.checkBox_arcTolerance.setToolTip(QtGui.QApplication.translate("ui", "Pick the number of lines of each arc from the largest allowed gap between a line and the arc, in map units", None, QtGui.QApplication.UnicodeUTF8))
+        self.checkBox_arcTolerance.setText(QtGui.QApplication.translate("ui", "Max. deviation", None, QtGui.QApplication.UnicodeUTF8))
+        self.spin_arcTolerance.setToolTip(QtGui.QApplication.translate("ui", "Largest allowed gap between a line and the arc, in map units", None, QtGui.QApplication.UnicodeUTF8))
+        self.checkBox_close.setToolTip(QtGui.QApplication.translate("ui", "Distribute the misclosure of a polygonal traverse on its start point with the compass (Bowditch) rule", None, QtGui.QApplication.UnicodeUTF8))
+        self.checkBox_close.setText(QtGui.QApplication.translate("ui", "Close", None, QtGui.QApplication.UnicodeUTF8))
+        self.checkBox_preview.setToolTip(QtGui.QApplication.translate("ui", "Show the traverse on the map while editing the segment list", None, QtGui.QApplication.UnicodeUTF8))
+        self.checkBox_preview.setText(QtGui.QApplication.translate("ui", "Preview", None, QtGui.QApplication.UnicodeUTF8))
         self.checkBox_asSegments.setText(QtGui.QApplication.translate("ui", "As Segments", None, QtGui.QApplication.UnicodeUTF8))
         self.pushButton_objectDraw.setText(QtGui.QApplication.translate("ui", "Draw", None, QtGui.QApplication.UnicodeUTF8))
         self.pushButton_dlgClose.setText(QtGui.QApplication.translate("ui", "Close", None, QtGui.QApplication.UnicodeUTF8))
@@ -0,0 +1,313 @@
+#---------------------------------------------------------------------
+#
+# licensed under the terms of GNU GPL 2
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+#---------------------------------------------------------------------
+"""
+Closure analysis and adjustment of polygonal traverses.
+
+All functions work on (N, 2) or (N, 3) coordinate arrays as returned by
+traverse.Traverse.coordinates(); only x and y are adjusted.  The compass
+(Bowditch) and transit rules spread the misclosure of a single traverse over
+its vertices.  least_squares() adjusts any network of distance and azimuth
+observations, with redundant ones.  Its normal equations are numbered in
+reverse Cuthill-McKee order and solved by a banded Cholesky factorization; only
+systems too wide for that fall back to a Jacobi preconditioned conjugate
+gradient.
+"""
+
+from collections import namedtuple
+
+import numpy
+
+Closure = namedtuple("Closure", "dx dy linear length precision")
+LeastSquares = namedtuple("LeastSquares", "coords distance_residuals azimuth_residuals iterations")
+
+
+def _legs(coords):
+    return numpy.diff(numpy.asarray(coords, dtype=float)[:, :2], axis=0)
+
+
+def _misclosure(coords, end):
+    coords = numpy.asarray(coords, dtype=float)
+    end = coords[0, :2] if end is None else numpy.asarray(end, dtype=float)[:2]
+    return coords[-1, :2] - end
+
+
+def closure(coords, end=None):
+    """
+    Return the misclosure of a traverse.
+    :param end: Known coordinates of the closing point, the start point for a loop
+    :return: A Closure of the misclosure in x and y, its length, the length of
+             the traverse and the precision ratio (length / linear misclosure,
+             infinite for a perfect closure)
+    """
+    dx, dy = _misclosure(coords, end)
+    linear = numpy.hypot(dx, dy)
+    length = numpy.hypot(*_legs(coords).T).sum()
+    precision = length / linear if linear else numpy.inf
+    return Closure(dx, dy, linear, length, precision)
+
+
+def _distribute(coords, end, weights):
+    """
+    Subtract the misclosure from every vertex in proportion to the running sum of
+    weights, a (legs, 2) array, over the traverse.
+    """
+    coords = numpy.array(coords, dtype=float)
+    misclosure = _misclosure(coords, end)
+    running = numpy.cumsum(weights, axis=0)
+    total = running[-1] if len(running) else numpy.zeros(2)
+    ratio = numpy.divide(running, total, out=numpy.zeros_like(running), where=total != 0)
+    coords[1:, :2] -= ratio * misclosure
+    return coords
+
+
+def bowditch(coords, end=None):
+    """
+    Adjust a traverse with the compass (Bowditch) rule: the correction of each
+    vertex is proportional to the distance travelled to it.
+    :param end: Known coordinates of the closing point, the start point for a loop
+    :return: A copy of coords with the last vertex on end
+    """
+    length = numpy.hypot(*_legs(coords).T)
+    return _distribute(coords, end, numpy.column_stack((length, length)))
+
+
+def transit(coords, end=None):
+    """
+    Adjust a traverse with the transit rule: the corrections in x and y are
+    proportional to the sums of the absolute leg offsets in x and y.
+    :return: A copy of coords with the last vertex on end
+    """
+    return _distribute(coords, end, numpy.abs(_legs(coords)))
+
+
+def leg_observations(coords, closed=False, sigma_distance=0.01, sigma_azimuth=10 / 3600.0):
+    """
+    Return the horizontal distance and azimuth of every leg of a traverse as
+    observations for least_squares().
+    :param closed: The last vertex is the start point again; the last leg then
+                   ends on point 0 and least_squares() gets one point less
+    :return: The coordinates of the points and the distance and azimuth observations
+    """
+    coords = numpy.asarray(coords, dtype=float)
+    legs = _legs(coords)
+    count = len(legs)
+    start = numpy.arange(count)
+    end = numpy.arange(1, count + 1)
+    if closed:
+        end[-1] = 0
+        coords = coords[:-1]
+    distance = numpy.hypot(legs[:, 0], legs[:, 1])
+    azimuth = numpy.degrees(numpy.arctan2(legs[:, 0], legs[:, 1])) % 360.0
+    return (coords,
+            (start, end, distance, numpy.full(count, sigma_distance)),
+            (start, end, azimuth, numpy.full(count, sigma_azimuth)))
+
+
+def _rcm(count, start, end):
+    """
+    Reverse Cuthill-McKee order of count nodes joined by the edges start[i] - end[i].
+    Numbering the points this way keeps the normal matrix of a traverse or a
+    survey network within a narrow band around the diagonal.
+    :return: An array with the new position of every node
+    """
+    source = numpy.concatenate((start, end))
+    target = numpy.concatenate((end, start))
+    degree = numpy.bincount(source, minlength=count)
+    neighbours = numpy.split(target[numpy.argsort(source, kind='mergesort')], numpy.cumsum(degree)[:-1])
+    degree = degree.tolist()
+    visited = [False] * count
+    sequence = []
+    for root in numpy.argsort(degree, kind='mergesort').tolist():
+        if visited[root]:
+            continue
+        visited[root] = True
+        queue = [root]
+        for node in queue:
+            new = sorted(set(n for n in neighbours[node].tolist() if not visited[n]), key=degree.__getitem__)
+            for n in new:
+                visited[n] = True
+            queue.extend(new)
+        sequence.extend(queue)
+    position = numpy.empty(count, dtype=int)
+    position[sequence[::-1]] = numpy.arange(count)
+    return position
+
+
+def _band_solve(band, rhs):
+    """
+    Solve a symmetric positive definite banded system by Cholesky factorization.
+    :param band: (b + 1, n) array of the lower band, band[k, i] being the entry at row i, column i - k
+    :raises ValueError: If the matrix is singular
+    """
+    width = len(band) - 1
+    size = len(rhs)
+    # zero rows past the end keep the window below inside the array
+    band = numpy.hstack((band, numpy.zeros((width + 1, width + 1))))
+    # factor[j, d] holds the factor at row j + d, column j
+    factor = numpy.zeros((size, width + 1))
+    # the partly reduced matrix at rows and columns j to j + b
+    window = numpy.zeros((width + 1, width + 1))
+    for i in range(width + 1):
+        window[i, :i + 1] = band[i::-1, i]
+    window += numpy.tril(window, -1).T
+    for j in range(size):
+        if window[0, 0] <= 0:
+            raise ValueError("the normal equations are singular, a point lacks observations")
+        column = window[:, 0] / numpy.sqrt(window[0, 0])
+        factor[j] = column
+        window[:-1, :-1] = window[1:, 1:] - numpy.outer(column[1:], column[1:])
+        window[-1] = window[:, -1] = band[::-1, j + width + 1]
+
+    y = numpy.concatenate((numpy.asarray(rhs, dtype=float), numpy.zeros(width)))
+    for j in range(size):
+        y[j] /= factor[j, 0]
+        y[j + 1:j + width + 1] -= factor[j, 1:] * y[j]
+    x = numpy.zeros(size + width)
+    for i in range(size - 1, -1, -1):
+        x[i] = (y[i] - factor[i, 1:].dot(x[i + 1:i + width + 1])) / factor[i, 0]
+    return x[:size]
+
+
+def _cg(matvec, rhs, diagonal, tolerance, maxiter):
+    """
+    Solve a symmetric positive definite system with the Jacobi preconditioned conjugate gradient.
+    """
+    inverse = numpy.divide(1.0, diagonal, out=numpy.zeros_like(diagonal), where=diagonal > 0)
+    x = numpy.zeros_like(rhs)
+    r = rhs.copy()
+    z = inverse * r
+    p = z.copy()
+    rz = r.dot(z)
+    limit = tolerance * numpy.sqrt(rhs.dot(rhs))
+    for _ in range(maxiter):
+        if numpy.sqrt(r.dot(r)) <= limit:
+            break
+        q = matvec(p)
+        alpha = rz / p.dot(q)
+        x += alpha * p
+        r -= alpha * q
+        z = inverse * r
+        rz, previous = r.dot(z), rz
+        p = z + (rz / previous) * p
+    return x
+
+
+# largest size * bandwidth ** 2 solved directly, wider systems go to the conjugate gradient
+BAND_LIMIT = 2e7
+
+
+def least_squares(coords, fixed, distances=None, azimuths=None, iterations=10, tolerance=1e-6):
+    """
+    Adjust point coordinates to distance and azimuth observations by weighted
+    least squares, iterating Gauss-Newton steps.
+    The normal equations are only ever built as a band: with the points in
+    reverse Cuthill-McKee order a traverse or network of tens of thousands of
+    points has a band a few unknowns wide, which is factored directly.
+    :param coords: (N, 2) or (N, 3) approximate coordinates of the points
+    :param fixed: Indices of the points held fixed
+    :param distances: (from, to, distance, sigma) arrays of horizontal distances
+    :param azimuths: (from, to, azimuth, sigma) arrays of azimuths in degrees
+    :param tolerance: Stop when no coordinate moves more than this
+    :return: A LeastSquares of the adjusted coordinates, the residuals of the
+             observations (observed - adjusted) and the number of iterations
+    :raises ValueError: If a point can not be determined from the observations
+    """
+    coords = numpy.array(coords, dtype=float)
+    points = len(coords)
+    groups = [(kind, [numpy.asarray(values) for values in observations])
+              for kind, observations in (('distance', distances), ('azimuth', azimuths))
+              if observations is not None]
+    start = numpy.concatenate([group[1][0] for group in groups]).astype(int)
+    end = numpy.concatenate([group[1][1] for group in groups]).astype(int)
+
+    unknown = numpy.ones(points, dtype=bool)
+    unknown[list(fixed)] = False
+    free = numpy.flatnonzero(unknown)
+    # column of the x unknown of every point, -1 for fixed points
+    number = numpy.full(points, -1)
+    number[free] = numpy.arange(len(free))
+    linked = (number[start] >= 0) & (number[end] >= 0)
+    column = numpy.full(points, -1)
+    column[free] = 2 * _rcm(len(free), number[start[linked]], number[end[linked]])
+    size = 2 * len(free)
+
+    def residuals():
+        result = {}
+        for kind, (first, last, value, sigma) in groups:
+            dx, dy = (coords[last, :2] - coords[first, :2]).T
+            if kind == 'distance':
+                result[kind] = value - numpy.hypot(dx, dy)
+            else:
+                result[kind] = (value - numpy.degrees(numpy.arctan2(dx, dy)) + 180.0) % 360.0 - 180.0
+        return result
+
+    done = 0
+    for done in range(1, iterations + 1):
+        # every observation row has the x and y unknowns of its two points
+        columns, values, misclosure, weight = [], [], [], []
+        current = residuals()
+        for kind, (first, last, value, sigma) in groups:
+            dx, dy = (coords[last, :2] - coords[first, :2]).T
+            if kind == 'distance':
+                d = numpy.hypot(dx, dy)
+                gx, gy = dx / d, dy / d
+                misclosure.append(current[kind])
+            else:
+                d2 = dx ** 2 + dy ** 2
+                gx, gy = dy / d2, -dx / d2
+                misclosure.append(numpy.radians(current[kind]))
+                sigma = numpy.radians(sigma)
+            weight.append(1.0 / numpy.asarray(sigma, dtype=float) ** 2)
+            x, y = column[last], column[first]
+            columns.append(numpy.column_stack((x, x + 1, y, y + 1)))
+            values.append(numpy.column_stack((gx, gy, -gx, -gy)) * (numpy.repeat((x >= 0, y >= 0), 2, axis=0).T))
+        columns, values = numpy.concatenate(columns), numpy.concatenate(values)
+        misclosure, weight = numpy.concatenate(misclosure), numpy.concatenate(weight)
+        # fixed points have no unknowns, their zero entries are dropped below
+        columns[values == 0] = 0
+
+        rhs = numpy.bincount(columns.ravel(), (values * (weight * misclosure)[:, numpy.newaxis]).ravel(), size)
+        pairs = [(a, b) for a in range(4) for b in range(4)]
+        row = numpy.concatenate([columns[:, a] for a, b in pairs])
+        col = numpy.concatenate([columns[:, b] for a, b in pairs])
+        entry = numpy.concatenate([weight * values[:, a] * values[:, b] for a, b in pairs])
+        lower = (row >= col) & (entry != 0)
+        row, col, entry = row[lower], col[lower], entry[lower]
+        width = int((row - col).max()) if len(row) else 0
+
+        if size * width ** 2 <= BAND_LIMIT:
+            band = numpy.zeros((width + 1, size))
+            numpy.add.at(band, (row - col, row), entry)
+            step = _band_solve(band, rhs)
+        else:
+            def matvec(vector):
+                product = numpy.bincount(row, entry * vector[col], size)
+                offdiagonal = row != col
+                return product + numpy.bincount(col[offdiagonal], entry[offdiagonal] * vector[row[offdiagonal]], size)
+            diagonal = numpy.bincount(row[row == col], entry[row == col], size)
+            step = _cg(matvec, rhs, diagonal, 1e-12, 10 * size + 100)
+
+        coords[free, 0] += step[column[free]]
+        coords[free, 1] += step[column[free] + 1]
+        if not len(step) or numpy.abs(step).max() <= tolerance:
+            break
+
+    final = residuals()
+    return LeastSquares(coords, final.get('distance'), final.get('azimuth'), done)
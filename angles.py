@@ -0,0 +1,113 @@
+#---------------------------------------------------------------------
+#
+# licensed under the terms of GNU GPL 2
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+#---------------------------------------------------------------------
+"""
+Angle parsing.
+
+Angles are written either as DMS where any run of characters other than digits,
+'.' and '-' separates degrees, minutes and seconds (25d 34' 40", 25;34;40,
+25.5), or as survey bearings (- N 25d 34' 40" E) where a leading minus sign
+reverses the bearing.  Survey files repeat the same few values on every line,
+so parse_angles parses each distinct text of a column once.
+"""
+
+import re
+
+import numpy
+
+_NUMBER = re.compile(r"[-\d.]+")
+_BEARING = re.compile(r"\s*(-?)\s*(([NS])?.*?([A-Z]?))\s*$", re.I | re.S)
+
+# base angle and sign of the DMS value for each bearing quadrant
+_QUADRANTS = {('N', 'E'): (0.0, 1.0),
+              ('N', 'W'): (360.0, -1.0),
+              ('S', 'E'): (180.0, -1.0),
+              ('S', 'W'): (180.0, 1.0)}
+
+
+def _dms(text):
+    parts = _NUMBER.findall(text)
+    if not parts:
+        raise ValueError("invalid angle: {0!r}".format(text))
+    dd = 0.0
+    for i, part in enumerate(parts):
+        dd += abs(float(part)) / 60.0 ** i
+    if parts[0][0] == '-':
+        dd = -dd
+    return dd
+
+
+def dms_to_dd(dms):
+    """
+    Convert a DMS (or plain decimal) angle to decimal degrees.
+    A leading minus sign applies to the whole angle.
+    """
+    return _dms(str(dms))
+
+
+def bearing_to_dd(dms):
+    """
+    Convert a survey bearing to decimal degrees.
+    Bearings are in the form:  - N 25d 34' 40" E
+    where minus ('-') sign allows handling bearings given in reverse direction.
+    Anything not starting with N or S is handled as plain DMS.
+    An N or S bearing not ending in E or W returns 0.
+    """
+    reverse, body, base, adj = _BEARING.match(str(dms)).groups()
+    dd = _dms(body)
+    if reverse:
+        dd += 180.0
+
+    if base:
+        quadrant = _QUADRANTS.get((base.upper(), adj.upper()))
+        if quadrant is None:
+            return 0
+        dd = quadrant[0] + quadrant[1] * dd
+    return dd
+
+
+def polar_to_dd(value):
+    """
+    Polar angles are already plain decimal degrees.
+    """
+    return float(value)
+
+
+PARSERS = {'azimuth': dms_to_dd,
+           'bearing': bearing_to_dd,
+           'polar': polar_to_dd}
+
+
+def parse_angles(texts, angle='azimuth'):
+    """
+    Parse a list of angles.
+    :param texts: Iterable of angle texts
+    :param angle: 'azimuth', 'bearing' or 'polar' as in SurveySettings
+    :return: A float array of decimal degrees
+    """
+    parser = PARSERS[angle]
+    seen = {}
+    values = []
+    for text in texts:
+        try:
+            value = seen[text]
+        except KeyError:
+            value = seen[text] = parser(text)
+        values.append(value)
+    return numpy.array(values, dtype=float)
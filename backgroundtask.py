@@ -0,0 +1,107 @@
+#---------------------------------------------------------------------
+#
+# licensed under the terms of GNU GPL 2
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+#---------------------------------------------------------------------
+"""
+Functions run in a background thread with progress and cancellation.
+
+QGIS 2 has no QgsTask, so Task offers the parts of its API the plugin needs on
+top of a QThread.  The function gets the task as first argument; it should
+call task.setProgress() now and then, return early when task.isCanceled() and
+must not touch widgets or layers.
+"""
+
+from PyQt4.QtCore import QObject, QThread, pyqtSignal, pyqtSlot
+
+from pluginlog import logger
+
+
+class _Runner(QObject):
+    """
+    Lives in the worker thread and calls the function there.
+    """
+    progress = pyqtSignal(float)
+    done = pyqtSignal(bool, object)
+
+    def __init__(self, task):
+        QObject.__init__(self)
+        self.task = task
+
+    @pyqtSlot()
+    def run(self):
+        task = self.task
+        try:
+            result = task.function(task, *task.args)
+        except Exception as e:
+            logger.exception("%s failed", task.description)
+            self.done.emit(False, e)
+        else:
+            self.done.emit(True, result)
+
+
+class Task(QObject):
+    """
+    Run function(task, *args) in its own thread.
+    The signals are delivered in the thread that created the task:
+      progressChanged(float)  progress in percent
+      taskCompleted(object)   the return value of the function
+      taskTerminated(object)  the exception raised, or None when canceled
+    """
+    progressChanged = pyqtSignal(float)
+    taskCompleted = pyqtSignal(object)
+    taskTerminated = pyqtSignal(object)
+
+    def __init__(self, description, function, *args):
+        QObject.__init__(self)
+        self.description = description
+        self.function = function
+        self.args = args
+        self._canceled = False
+        self._thread = QThread()
+        self._runner = _Runner(self)
+        self._runner.moveToThread(self._thread)
+        self._thread.started.connect(self._runner.run)
+        self._runner.progress.connect(self.progressChanged)
+        self._runner.done.connect(self._finished)
+
+    def start(self):
+        self._thread.start()
+
+    def isActive(self):
+        return self._thread.isRunning()
+
+    def cancel(self):
+        self._canceled = True
+
+    def isCanceled(self):
+        return self._canceled
+
+    def setProgress(self, progress):
+        """
+        Report the progress in percent, from the worker thread.
+        """
+        self._runner.progress.emit(float(progress))
+
+    @pyqtSlot(bool, object)
+    def _finished(self, ok, result):
+        self._thread.quit()
+        self._thread.wait()
+        if ok and not self._canceled:
+            self.taskCompleted.emit(result)
+        else:
+            self.taskTerminated.emit(None if ok else result)
@@ -0,0 +1,157 @@
+#---------------------------------------------------------------------
+#
+# licensed under the terms of GNU GPL 2
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+#---------------------------------------------------------------------
+"""
+Batch computation of many traverses read from segment list files.
+
+Each traverse of a batch becomes a (id, survey, coordinates) tuple where
+coordinates is the (N, 3) array of traverse.Traverse.coordinates().
+
+Traverses are independent of each other, so compute_all can spread them over
+a concurrent.futures process pool (the "futures" backport on Python 2).
+Jobs and results are plain picklable tuples and arrays; no QGIS object is
+touched in the worker processes.  Jobs of binary segment lists go to the
+workers as a BinaryJob naming their file, which each worker memory maps
+itself, instead of a pickled copy of their columns.
+"""
+
+import math
+import multiprocessing
+import os
+from collections import namedtuple
+
+try:
+    from concurrent.futures import ProcessPoolExecutor
+except ImportError:
+    ProcessPoolExecutor = None
+
+import segmentbinary
+import segmentfile
+import traverse
+from pluginlog import logger
+
+# name of the field holding the id of the traverse a feature was drawn from
+TRAVERSE_ID = "traverse_id"
+
+# a job of a binary segment list, loaded again by the worker computing it
+BinaryJob = namedtuple("BinaryJob", "path id")
+
+
+def read_jobs(paths):
+    """
+    Read the traverses of a list of segment list files.
+    A directory stands for every file in it, in name order.  Traverses without
+    an id are named after their file.  Binary segment lists are memory mapped,
+    their jobs holding traverse.Columns instead of a list of segments.
+    :return: A generator of segmentfile.Job records
+    :raises IOError: If a file can not be read
+    :raises ValueError: If a file can not be parsed
+    """
+    for path in paths:
+        if os.path.isdir(path):
+            files = [os.path.join(path, name) for name in sorted(os.listdir(path))]
+            files = [name for name in files if os.path.isfile(name)]
+        else:
+            files = [path]
+        for filename in files:
+            name = os.path.splitext(os.path.basename(filename))[0]
+            if segmentbinary.isbinary(filename):
+                yield segmentbinary.load(filename, name)
+                continue
+            with open(filename) as f:
+                try:
+                    for job in segmentfile.read_traverses(f, name):
+                        yield job
+                except ValueError as e:
+                    raise ValueError("{0}: {1}".format(filename, e))
+
+
+def make_traverse(job, arc_count=20, arc_tolerance=None):
+    """
+    Return the traverse.Traverse (or ParsedTraverse) of a job.
+    :param job: A segmentfile.Job
+    """
+    settings = traverse.SurveySettings.from_header(job.settings, arc_count, arc_tolerance)
+    if isinstance(job.segments, traverse.Columns):
+        return traverse.ParsedTraverse(job.start, job.segments, settings)
+    return traverse.Traverse(job.start, job.segments, settings)
+
+
+def compute(job, arc_count=20, arc_tolerance=None):
+    """
+    Compute a single traverse.
+    :param job: A segmentfile.Job
+    :return: A (id, survey, coordinates) tuple
+    """
+    run = make_traverse(job, arc_count, arc_tolerance)
+    return job.id, run.settings.survey, run.coordinates()
+
+
+def _compute_chunk(jobs, arc_count, arc_tolerance):
+    return [compute(segmentbinary.load(job.path, job.id) if isinstance(job, BinaryJob) else job,
+                    arc_count, arc_tolerance)
+            for job in jobs]
+
+
+def _portable(job):
+    """
+    Return a BinaryJob for a job whose columns are memory mapped from a file,
+    the job itself otherwise.
+    """
+    if isinstance(job.segments, traverse.Columns):
+        path = getattr(job.segments.distance, 'filename', None)
+        if path:
+            return BinaryJob(path, job.id)
+    return job
+
+
+def compute_all(jobs, arc_count=20, arc_tolerance=None, workers=1):
+    """
+    Compute every traverse of jobs.
+    :param workers: Number of processes to spread the traverses over, 0 for one
+                    per CPU.  With 1, a single job or without concurrent.futures
+                    everything is computed in this process.
+    :return: A list of (id, survey, coordinates) tuples in job order
+    :raises ValueError: If a traverse can not be computed
+    """
+    jobs = list(jobs)
+    if not workers:
+        workers = multiprocessing.cpu_count()
+    workers = min(workers, len(jobs))
+    if workers > 1 and ProcessPoolExecutor is not None:
+        try:
+            return _parallel(jobs, arc_count, arc_tolerance, workers)
+        except (OSError, RuntimeError) as e:
+            # the pool could not be started or a worker died, not a bad job
+            logger.warning("process pool failed, computing in this process: %s", e)
+    return _compute_chunk(jobs, arc_count, arc_tolerance)
+
+
+def _parallel(jobs, arc_count, arc_tolerance, workers):
+    # a few chunks per worker keeps them all busy when traverses differ in size
+    # without paying the pickling overhead once per traverse
+    size = int(math.ceil(len(jobs) / (workers * 4.0)))
+    jobs = [_portable(job) for job in jobs]
+    with ProcessPoolExecutor(workers) as pool:
+        futures = [pool.submit(_compute_chunk, jobs[i:i + size], arc_count, arc_tolerance)
+                   for i in range(0, len(jobs), size)]
+        results = []
+        for future in futures:
+            results.extend(future.result())
+    return results
@@ -0,0 +1,297 @@
+#---------------------------------------------------------------------
+#
+# licensed under the terms of GNU GPL 2
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+#---------------------------------------------------------------------
+"""
+Benchmarks of the traverse computation core.
+
+Runs headless, without QGIS, from the plugin directory:
+
+  python benchmarks/bench.py                  run every case and compare with the baseline
+  python benchmarks/bench.py -s 1000 -s 100000  only run the given traverse sizes
+  python benchmarks/bench.py -k traverse      only run the cases whose name contains the text
+  python benchmarks/bench.py --save           store the results as the new baseline
+  python benchmarks/bench.py --check 1.5      exit with 1 when a case is over 1.5 times slower
+
+Every case runs in a fresh process.  Its memory is how much it raises the
+peak resident set size of that process (where the resource module is
+available) over the peak after generating the synthetic traverse, which is
+neither timed nor counted.
+"""
+
+import collections
+import json
+import multiprocessing
+import optparse
+import os
+import platform
+import sys
+import time
+
+import numpy
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import angles
+import traverse
+import utils
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+SIZES = (1000, 100000, 1000000)
+
+
+def synthetic(legs, arcs=False, dms=False, seed=1):
+    """
+    Return a random traverse of legs segments.
+    :param arcs: Make every leg an arc
+    :param dms: Write the azimuths as distinct DMS texts instead of decimal degrees
+    """
+    random = numpy.random.RandomState(seed)
+    azimuth = random.uniform(0, 360, legs)
+    distance = numpy.round(random.uniform(1, 100, legs), 3)
+    if dms:
+        minutes, seconds = random.randint(0, 60, legs), numpy.round(random.uniform(0, 60, legs), 2)
+        texts = ["{0}d{1}'{2}\"".format(int(a), m, s) for a, m, s in zip(azimuth, minutes, seconds)]
+    else:
+        texts = [repr(round(a, 6)) for a in azimuth]
+    radius = numpy.round(distance * random.uniform(0.6, 5, legs), 3) if arcs else numpy.zeros(legs)
+    direction = random.randint(0, 2, legs)
+    return [traverse.Segment(*values) for values in zip(texts, distance.tolist(), ["90"] * legs,
+                                                         [r or None for r in radius.tolist()], direction.tolist())]
+
+
+def bearings(legs, seed=1):
+    random = numpy.random.RandomState(seed)
+    quadrants = random.randint(0, 4, legs)
+    values = random.uniform(0, 90, legs)
+    return ["{0} {1}d {2}' {3}\" {4}".format("NSNS"[q], int(v), int(v * 60) % 60, round(v * 3600 % 60, 1), "EEWW"[q])
+            for q, v in zip(quadrants, values)]
+
+
+# name: (sizes, setup(legs) -> data, run(data))
+def _nextvertex(segments):
+    point = utils.Point(0, 0)
+    for segment in segments:
+        point = utils.nextvertex(point, segment.distance, float(segment.azimuth))
+
+
+def _arc_points(segments):
+    point = utils.Point(0, 0)
+    for segment in segments:
+        end = utils.nextvertex(point, segment.distance, float(segment.azimuth))
+        collections.deque(utils.arc_points(point, end, segment.distance, segment.radius, 20, segment.direction),
+                          maxlen=0)
+        point = end
+
+
+# copies of the dialog's angle parsing before the angles module, to compare against
+def legacy_dms_to_dd(dms):
+    "It's not fast, but it's a safe way of dealing with DMS"
+    for c in dms:
+        if ((not c.isdigit()) and (c != '.') and (c != '-')):
+            dms=dms.replace(c,';')
+    while (dms.find(";;")>=0):
+        dms=dms.replace(";;",';')
+    if dms[0]==';':
+        dms=dms[1:]
+    dms=dms.split(";")
+    dd=0
+    for i, f in enumerate(dms):
+        if f!="":
+            dd+=float(f)/pow(60, i)
+    return dd
+
+
+def legacy_bearing_to_dd(dms):
+    dms = dms.strip()
+    if (dms[0] == '-'):
+        rev = True
+        dms = dms[1:].strip()
+    else:
+        rev = False
+
+    baseDir = dms[0].upper()
+    if (baseDir in ['N','S']):
+        adjDir = dms[-1].upper()
+        bearing = True
+        if (baseDir == 'N'):
+            if (adjDir == 'E'):
+                base = 0.0
+                adj = 'add'
+            elif (adjDir == 'W'):
+                base = 360.0
+                adj = 'sub'
+            else:
+                return 0
+        elif (baseDir == 'S'):
+            base = 180.0
+            if (adjDir == 'E'):
+                adj = 'sub'
+            elif (adjDir == 'W'):
+                adj = 'add'
+            else:
+                return 0
+    else:
+        bearing = False
+
+    dd = legacy_dms_to_dd(dms)
+
+    if (rev):
+        dd = float(dd)+180.0
+
+    if (bearing == True):
+        if (adj == 'add'):
+            dd = float(base) + float(dd)
+        elif (adj == 'sub'):
+            dd = float(base) - float(dd)
+
+    return dd
+
+
+def _parse_each(parser):
+    def run(texts):
+        for text in texts:
+            parser(text)
+    return run
+
+
+def _run(settings):
+    def run(segments):
+        traverse.Traverse((0, 0, 0), segments, settings).coordinates()
+    return run
+
+
+def _to_qgspoints(coords):
+    utils.to_qgspoints(coords.tolist())
+
+
+CASES = [
+    ("utils.nextvertex", SIZES, synthetic, _nextvertex),
+    ("utils.arc_points", SIZES[:2], lambda legs: synthetic(legs, arcs=True), _arc_points),
+    ("angles.dms_to_dd", SIZES, lambda legs: [s.azimuth for s in synthetic(legs, dms=True)],
+     _parse_each(angles.dms_to_dd)),
+    ("angles.bearing_to_dd", SIZES, bearings, _parse_each(angles.bearing_to_dd)),
+    ("legacy dmsToDd", SIZES, lambda legs: [s.azimuth for s in synthetic(legs, dms=True)],
+     _parse_each(legacy_dms_to_dd)),
+    ("legacy bearingToDd", SIZES, bearings, _parse_each(legacy_bearing_to_dd)),
+    ("angles.parse_angles dms", SIZES, lambda legs: [s.azimuth for s in synthetic(legs, dms=True)],
+     lambda texts: angles.parse_angles(texts)),
+    ("traverse polygonal", SIZES, synthetic, _run(traverse.SurveySettings())),
+    ("traverse radial", SIZES, synthetic, _run(traverse.SurveySettings(survey='radial'))),
+    ("traverse polygonal arcs", SIZES, lambda legs: synthetic(legs, arcs=True), _run(traverse.SurveySettings())),
+    ("traverse polygonal dms", SIZES, lambda legs: synthetic(legs, dms=True), _run(traverse.SurveySettings())),
+    ("utils.to_qgspoints", SIZES, lambda legs: numpy.random.RandomState(1).uniform(0, 1000, (legs + 1, 3)),
+     _to_qgspoints),
+]
+
+
+def _peak_kb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # bytes on macOS, kilobytes elsewhere
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+def measure(name, legs):
+    """
+    Run one case, meant to be called in a fresh process.
+    :return: A dict of seconds, legs per second and the kB the case adds to
+             the peak memory of the process, or None when the case can not run here
+    """
+    _, _, setup, run = [case for case in CASES if case[0] == name][0]
+    try:
+        data = setup(legs)
+        before = _peak_kb()
+        started = time.time()
+        run(data)
+        seconds = time.time() - started
+    except ImportError:
+        return None
+    added = _peak_kb() - before if before is not None else None
+    return {'seconds': seconds, 'throughput': legs / seconds if seconds else float('inf'), 'added_kb': added}
+
+
+def _measure(args):
+    return measure(*args)
+
+
+def main(argv=None):
+    parser = optparse.OptionParser(usage=__doc__.strip().split("\n")[0])
+    parser.add_option("-s", "--size", dest="sizes", type=int, action="append", help="traverse size to run")
+    parser.add_option("-k", dest="keyword", default="", help="only run cases whose name contains this")
+    parser.add_option("--save", action="store_true", help="store the results as the baseline")
+    parser.add_option("--check", type=float, help="fail when a case is this many times slower than its baseline")
+    parser.add_option("--baseline", default=BASELINE, help="baseline file [%default]")
+    options, _ = parser.parse_args(argv)
+
+    baseline = {}
+    if os.path.exists(options.baseline):
+        with open(options.baseline) as f:
+            baseline = json.load(f).get('results', {})
+
+    results = {}
+    slower = []
+    pool = multiprocessing.Pool(1, maxtasksperchild=1)
+    print "{0:<28} {1:>8} {2:>10} {3:>14} {4:>10} {5:>9}".format(
+        "case", "legs", "seconds", "legs/s", "added kB", "baseline")
+    try:
+        for name, sizes, _, _ in CASES:
+            if options.keyword not in name:
+                continue
+            for legs in sizes:
+                if options.sizes and legs not in options.sizes:
+                    continue
+                result = pool.apply(_measure, ((name, legs),))
+                key = "{0}/{1}".format(name, legs)
+                if result is None:
+                    print "{0:<28} {1:>8} skipped, needs QGIS".format(name, legs)
+                    continue
+                results[key] = result
+                ratio = ""
+                if key in baseline:
+                    factor = result['seconds'] / baseline[key]['seconds']
+                    ratio = "x{0:.2f}".format(factor)
+                    if options.check and factor > options.check:
+                        slower.append(key)
+                print "{0:<28} {1:>8} {2:>10.4f} {3:>14.0f} {4:>10} {5:>9}".format(
+                    name, legs, result['seconds'], result['throughput'], result['added_kb'], ratio)
+                sys.stdout.flush()
+    finally:
+        pool.terminate()
+
+    if options.save:
+        baseline.update(results)
+        with open(options.baseline, 'w') as f:
+            json.dump({'python': platform.python_version(), 'numpy': numpy.__version__,
+                       'machine': platform.machine(), 'results': baseline},
+                      f, indent=1, sort_keys=True, separators=(',', ': '))
+            f.write("\n")
+    if slower:
+        print "slower than {0} times the baseline: {1}".format(options.check, ", ".join(slower))
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
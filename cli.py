@@ -0,0 +1,198 @@
+#---------------------------------------------------------------------
+#
+# licensed under the terms of GNU GPL 2
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+#---------------------------------------------------------------------
+"""
+Command line entry point for unattended batch runs, without QGIS or a display.
+
+Reads segment lists (text or binary, several traverses per file allowed),
+computes them in parallel and writes the features to a GeoPackage, Shapefile
+or GeoJSON file with the GDAL/OGR Python bindings:
+
+  python /path/to/qgsazimuth/cli.py -o lots.gpkg --crs EPSG:2193 incoming/*.txt
+
+Every feature gets the id of its traverse in a traverse_id field.  The
+coordinates are written as computed, in the CRS given with --crs.
+
+With --export the vertices or segments are streamed to a CSV, GeoJSON or
+newline delimited GeoJSON file instead, one traverse at a time and without
+GDAL:
+
+  python /path/to/qgsazimuth/cli.py --export vertices -o lots.csv incoming/
+"""
+
+import argparse
+import logging
+import os
+import sys
+
+import adjust
+import batch
+import export
+import wkb
+from pluginlog import logger
+
+# segments computed at a time by a streaming export
+EXPORT_BLOCK = 10000
+
+try:
+    from osgeo import ogr, osr
+except ImportError:
+    ogr = osr = None
+
+# OGR driver of each output file extension
+DRIVERS = {'.gpkg': 'GPKG',
+           '.shp': 'ESRI Shapefile',
+           '.geojson': 'GeoJSON',
+           '.json': 'GeoJSON'}
+
+
+def driver_name(path):
+    """
+    Return the OGR driver name for an output file.
+    :raises ValueError: For an extension that is not supported
+    """
+    extension = os.path.splitext(path)[1].lower()
+    try:
+        return DRIVERS[extension]
+    except KeyError:
+        raise ValueError("unsupported output format {0!r}, use one of {1}".format(
+            extension, ", ".join(sorted(DRIVERS))))
+
+
+def write(path, results, geometry='line', as_segments=False, crs=None, close=False):
+    """
+    Write computed traverses to a new vector file, replacing any existing one.
+    :param results: (id, survey, coordinates) tuples as batch.compute_all returns them
+    :param geometry: 'point', 'line' or 'polygon'
+    :param crs: The CRS as anything OGR reads, e.g. "EPSG:2193", or None
+    :param close: Close polygonal traverses on their start point with the compass rule
+    :return: The number of features written
+    :raises ValueError: If the file can not be written
+    :raises RuntimeError: If OGR reports an error
+    """
+    if ogr is None:
+        raise ValueError("writing {0} needs the GDAL/OGR Python bindings".format(path))
+    ogr.UseExceptions()
+    driver = ogr.GetDriverByName(driver_name(path))
+    if driver is None:
+        raise ValueError("GDAL has no {0} driver".format(driver_name(path)))
+    if os.path.exists(path):
+        driver.DeleteDataSource(path)
+    source = driver.CreateDataSource(path)
+
+    srs = None
+    if crs:
+        srs = osr.SpatialReference()
+        srs.SetFromUserInput(crs)
+    types = {'point': ogr.wkbPoint, 'line': ogr.wkbLineString, 'polygon': ogr.wkbPolygon}
+    results = list(results)
+    # radial surveys not drawn as segments are multi lines, the other lines are then
+    # written as single part multi lines to fit the layer
+    multi = (geometry == 'line' and not as_segments and
+             any(survey == 'radial' for _, survey, _ in results))
+    layer = source.CreateLayer(os.path.splitext(os.path.basename(path))[0], srs,
+                               ogr.wkbMultiLineString if multi else types[geometry])
+    layer.CreateField(ogr.FieldDefn(batch.TRAVERSE_ID, ogr.OFTString))
+    definition = layer.GetLayerDefn()
+
+    count = 0
+    layer.StartTransaction()
+    for tid, survey, coords in results:
+        if close and survey == 'polygonal':
+            closure = adjust.closure(coords)
+            logger.info("%s: misclosure %.4f, precision 1:%.0f", tid, closure.linear, closure.precision)
+            coords = adjust.bowditch(coords)
+        for data in wkb.geometries(coords, geometry, survey, as_segments):
+            feature = ogr.Feature(definition)
+            feature.SetField(batch.TRAVERSE_ID, str(tid))
+            shape = ogr.CreateGeometryFromWkb(data)
+            feature.SetGeometry(ogr.ForceToMultiLineString(shape) if multi else shape)
+            layer.CreateFeature(feature)
+            count += 1
+    layer.CommitTransaction()
+    # dropping the data source flushes it to disk
+    layer = source = None
+    return count
+
+
+def stream(jobs, arc_count=20, arc_tolerance=None):
+    """
+    Return the (id, survey, blocks) tuples export.export takes for jobs,
+    computing each traverse only while it is written.
+    """
+    for job in jobs:
+        run = batch.make_traverse(job, arc_count, arc_tolerance)
+        yield job.id, run.settings.survey, run.blocks(EXPORT_BLOCK)
+
+
+def parser():
+    parser = argparse.ArgumentParser(description="Draw segment lists into a vector file.")
+    parser.add_argument("inputs", nargs='+', metavar="INPUT",
+                        help="segment list file, or a directory of them")
+    parser.add_argument("-o", "--output", required=True,
+                        help="output file: " + ", ".join(sorted(DRIVERS)))
+    parser.add_argument("-g", "--geometry", choices=('line', 'polygon', 'point'), default='line')
+    parser.add_argument("--segments", action='store_true', help="draw lines as one feature per leg")
+    parser.add_argument("--close", action='store_true',
+                        help="close polygonal traverses with the compass rule")
+    parser.add_argument("--crs", help="CRS of the coordinates, e.g. EPSG:2193")
+    parser.add_argument("--export", choices=export.KINDS,
+                        help="stream the vertices or segments to a .csv, .geojson or .ndjson file "
+                             "instead of writing features; computes in this process")
+    parser.add_argument("-j", "--workers", type=int, default=0,
+                        help="worker processes, 0 for one per CPU (default)")
+    parser.add_argument("--arc-count", type=int, default=20, help="lines per arc (default 20)")
+    parser.add_argument("--arc-tolerance", type=float,
+                        help="max. distance of the arc lines from the arc, instead of --arc-count")
+    parser.add_argument("-v", "--verbose", action='store_true', help="log a line per traverse")
+    return parser
+
+
+def main(argv=None):
+    arguments = parser()
+    options = arguments.parse_args(argv)
+    if options.export and options.close:
+        arguments.error("--close needs whole traverses and can not be used with --export")
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter("%(levelname)s: %(message)s"))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO if options.verbose else logging.WARNING)
+
+    try:
+        if options.export:
+            format = export.format_for(options.output)
+            traverses = stream(batch.read_jobs(options.inputs), options.arc_count, options.arc_tolerance)
+            count = export.export_file(options.output, traverses, format, options.export)
+            logger.info("%d %s written to %s", count, options.export, options.output)
+            return 0
+        driver_name(options.output)
+        jobs = list(batch.read_jobs(options.inputs))
+        results = batch.compute_all(jobs, options.arc_count, options.arc_tolerance, options.workers)
+        count = write(options.output, results, options.geometry, options.segments, options.crs, options.close)
+        logger.info("%d traverses, %d features written to %s", len(results), count, options.output)
+        return 0
+    except (IOError, ValueError, RuntimeError) as e:
+        logger.error("%s", e)
+        return 1
+    finally:
+        logger.removeHandler(handler)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,152 @@
+#---------------------------------------------------------------------
+#
+# licensed under the terms of GNU GPL 2
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+#---------------------------------------------------------------------
+"""
+Persistent cache of computed vertex arrays.
+
+Entries are .npz files named after a hash of everything that goes into the
+computed vertices: the start point, the segments, the survey settings and the
+target CRS.  Reading an entry touches it, and writing one evicts the least
+recently used entries until the directory fits in its size limit again.
+"""
+
+import errno
+import hashlib
+import os
+import tempfile
+import zipfile
+
+import numpy
+
+import traverse
+from pluginlog import logger
+
+# bumped when the way vertices are computed changes, so old entries are not used
+VERSION = 1
+SUFFIX = ".npz"
+
+
+def key(run, *extra):
+    """
+    Return the cache key of a traverse.
+    :param run: A traverse.Traverse or traverse.ParsedTraverse
+    :param extra: Anything else the cached result depends on, e.g. the target
+                  CRS as WKT; must have a stable repr
+    :return: A hex digest
+    """
+    digest = hashlib.sha1()
+    digest.update(repr((VERSION, tuple(run.start), sorted(run.settings.__dict__.items()), extra)))
+    if isinstance(run, traverse.ParsedTraverse):
+        for column in run.table:
+            digest.update(numpy.ascontiguousarray(column).tobytes())
+    else:
+        digest.update(repr([tuple(segment) for segment in run.segments]))
+    return digest.hexdigest()
+
+
+class DiskCache(object):
+    """
+    A directory of cached arrays with least recently used eviction.
+    :ivar limit: Size limit of the directory in bytes, 0 to switch the cache off
+    """
+
+    def __init__(self, directory, limit=256 * 1024 * 1024):
+        self.directory = directory
+        self.limit = limit
+
+    def path(self, name):
+        return os.path.join(self.directory, name + SUFFIX)
+
+    def get(self, name):
+        """
+        Return the arrays stored under name as a dict, None if there are none.
+        """
+        if not self.limit:
+            return None
+        path = self.path(name)
+        try:
+            with numpy.load(path, allow_pickle=False) as entry:
+                arrays = dict(entry)
+            os.utime(path, None)
+        except (IOError, OSError):
+            return None
+        except (ValueError, zipfile.BadZipfile) as e:
+            logger.warning("removing unreadable cache entry %s: %s", path, e)
+            self._remove(path)
+            return None
+        return arrays
+
+    def put(self, name, **arrays):
+        """
+        Store arrays under name, then evict entries until the cache fits its limit.
+        Failing to write is logged, not raised, the cache being only an optimization.
+        """
+        if not self.limit:
+            return
+        path = self.path(name)
+        try:
+            if not os.path.isdir(self.directory):
+                os.makedirs(self.directory)
+            # written under a temporary name so a reader never sees half a file
+            handle, temp = tempfile.mkstemp(SUFFIX, ".", self.directory)
+            with os.fdopen(handle, 'wb') as f:
+                numpy.savez(f, **arrays)
+            self._remove(path)
+            os.rename(temp, path)
+            self.evict()
+        except (IOError, OSError) as e:
+            logger.warning("can not write cache entry %s: %s", path, e)
+
+    def evict(self):
+        """
+        Remove the least recently used entries until the cache fits its limit.
+        """
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(SUFFIX) or name.startswith("."):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.limit:
+                break
+            self._remove(path)
+            total -= size
+
+    def clear(self):
+        """
+        Remove every entry.
+        """
+        if os.path.isdir(self.directory):
+            for name in os.listdir(self.directory):
+                if name.endswith(SUFFIX):
+                    self._remove(os.path.join(self.directory, name))
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError as e:
+            if e.errno != errno.ENOENT:
+                logger.warning("can not remove cache entry %s: %s", path, e)
@@ -0,0 +1,156 @@
+#---------------------------------------------------------------------
+#
+# licensed under the terms of GNU GPL 2
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+#---------------------------------------------------------------------
+"""
+Streaming export of computed coordinates to CSV, GeoJSON or newline delimited
+GeoJSON, without building features or touching a layer.
+
+Traverses are written block by block as traverse.Traverse.blocks() computes
+them, so memory use does not grow with the size of a traverse.  Vertices are
+written one record each; segments are the lines drawing the traverse, between
+consecutive vertices of a polygonal traverse and from the station to every
+vertex of a radial one, as the dialog draws them.
+"""
+
+import csv
+import io
+import json
+import os
+
+import numpy
+
+FORMATS = ('csv', 'geojson', 'ndjson')
+KINDS = ('vertices', 'segments')
+
+_CSV_HEADERS = {'vertices': "traverse_id,vertex,x,y,z\n",
+                'segments': "traverse_id,segment,x1,y1,z1,x2,y2,z2\n"}
+_CSV_RECORDS = {'vertices': "%s,%d,%r,%r,%r",
+                'segments': "%s,%d,%r,%r,%r,%r,%r,%r"}
+_FEATURES = {'vertices': '{"type":"Feature","properties":{"traverse_id":%s,"vertex":%d},'
+                         '"geometry":{"type":"Point","coordinates":[%r,%r,%r]}}',
+             'segments': '{"type":"Feature","properties":{"traverse_id":%s,"segment":%d},'
+                         '"geometry":{"type":"LineString","coordinates":[[%r,%r,%r],[%r,%r,%r]]}}'}
+
+# text before the records, between them, after them and in place of the
+# last one when there are none
+_LAYOUTS = {'csv': (None, "\n", "\n", ""),
+            'geojson': ('{"type":"FeatureCollection","features":[\n', ",\n", "\n]}\n", "]}\n"),
+            'ndjson': ("", "\n", "\n", "")}
+
+
+def format_for(path):
+    """
+    Return the export format of a file name from its extension.
+    :raises ValueError: For an extension that is not supported
+    """
+    extension = os.path.splitext(path)[1].lower().lstrip(".")
+    if extension == 'json':
+        extension = 'geojson'
+    if extension not in FORMATS:
+        raise ValueError("unsupported export format {0!r}, use one of {1}".format(extension, ", ".join(FORMATS)))
+    return extension
+
+
+def segments(blocks, survey='polygonal'):
+    """
+    Turn the coordinate blocks of a traverse into blocks of segments.
+    :param blocks: Iterable of (N, 3) arrays, as traverse.Traverse.blocks() yields them
+    :return: A generator of (N, 6) arrays of the from and to x, y, z of each segment
+    """
+    origin = previous = None
+    for block in blocks:
+        block = numpy.asarray(block, dtype=float)
+        if origin is None and len(block):
+            # the first block starts with the start point
+            origin = previous = block[0]
+            block = block[1:]
+        if not len(block):
+            continue
+        if survey == 'radial':
+            starts = numpy.broadcast_to(origin, block.shape)
+        else:
+            starts = numpy.vstack((previous, block[:-1]))
+        yield numpy.hstack((starts, block))
+        previous = block[-1]
+
+
+def export(f, traverses, format='csv', kind='vertices'):
+    """
+    Write traverses to an open text file.
+    :param traverses: Iterable of (id, survey, blocks) tuples, blocks being an
+                      iterable of (N, 3) coordinate arrays; each is only iterated
+                      once, so generators keep memory use flat.  Unicode ids are
+                      written as UTF-8.
+    :param format: One of FORMATS
+    :param kind: 'vertices' or 'segments'
+    :return: The number of records written
+    """
+    if format not in FORMATS:
+        raise ValueError("invalid format: {0}".format(format))
+    if kind not in KINDS:
+        raise ValueError("invalid kind: {0}".format(kind))
+    header, separator, footer, empty = _LAYOUTS[format]
+    if format == 'csv':
+        header, template = _CSV_HEADERS[kind], _CSV_RECORDS[kind]
+    else:
+        template = _FEATURES[kind]
+
+    f.write(header)
+    count = 0
+    for tid, survey, blocks in traverses:
+        tid = _csv_text(tid) if format == 'csv' else json.dumps(tid)
+        if kind == 'segments':
+            blocks = segments(blocks, survey)
+        number = 0
+        for block in blocks:
+            records = [template % ((tid, i) + tuple(row))
+                       for i, row in enumerate(numpy.asarray(block).tolist(), number)]
+            if not records:
+                continue
+            f.write((separator if count else "") + separator.join(records))
+            number += len(records)
+            count += len(records)
+    f.write(footer if count else empty)
+    return count
+
+
+def export_file(path, traverses, format=None, kind='vertices'):
+    """
+    Write traverses to a new file as export() does, removing the partly
+    written file again when anything fails.
+    :param format: One of FORMATS, by default from the extension of path
+    :return: The number of records written
+    """
+    if format is None:
+        format = format_for(path)
+    try:
+        with open(path, 'w') as f:
+            return export(f, traverses, format, kind)
+    except BaseException:
+        if os.path.exists(path):
+            os.remove(path)
+        raise
+
+
+def _csv_text(value):
+    if isinstance(value, unicode):
+        value = value.encode('utf-8')
+    out = io.BytesIO()
+    csv.writer(out, lineterminator="").writerow([value])
+    return out.getvalue()
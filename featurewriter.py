@@ -0,0 +1,112 @@
+#---------------------------------------------------------------------
+#
+# licensed under the terms of GNU GPL 2
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+#---------------------------------------------------------------------
+"""
+Chunked writing of features into a layer.
+"""
+
+from itertools import islice
+
+from pluginlog import logger
+
+DEFAULT_CHUNK = 1000
+
+
+def chunks(iterable, size):
+    """
+    Yield lists of at most size items from iterable.
+    """
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class CommitResult(object):
+    """
+    Outcome of commit().
+    :ivar added: Number of features written and kept
+    :ivar failed: List of (chunk number, error message) for the chunks that failed
+    :ivar rolledback: True if features already written were removed again after a failure
+    """
+    def __init__(self):
+        self.added = 0
+        self.failed = []
+        self.rolledback = False
+
+    @property
+    def ok(self):
+        return not self.failed
+
+
+def commit(layer, features, chunk_size=DEFAULT_CHUNK, atomic=True):
+    """
+    Write features to layer, chunk_size at a time, so only one chunk is built
+    in memory at once when features is a generator.
+
+    When the layer is being edited the features go into its edit buffer and
+    are committed (or rolled back) by the user with the rest of the edits.
+    Otherwise they go straight to the data provider; with atomic set the first
+    failed chunk stops the run and, when the provider can delete features, the
+    chunks already written are deleted again.
+    """
+    result = CommitResult()
+    if layer.isEditable():
+        for index, chunk in enumerate(chunks(features, chunk_size)):
+            if layer.addFeatures(chunk, False):
+                result.added += len(chunk)
+            else:
+                result.failed.append((index, "edit buffer refused the features"))
+                if atomic:
+                    break
+        _report(layer, result)
+        return result
+
+    provider = layer.dataProvider()
+    added_ids = []
+    for index, chunk in enumerate(chunks(features, chunk_size)):
+        ok, added = provider.addFeatures(chunk)
+        if ok:
+            result.added += len(chunk)
+            if atomic:
+                added_ids.extend(feature.id() for feature in added)
+            continue
+
+        error = provider.error().message() if provider.hasErrors() else "provider refused the features"
+        result.failed.append((index, error))
+        if atomic:
+            if added_ids and provider.capabilities() & provider.DeleteFeatures:
+                result.rolledback = provider.deleteFeatures(added_ids)
+                if result.rolledback:
+                    result.added = 0
+            break
+
+    if result.added:
+        layer.updateExtents()
+    _report(layer, result)
+    return result
+
+
+def _report(layer, result):
+    for index, error in result.failed:
+        logger.warning("%s: chunk %d failed: %s", layer.name(), index, error)
+    if result.rolledback:
+        logger.warning("%s: features already written were removed again", layer.name())
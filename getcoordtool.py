@@ -1,88 +1,214 @@
-#---------------------------------------------------------------------
-# 
-# licensed under the terms of GNU GPL 2
-# 
-# This program is free software; you can redistribute it and/or modify
-# it under the terms of the GNU General Public License as published by
-# the Free Software Foundation; either version 2 of the License, or
-# (at your option) any later version.
-# 
-# This program is distributed in the hope that it will be useful,
-# but WITHOUT ANY WARRANTY; without even the implied warranty of
-# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
-# GNU General Public License for more details.
-# 
-# You should have received a copy of the GNU General Public License along
-# with this program; if not, write to the Free Software Foundation, Inc.,
-# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
-# 
-#---------------------------------------------------------------------
-
-from PyQt4.QtCore import *
-from PyQt4.QtGui import *
-from qgis.core import *
-from qgis.gui import *
-
-# Raster File Info Tool class
-class GetCoordTool(QgsMapTool):
-  finished = pyqtSignal(QgsPoint)
-
-  def __init__(self, canvas):
-    QgsMapTool.__init__(self,canvas)
-    self.canvas=canvas
-    self.cursor = QCursor(QPixmap(["16 16 3 1",
-                                   "# c None","a c #000000",". c #ffffff",
-                                   ".###########..##",
-                                   "...########.aa.#",
-                                   ".aa..######.aa.#",
-                                   "#.aaa..#####..##",
-                                   "#.aaaaa..##.aa.#",
-                                   "##.aaaaaa...aa.#",
-                                   "##.aaaaaa...aa.#",
-                                   "##.aaaaa.##.aa.#",
-                                   "###.aaaaa.#.aa.#",
-                                   "###.aa.aaa..aa.#",
-                                   "####..#..aa.aa.#",
-                                   "####.####.aa.a.#",
-                                   "##########.aa..#",
-                                   "###########.aa..",
-                                   "############.a.#",
-                                   "#############.##"]), 0, 0)
-
-    self.snapper = QgsMapCanvasSnapper(self.canvas)
-    self.bandpoint = QgsRubberBand(self.canvas, QGis.Point)
-    self.bandpoint.setIcon(QgsRubberBand.ICON_X)
-    self.bandpoint.setColor(QColor.fromRgb(255,50,255))
-    self.bandpoint.setIconSize(20)
-
-
-  def canvasPressEvent(self,event):
-    point = self.snappoint(event.pos())
-    self.finished.emit(point)
-
-  def snappoint(self, point):
-    try:
-        _, results = self.snapper.snapToBackgroundLayers(point)
-        point = results[0].snappedVertex
-        return point
-    except IndexError:
-        return self.canvas.getCoordinateTransform().toMapCoordinates(point)
-
-  def canvasMoveEvent(self,event):
-    point = self.snappoint(event.pos())
-    self.bandpoint.setToGeometry(QgsGeometry.fromPoint(point), None)
-
-  def activate(self):
-    QgsMapTool.activate(self)
-    self.canvas.setCursor(self.cursor)
-  
-  def deactivate(self):
-    #QgsMapTool.deactivate(self)
-    pass
-
-  def cleanup(self):
-    self.bandpoint.reset()
-
-  def isZoomTool(self):
-    return False
-
+#---------------------------------------------------------------------
+# 
+# licensed under the terms of GNU GPL 2
+# 
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+# 
+#---------------------------------------------------------------------
+
+from PyQt4.QtCore import *
+from PyQt4.QtGui import *
+from qgis.core import *
+from qgis.gui import *
+
+import numpy
+
+import projection
+import snapindex
+import wkb
+from pluginlog import logger
+
+# milliseconds over which mouse moves are coalesced into a single snap
+MOVE_INTERVAL = 15
+# features in view above which the vertices are not indexed and the snapper is used
+MAX_INDEX_FEATURES = 20000
+
+# Raster File Info Tool class
+class GetCoordTool(QgsMapTool):
+  finished = pyqtSignal(QgsPoint)
+
+  def __init__(self, canvas):
+    QgsMapTool.__init__(self,canvas)
+    self.canvas=canvas
+    self.cursor = QCursor(QPixmap(["16 16 3 1",
+                                   "# c None","a c #000000",". c #ffffff",
+                                   ".###########..##",
+                                   "...########.aa.#",
+                                   ".aa..######.aa.#",
+                                   "#.aaa..#####..##",
+                                   "#.aaaaa..##.aa.#",
+                                   "##.aaaaaa...aa.#",
+                                   "##.aaaaaa...aa.#",
+                                   "##.aaaaa.##.aa.#",
+                                   "###.aaaaa.#.aa.#",
+                                   "###.aa.aaa..aa.#",
+                                   "####..#..aa.aa.#",
+                                   "####.####.aa.a.#",
+                                   "##########.aa..#",
+                                   "###########.aa..",
+                                   "############.a.#",
+                                   "#############.##"]), 0, 0)
+
+    self.snapper = QgsMapCanvasSnapper(self.canvas)
+    self.bandpoint = QgsRubberBand(self.canvas, QGis.Point)
+    self.bandpoint.setIcon(QgsRubberBand.ICON_X)
+    self.bandpoint.setColor(QColor.fromRgb(255,50,255))
+    self.bandpoint.setIconSize(20)
+
+    # vertices in view of the layers snapping to vertices, and a snapper for
+    # the layers snapping to segments, built on the first move or click after
+    # the map is redrawn (panned, zoomed, edited) or the snapping options change
+    self.index = None
+    self.tolerance = 0.0
+    self.segmentsnapper = None
+    self.indexvalid = False
+    self.canvas.extentsChanged.connect(self.invalidateindex)
+    self.canvas.layersChanged.connect(self.invalidateindex)
+    self.canvas.mapCanvasRefreshed.connect(self.invalidateindex)
+    QgsProject.instance().snapSettingsChanged.connect(self.invalidateindex)
+
+    self.movepos = None
+    self.movetimer = QTimer()
+    self.movetimer.setSingleShot(True)
+    self.movetimer.setInterval(MOVE_INTERVAL)
+    self.movetimer.timeout.connect(self.hover)
+
+
+  def canvasPressEvent(self,event):
+    point = self.snappoint(event.pos())
+    self.finished.emit(point)
+
+  def snappoint(self, pos):
+    """
+    Return the map point of a canvas position, snapped to the nearest vertex
+    (or segment, for layers snapping to segments) within tolerance.  Hovering
+    and clicking both go through here, so the marker shows the point a click picks.
+    """
+    point = self.canvas.getCoordinateTransform().toMapCoordinates(pos)
+    if not self.indexvalid:
+      self.index, self.tolerance, self.segmentsnapper = self.buildindex()
+      self.indexvalid = True
+    if self.index is None and self.segmentsnapper is None:
+      if self.tolerance:
+        # too many features in view to index
+        _, results = self.snapper.snapToBackgroundLayers(pos)
+        if results:
+          point = results[0].snappedVertex
+      return point
+
+    candidates = []
+    if self.index is not None:
+      vertex = self.index.nearest(point.x(), point.y(), self.tolerance)
+      if vertex is not None:
+        candidates.append(QgsPoint(*vertex))
+    if self.segmentsnapper is not None:
+      _, results = self.segmentsnapper.snapMapPoint(point)
+      candidates.extend(result.snappedVertex for result in results)
+    if candidates:
+      point = min(candidates, key=point.sqrDist)
+    return point
+
+  def canvasMoveEvent(self,event):
+    # only the last position of a burst of moves is snapped
+    self.movepos = event.pos()
+    if not self.movetimer.isActive():
+      self.movetimer.start()
+
+  def hover(self):
+    point = self.snappoint(self.movepos)
+    self.bandpoint.setToGeometry(QgsGeometry.fromPoint(point), None)
+
+  def invalidateindex(self):
+    self.indexvalid = False
+
+  def buildindex(self):
+    """
+    Index the vertices in view of the layers snapping to vertices in the project.
+    Layers that snap to segments too are left to a QgsSnapper.
+    :return: A snapindex.VertexIndex or None, the largest snapping tolerance of
+             the indexed layers in map units, and a QgsSnapper for the other
+             layers or None.  None, a tolerance and None when there are more
+             than MAX_INDEX_FEATURES features in view.
+    """
+    settings = self.canvas.mapSettings()
+    extent = self.canvas.extent()
+    project = QgsProject.instance()
+    parts = []
+    tolerance = 0.0
+    count = 0
+    snaplayers = []
+    for layer in self.canvas.layers():
+      if not isinstance(layer, QgsVectorLayer):
+        continue
+      ok, enabled, snapto, units, layertolerance, _ = project.snapSettingsForLayer(layer.id())
+      if not (ok and enabled):
+        continue
+      if snapto != QgsSnapper.SnapToVertex:
+        snaplayer = QgsSnapper.SnapLayer()
+        snaplayer.mLayer = layer
+        snaplayer.mSnapTo = snapto
+        snaplayer.mTolerance = layertolerance
+        snaplayer.mUnitType = units
+        snaplayers.append(snaplayer)
+        continue
+      tolerance = max(tolerance, QgsTolerance.toleranceInMapUnits(layertolerance, layer, settings, units))
+      request = QgsFeatureRequest().setFilterRect(settings.mapToLayerCoordinates(layer, extent))
+      request.setSubsetOfAttributes([])
+      coords = []
+      for feature in layer.getFeatures(request):
+        count += 1
+        if count > MAX_INDEX_FEATURES:
+          logger.debug("more than %d features in view, snapping without an index", MAX_INDEX_FEATURES)
+          return None, tolerance, None
+        geometry = feature.geometry()
+        if geometry is None:
+          continue
+        try:
+          coords.append(wkb.vertices(geometry.asWkb()))
+        except ValueError as e:
+          logger.debug("%s: feature %d not indexed: %s", layer.name(), feature.id(), e)
+      if not coords:
+        continue
+      coords = numpy.concatenate(coords)
+      if settings.hasCrsTransformEnabled():
+        coords = projection.reproject(coords, layer.crs(), settings.destinationCrs())
+      parts.append(coords)
+
+    segmentsnapper = None
+    if snaplayers:
+      segmentsnapper = QgsSnapper(settings)
+      segmentsnapper.setSnapMode(QgsSnapper.SnapWithOneResult)
+      segmentsnapper.setSnapLayers(snaplayers)
+    if not parts or not tolerance:
+      return None, 0.0, segmentsnapper
+    index = snapindex.VertexIndex(numpy.concatenate(parts), tolerance)
+    logger.debug("snap index of %d vertices, tolerance %s", len(index), tolerance)
+    return index, tolerance, segmentsnapper
+
+  def activate(self):
+    QgsMapTool.activate(self)
+    self.canvas.setCursor(self.cursor)
+  
+  def deactivate(self):
+    #QgsMapTool.deactivate(self)
+    pass
+
+  def cleanup(self):
+    self.movetimer.stop()
+    self.bandpoint.reset()
+
+  def isZoomTool(self):
+    return False
+
@@ -0,0 +1,91 @@
+#---------------------------------------------------------------------
+#
+# licensed under the terms of GNU GPL 2
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+#---------------------------------------------------------------------
+"""
+Logging for the plugin.
+
+Everything goes through the standard logging module under the "qgsazimuth"
+logger, which only passes warnings by default.  The level and the vertex
+trace sample come from the plugin settings:
+
+  /Plugin-qgsAzimuth/logLevel     DEBUG|INFO|WARNING (default WARNING)
+  /Plugin-qgsAzimuth/traceSample  log every Nth computed vertex at DEBUG, 0 for none
+
+INFO gives one summary line per drawing run.
+"""
+
+import logging
+
+logger = logging.getLogger("qgsazimuth")
+logger.addHandler(logging.NullHandler())
+logger.setLevel(logging.WARNING)
+logger.propagate = False
+
+_trace_sample = 0
+
+
+class MessageLogHandler(logging.Handler):
+    """
+    Forward log records to the QGIS message log panel.
+    """
+    def __init__(self, tag="qgsAzimuth"):
+        logging.Handler.__init__(self)
+        from qgis.core import QgsMessageLog
+        self.messagelog = QgsMessageLog
+        self.tag = tag
+
+    def emit(self, record):
+        if record.levelno >= logging.ERROR:
+            level = self.messagelog.CRITICAL
+        elif record.levelno >= logging.WARNING:
+            level = self.messagelog.WARNING
+        else:
+            level = self.messagelog.INFO
+        self.messagelog.logMessage(self.format(record), self.tag, level)
+
+
+def install_message_log():
+    """
+    Send the plugin log to the QGIS message log panel, once.
+    """
+    if not any(isinstance(handler, MessageLogHandler) for handler in logger.handlers):
+        logger.addHandler(MessageLogHandler())
+
+
+def configure(level=logging.WARNING, trace_sample=0):
+    """
+    Set the log level (a logging constant or its name) and the vertex trace sample.
+    """
+    global _trace_sample
+    if not isinstance(level, int):
+        level = logging.getLevelName(str(level).upper())
+        if not isinstance(level, int):
+            level = logging.WARNING
+    logger.setLevel(level)
+    _trace_sample = max(int(trace_sample), 0)
+
+
+def trace_vertices(points, label="vertex"):
+    """
+    Log every Nth point at DEBUG level when vertex tracing is switched on.
+    """
+    if not _trace_sample or not logger.isEnabledFor(logging.DEBUG):
+        return
+    for i in range(0, len(points), _trace_sample):
+        logger.debug("%s %d: %s", label, i, points[i])
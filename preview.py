@@ -0,0 +1,200 @@
+#---------------------------------------------------------------------
+#
+# licensed under the terms of GNU GPL 2
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+#---------------------------------------------------------------------
+"""
+Live preview of the traverse being edited, drawn as a rubber band on the map canvas.
+"""
+
+import numpy
+
+from PyQt4.QtGui import QColor
+from qgis.core import QGis, QgsGeometry
+from qgis.gui import QgsRubberBand
+
+import projection
+import vertexcache
+import wkb
+from pluginlog import logger
+
+
+class TraversePreview(object):
+    """
+    Keeps a VertexCache in step with the rows of a SegmentModel, so editing,
+    inserting, removing or moving a row only updates the legs it affects,
+    and draws the traverse as a rubber band while shown.
+    """
+
+    def __init__(self, canvas, model):
+        self.canvas = canvas
+        self.model = model
+        self.band = QgsRubberBand(canvas, QGis.Line)
+        self.band.setColor(QColor.fromRgb(255, 50, 255))
+        self.band.setWidth(2)
+        self.cache = vertexcache.VertexCache()
+        self.start = (0, 0, 0)
+        # None while there is no valid start point and settings to follow
+        self.settings = None
+        self.crs = None
+        self.visible = False
+        # set when the cache could not follow a change and must be rebuilt
+        self.stale = True
+        # counts the changes followed, so a cache computed meanwhile can tell it is out of date
+        self.changes = 0
+
+        model.rowsInserted.connect(self.rowsinserted)
+        model.rowsRemoved.connect(self.rowsremoved)
+        model.rowsMoved.connect(self.rowsmoved)
+        model.dataChanged.connect(self.datachanged)
+        model.modelReset.connect(self.refresh)
+
+    def setup(self, start, settings, crs=None):
+        """
+        Follow the traverse from start with settings.
+        A new start point alone just moves the cached vertices.
+        :param crs: The (layer, map) CRS pair to draw the preview with, or None
+        """
+        self.crs = crs
+        self.start = start
+        if not self.stale and settings == self.settings:
+            self.update(self.cache.move, start)
+        else:
+            self.settings = settings
+            self.refresh()
+
+    def invalidate(self):
+        """
+        Stop following the model until the next setup.
+        """
+        self.settings = None
+        self.stale = True
+        self.band.reset(QGis.Line)
+
+    def remove(self):
+        """
+        Stop following the model and take the rubber band off the canvas, for good.
+        """
+        self.invalidate()
+        self.model.rowsInserted.disconnect(self.rowsinserted)
+        self.model.rowsRemoved.disconnect(self.rowsremoved)
+        self.model.rowsMoved.disconnect(self.rowsmoved)
+        self.model.dataChanged.disconnect(self.datachanged)
+        self.model.modelReset.disconnect(self.refresh)
+        self.canvas.scene().removeItem(self.band)
+
+    def setVisible(self, visible):
+        self.visible = visible
+        if not visible:
+            self.band.reset(QGis.Line)
+        elif self.stale:
+            # changes were not followed while hidden
+            self.update(None)
+        else:
+            self.draw()
+
+    def coordinates(self, start, settings):
+        """
+        Return the cached coordinates of the traverse when they are up to date
+        for start and settings, None otherwise.
+        """
+        if self.stale or settings != self.settings or tuple(start) != tuple(self.start):
+            return None
+        return self.cache.coordinates()
+
+    def seed(self, cache, changes):
+        """
+        Take over the VertexCache of a drawing task while the preview has none,
+        so the next change after a drawing is followed instead of rebuilt.
+        It is dropped when the model, the start point or the settings changed
+        since the task started.
+        :param changes: The value of changes when the task started
+        """
+        if (not self.stale or changes != self.changes or self.settings is None
+                or cache.settings != self.settings or tuple(cache.start) != tuple(self.start)):
+            return
+        self.cache = cache
+        self.stale = False
+        if self.visible:
+            self.draw()
+
+    def refresh(self):
+        self.stale = True
+        self.update(None)
+
+    def rowsinserted(self, parent, first, last):
+        self.update(self.cache.insert, first, [self.model.segment(row) for row in range(first, last + 1)])
+
+    def rowsremoved(self, parent, first, last):
+        self.update(self.cache.remove, first, last - first + 1)
+
+    def rowsmoved(self, parent, first, last, destination, row):
+        if first == last and row == first - 1:
+            self.update(self.cache.swap, row)
+        else:
+            self.refresh()
+
+    def datachanged(self, topleft, bottomright):
+        first, last = topleft.row(), bottomright.row()
+        self.update(self.cache.replace, first, [self.model.segment(row) for row in range(first, last + 1)])
+
+    def update(self, change, *args):
+        """
+        Apply a change to the cache and redraw.
+        The model has already changed, so a stale cache is simply rebuilt from it.
+        While hidden a current cache still follows the change, but a stale one
+        is only rebuilt once the preview is shown, so loading a long list
+        computes nothing until then.
+        """
+        self.changes += 1
+        if self.settings is None:
+            return
+        if self.stale and not self.visible:
+            return
+        try:
+            if self.stale:
+                self.cache.reset(self.start, list(self.model.segments()), self.settings)
+            else:
+                change(*args)
+            self.stale = False
+        except ValueError as e:
+            # rows being typed in are often incomplete, just hide until they are valid
+            logger.debug("no preview: %s", e)
+            self.stale = True
+            self.band.reset(QGis.Line)
+            return
+        if self.visible:
+            self.draw()
+
+    def draw(self):
+        if self.cache.radial:
+            # a ray to the end of every shot
+            coords = numpy.vstack((self.cache.start, self.cache.ends))
+        else:
+            coords = self.cache.coordinates()
+        if self.crs is not None:
+            coords = projection.reproject(coords, *self.crs)
+        if len(coords) < 2:
+            self.band.reset(QGis.Line)
+            return
+        if self.cache.radial:
+            data = wkb.star(coords[0], coords[1:])
+        else:
+            data = wkb.linestring(coords)
+        geometry = QgsGeometry()
+        geometry.fromWkb(data)
+        self.band.setToGeometry(geometry, None)
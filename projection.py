@@ -0,0 +1,74 @@
+#---------------------------------------------------------------------
+#
+# licensed under the terms of GNU GPL 2
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+#---------------------------------------------------------------------
+"""
+Reprojection of computed coordinate arrays.
+"""
+
+import threading
+
+from qgis.core import QgsCoordinateTransform, QgsGeometry
+
+import wkb
+
+# transforms by (source, dest) CRS pair, shared by the GUI and every drawing
+# task; a transform is not safe to use from two threads at once, so they are
+# only looked up and used while holding _lock
+_transforms = {}
+_lock = threading.Lock()
+
+
+def _key(crs):
+    return crs.authid() or crs.toWkt()
+
+
+def transform(source, dest):
+    """
+    Return a QgsCoordinateTransform from source to dest, reusing the one made for
+    an earlier call with the same pair of CRS.  Hold _lock while using it.
+    """
+    key = (_key(source), _key(dest))
+    try:
+        return _transforms[key]
+    except KeyError:
+        xform = _transforms[key] = QgsCoordinateTransform(source, dest)
+        return xform
+
+
+def reproject(coords, source, dest):
+    """
+    Transform the x, y columns of a coordinate array from source to dest.
+    All the points go through the transform in a single call, as the vertices
+    of one multi point geometry, instead of a call and a QgsPoint per vertex.
+    :param coords: A (N, 2) or (N, 3) array; it is not modified
+    :return: coords itself when both CRS are the same, otherwise a transformed copy
+    :raises ValueError: If the points can not be transformed
+    """
+    if source == dest or not len(coords):
+        return coords
+
+    geometry = QgsGeometry()
+    geometry.fromWkb(wkb.multipoint(coords))
+    with _lock:
+        failed = geometry.transform(transform(source, dest))
+    if failed:
+        raise ValueError("can not transform the coordinates")
+    result = coords.copy()
+    result[:, :2] = wkb.vertices(geometry.asWkb())
+    return result
@@ -1,654 +1,881 @@
-#---------------------------------------------------------------------
-#
-# licensed under the terms of GNU GPL 2
-#
-# This program is free software; you can redistribute it and/or modify
-# it under the terms of the GNU General Public License as published by
-# the Free Software Foundation; either version 2 of the License, or
-# (at your option) any later version.
-#
-# This program is distributed in the hope that it will be useful,
-# but WITHOUT ANY WARRANTY; without even the implied warranty of
-# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
-# GNU General Public License for more details.
-#
-# You should have received a copy of the GNU General Public License along
-# with this program; if not, write to the Free Software Foundation, Inc.,
-# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
-#
-#---------------------------------------------------------------------
-
-import os,sys
-
-from PyQt4.QtCore import *
-from PyQt4.QtGui import *
-from qgis.core import *
-
-from ui_control import ui_Control
-import resources
-from math import *
-from getcoordtool import *
-
-import utils
-
-def log(message):
-    from qgis.core import QgsMessageLog
-    QgsMessageLog.logMessage(str(message), "Plugin")
-
-class qgsazimuth (object):
-    """
-    Base class for the qgsAzimuth plugin
-    - Provides a means to draw a feature by specifying the angle and distance beetween points.
-    - Supports angles in either the conventional 0.0 - 360.0 clockwise from North
-        or the surveyor's 'Easting' system with bearings plus or minus 90 deg. from North or South
-    - Supports magnetic declination as degrees plus or minus for East or West respectively
-    - supports inputs in feet or the current CRS units
-    """
-
-    # just a test to see if mods are taking
-
-    def __init__(self, iface):
-        self.iface = iface
-        self.legend = iface.legendInterface()
-        self.canvas = iface.mapCanvas()
-        self.fPath = ""  # set default working directory, updated from config file & by Import/Export
-
-    def initGui(self):
-        # create action that will start plugin configuration
-        self.action = QAction(QIcon(":qgsazimuth.png"), "Azimuth and distance", self.iface.mainWindow())
-        self.action.setWhatsThis("Azimuth and distance")
-        self.action.triggered.connect(self.run)
-
-        # add toolbar button and menu item
-        self.iface.addPluginToMenu("&Topography", self.action)
-        self.iface.addToolBarIcon(self.action)
-        self.pluginGui = ui_Control(self.iface.mainWindow())
-
-        self.tool = GetCoordTool(self.canvas)
-
-    def unload(self):
-        # remove the plugin menu item and icon
-        self.iface.removePluginMenu("&Topography",self.action)
-        self.iface.removeToolBarIcon(self.action)
-        self.tool.cleanup()
-        self.saveConf()
-
-    def run(self):
-        # create and show a configuration dialog or something similar
-        flags = Qt.WindowTitleHint | Qt.WindowSystemMenuHint | Qt.WindowMaximizeButtonHint  # QgisGui.ModalDialogFlags
-        self.pluginGui = ui_Control(self.iface.mainWindow())
-
-        #misc init
-        self.loadConf() # get config data
-        self.clearList()
-        self.setDeclination('0.0')
-        self.setStartAt("0;0;90")    # remove previous StartAt point
-
-        #INSERT EVERY SIGNAL CONECTION HERE!
-        self.pluginGui.finished.connect(self.cleanup)
-        self.pluginGui.pushButton_vertexAdd.clicked.connect(self.addRow)
-        self.pluginGui.pushButton_vertexInsert.clicked.connect(self.insertRow)
-        self.pluginGui.pushButton_segListRowDel.clicked.connect(self.delRow)
-        self.pluginGui.pushButton_segListLoad.clicked.connect(self.loadList)
-        self.pluginGui.pushButton_segListClear.clicked.connect(self.clearList)
-        self.pluginGui.pushButton_objectDraw.clicked.connect(self.addgeometry)
-        self.pluginGui.pushButton_startCapture.clicked.connect(self.startgetpoint)
-        self.pluginGui.pushButton_segListSave.clicked.connect(self.saveList)
-
-        self.pluginGui.lineEdit_crs.setText(self.iface.mapCanvas().mapRenderer().destinationCrs().description())
-
-        self.pluginGui.table_segmentList.setCurrentCell(0,0)
-        if self.iface.activeLayer():
-            self.updatelayertext(self.iface.activeLayer())
-            self.pluginGui.radioButton_useActiveLayer.setChecked(True)
-        else:
-            self.pluginGui.radioButton_useActiveLayer.setEnabled(False)
-            self.pluginGui.radioButton_useMemoryLayer.setChecked(True)
-        self.legend.currentLayerChanged.connect(self.updatelayertext)
-        self.pluginGui.show()
-
-        # for debugging convenience
-        self.notes = self.pluginGui.plainTextEdit_note
-
-    def cleanup(self):
-        self.tool.cleanup()
-
-    def updatelayertext(self, layer):
-        if not layer:
-            self.pluginGui.radioButton_useActiveLayer.setEnabled(False)
-        else:
-            self.pluginGui.radioButton_useActiveLayer.setEnabled(True)
-            self.pluginGui.radioButton_useActiveLayer.setText("Active Layer ({0})".format(layer.name()))
-
-    @property
-    def useactivelayer(self):
-        return self.pluginGui.radioButton_useActiveLayer.isChecked()
-
-    def addgeometry(self):
-        #initialization
-        s = QSettings()
-        if self.useactivelayer:
-            vectorlayer = self.iface.activeLayer()
-        else:
-            oldValidation = s.value("/Projections/defaultBehaviour", "useProject")
-            s.setValue("/Projections/defaultBehaviour", "useProject")
-            vectorlayer=QgsVectorLayer("LineString", "tmp_plot", "memory")
-            s.setValue("/Projections/defaultBehaviour", oldValidation)
-
-
-
-        # if magnetic heading chosen, assure we have a declination angle
-        if (self.pluginGui.radioButton_magNorth.isChecked())  and (str(self.pluginGui.lineEdit_magNorth.text()) == ''):   #magnetic headings
-            self.say("No magnetic declination value entered.")
-            return 0
-
-        #Get starting point coordinates
-        X0 = float(str(self.pluginGui.lineEdit_vertexX0.text()))
-        Y0 = float(str(self.pluginGui.lineEdit_vertexY0.text()))
-        Z0 = float(str(self.pluginGui.lineEdit_vertexZ0.text()))
-
-        #check if the starting point is specified
-        if (X0 == 0 and Y0 == 0 and Z0 == 90):
-            self.say("You must supply a starting point.")
-            return 0
-
-        # Check if there are any segments
-        if (self.pluginGui.table_segmentList.rowCount() < 1):
-            self.say("You must enter at least one segment.")
-            return 0
-
-        if (self.pluginGui.radioButton_radialSurvey.isChecked()):
-            surveytype='radial'
-        elif (self.pluginGui.radioButton_boundarySurvey.isChecked()):
-            surveytype = 'polygonal'
-
-        arcpoint_count = self.pluginGui.spin_arclines.value()
-
-        def get_points(surveytype):
-            """
-            Return a list of calculated points for the full run.
-            :param surveytype:
-            :return:
-            """
-            vlist = []
-            vlist.append(utils.Point(X0, Y0, Z0))
-            # convert segment list to set of vertice
-            for i in range(self.pluginGui.table_segmentList.rowCount()):
-                az = str(self.pluginGui.table_segmentList.item(i, 0).text())
-                dis = float(str(self.pluginGui.table_segmentList.item(i, 1).text()))
-                zen = str(self.pluginGui.table_segmentList.item(i, 2).text())
-                direction = str(self.pluginGui.table_segmentList.item(i, 4).text())
-                direction = utils.Direction.resolve(direction)
-
-                try:
-                    radius = float(self.pluginGui.table_segmentList.item(i, 3).text())
-                except ValueError:
-                    radius = None
-
-                if (self.pluginGui.radioButton_englishUnits.isChecked()):
-                    # adjust for input in feet, not meters
-                    dis = float(dis) / 3.281
-
-                #checking degree input
-                if (self.pluginGui.radioButton_azimuthAngle.isChecked()):
-                    az = float(self.dmsToDd(az))
-                    zen = float(self.dmsToDd(zen))
-                elif (self.pluginGui.radioButton_bearingAngle.isChecked()):
-                    az = float(self.bearingToDd(az))
-                    zen = float(self.bearingToDd(zen))
-
-                #correct for magnetic compass headings if necessary
-                if (self.pluginGui.radioButton_defaultNorth.isChecked()):
-                    self.magDev = 0.0
-                elif (self.pluginGui.radioButton_magNorth.isChecked()):
-                    self.magDev = float(self.dmsToDd(str(self.pluginGui.lineEdit_magNorth.text())))
-                az = float(az) + float(self.magDev)
-
-                #correct for angles outside of 0.0-360.0
-                while (az > 360.0):
-                    az = az - 360.0
-                while (az < 0.0):
-                    az = az + 360.0
-
-                # checking survey type
-                if surveytype == 'radial':
-                    reference_point = vlist[0]  # reference first vertex
-
-                if surveytype == 'polygonal':
-                    reference_point = vlist[-1]  #reference previous vertex
-
-                nextpoint = utils.nextvertex(reference_point, dis, az, zen)
-                log(nextpoint)
-                log(reference_point)
-
-                if radius:
-                    # If there is a radius then we are drawing a arc.
-                    # Calculate the arc points.
-                    points = list(utils.arc_points(reference_point, nextpoint, dis, radius,
-                                                   point_count=arcpoint_count,
-                                                   direction=direction))
-
-                    if direction == utils.Direction.ANTICLOCKWISE:
-                        points = reversed(points)
-
-                    # Append them to the final points list.
-                    vlist.extend(points)
-
-                vlist.append(nextpoint)
-
-            return vlist
-
-        #reprojecting to projects SRS
-        points = get_points(surveytype)
-        vlist = self.reproject(points, vectorlayer)
-
-        as_segments = self.pluginGui.checkBox_asSegments.isChecked()
-
-        def createpoints(points):
-            for point in points:
-                geom = QgsGeometry.fromPoint(point)
-                feature = QgsFeature()
-                feature.setGeometry(geom)
-                yield feature
-
-        def createline(points):
-            """
-            Creata a line feature from a list of points
-            :param points: List of QgsPoints
-            """
-            geom = QgsGeometry.fromPolyline(points)
-            feature = QgsFeature()
-            feature.setGeometry(geom)
-            return feature
-
-        def createpolygon(polygon):
-            """
-            Create a polygon from a list of points
-            :param points: List of QgsPoints
-            """
-            geom = QgsGeometry.fromPolygon(polygon)
-            QgsMessageLog.logMessage(str(geom.isGeosValid()))
-            feature = QgsFeature()
-            feature.setGeometry(geom)
-            return feature
-
-
-        featurelist=[]
-        geometrytype= vectorlayer.geometryType()
-        if geometrytype == QGis.Point:
-            points = utils.to_qgspoints(vlist)
-            features = createpoints(points)
-            featurelist.extend(features)
-
-        elif geometrytype == QGis.Line:
-            pointlist = utils.to_qgspoints(vlist, repeatfirst=surveytype == 'radial')
-
-            if as_segments:
-                # If the line is to be draw as segments then we loop the pairs and create a line for each one.
-                for pair in utils.pairs(pointlist, matchtail=surveytype == 'polygonal'):
-                    feature = createline(pair)
-                    featurelist.append(feature)
-            else:
-                feature = createline(pointlist)
-                featurelist.append(feature)
-
-        elif geometrytype == QGis.Polygon:
-            polygon = utils.to_qgspoints(vlist)
-            feature = createpolygon([polygon])
-            featurelist.append(feature)
-
-        #commit
-        provider=vectorlayer.dataProvider()
-        provider.addFeatures(featurelist)
-        if not self.useactivelayer:
-            QgsMapLayerRegistry.instance().addMapLayer(vectorlayer)
-
-        self.iface.mapCanvas().refresh()
-
-    def bearingToDd (self,  dms):
-        #allow survey bearings in form:  - N 25d 34' 40" E
-        #where minus ('-') sign allows handling bearings given in reverse direction
-        dms = dms.strip()
-        if (dms[0] == '-'):
-            rev = True
-            dms = dms[1:].strip()
-        else:
-            rev = False
-
-        baseDir = dms[0].upper()
-        if (baseDir in ['N','S']):
-            adjDir = dms[-1].upper()
-            bearing = True
-            if (baseDir == 'N'):
-                if (adjDir == 'E'):
-                    base = 0.0
-                    adj = 'add'
-                elif (adjDir == 'W'):
-                    base = 360.0
-                    adj = 'sub'
-                else:
-                    return 0
-            elif (baseDir == 'S'):
-                base = 180.0
-                if (adjDir == 'E'):
-                    adj = 'sub'
-                elif (adjDir == 'W'):
-                    adj = 'add'
-                else:
-                    return 0
-        else:
-            bearing = False
-
-        dd = self.dmsToDd(dms)
-
-        if (rev):
-            dd = float(dd)+180.0
-
-        if (bearing == True):
-            if (adj == 'add'):
-                dd = float(base) + float(dd)
-            elif (adj == 'sub'):
-                dd = float(base) - float(dd)
-
-        return dd
-
-    def dmsToDd(self,dms):
-        "It's not fast, but it's a safe way of dealing with DMS"
-        #dms=dms.replace(" ", "")
-        for c in dms:
-            if ((not c.isdigit()) and (c != '.') and (c != '-')):
-                dms=dms.replace(c,';')
-        while (dms.find(";;")>=0):
-            dms=dms.replace(";;",';')
-        if dms[0]==';':
-            dms=dms[1:]
-        dms=dms.split(";")
-        dd=0
-        #dd=str(float(dms[0])+float(dms[1])/60+float(dms[2])/3600)
-        for i, f in enumerate(dms):
-            if f!="":
-                dd+=float(f)/pow(60, i)
-        return dd
-
-    def clearList(self):
-        self.pluginGui.table_segmentList.clearContents()
-        self.pluginGui.table_segmentList.setSortingEnabled(False)
-        self.pluginGui.table_segmentList.setRowCount(0)
-        self.pluginGui.table_segmentList.setCurrentCell(0, 0) # substitute for missing setCurrentRow()
-        #retranslateUi
-
-    def newVertex(self):
-        #adds a vertex from the gui
-        self.addrow(self.pluginGui.lineEdit_nextAzimuth.text(),
-                        self.pluginGui.lineEdit_nextDistance.text(),
-                        self.pluginGui.lineEdit_nextVertical.text(),
-                        self.pluginGui.spin_radius.value())
-
-    def addRow(self):
-        # this and following must be split to handle both GUI & FILE inputs
-        az = self.pluginGui.lineEdit_nextAzimuth.text()
-        dist = self.pluginGui.lineEdit_nextDistance.text()
-        zen = self.pluginGui.lineEdit_nextVertical.text()
-        radius = self.pluginGui.spin_radius.value()
-        self.addrow(az, dist, zen, radius)
-
-    def addrow(self,  az=0,  dist=0,  zen = 90, radius=None):
-        #add the vertext to the end of the table
-        if radius == 0:
-            radius = None
-            direction = None
-        else:
-            if self.pluginGui.radio_anticlockwise.isChecked():
-                direction = "anticlockwise"
-            else:
-                direction = "clockwise"
-
-        i=self.pluginGui.table_segmentList.rowCount()
-        self.pluginGui.table_segmentList.insertRow(i)
-        self.pluginGui.table_segmentList.setItem(i, 0, QTableWidgetItem(str(az).upper()))
-        self.pluginGui.table_segmentList.setItem(i, 1, QTableWidgetItem(str(dist)))
-        self.pluginGui.table_segmentList.setItem(i, 2, QTableWidgetItem(str(zen)))
-        self.pluginGui.table_segmentList.setItem(i, 3, QTableWidgetItem(str(radius)))
-        self.pluginGui.table_segmentList.setItem(i, 4, QTableWidgetItem(str(direction)))
-
-    def insertRow(self):
-        az = self.pluginGui.lineEdit_nextAzimuth.text()
-        dist = self.pluginGui.lineEdit_nextDistance.text()
-        zen = self.pluginGui.lineEdit_nextVertical.text()
-        radius = self.pluginGui.spin_radius.value()
-
-        if radius == 0:
-            radius = None
-            direction = None
-        else:
-            if self.pluginGui.radio_anticlockwise.isChecked():
-                direction = "anticlockwise"
-            else:
-                direction = "clockwise"
-
-        #insert the vertext into the table at the current position
-        i=self.pluginGui.table_segmentList.currentRow()
-        self.pluginGui.table_segmentList.insertRow(i)
-        self.pluginGui.table_segmentList.setItem(i, 0, QTableWidgetItem(str(az).upper()))
-        self.pluginGui.table_segmentList.setItem(i, 1, QTableWidgetItem(str(dist)))
-        self.pluginGui.table_segmentList.setItem(i, 2, QTableWidgetItem(str(zen)))
-        self.pluginGui.table_segmentList.setItem(i, 3, QTableWidgetItem(str(radius)))
-        self.pluginGui.table_segmentList.setItem(i, 4, QTableWidgetItem(str(direction)))
-
-    def delRow(self):
-        self.pluginGui.table_segmentList.removeRow(self.pluginGui.table_segmentList.currentRow())
-
-    def moveup(self):
-        pass
-
-    def movedown(self):
-        pass
-
-    def startgetpoint(self):
-        #point capture tool
-        self.tool.finished.connect(self.getpoint)
-        self.saveTool = self.canvas.mapTool()
-        self.canvas.setMapTool(self.tool)
-
-    def getpoint(self, pt):
-        self.pluginGui.lineEdit_vertexX0.setText(str(pt.x()))
-        self.pluginGui.lineEdit_vertexY0.setText(str(pt.y()))
-        self.canvas.setMapTool(self.saveTool)
-        self.tool.finished.disconnect(self.getpoint)
-
-    def reproject(self, vlist,  vectorlayer):
-        renderer=self.canvas.mapRenderer()
-        for i, point in enumerate(vlist):
-            vlist[i]= renderer.layerToMapCoordinates(vectorlayer, QgsPoint(point[0], point[1]))
-        return vlist
-
-    def setAngle(self, s):
-        #self.say('processing angleType='+s)
-        if (s=='azimuth'):
-            self.pluginGui.radioButton_azimuthAngle.setChecked(True)
-        elif (s=='bearing'):
-            self.pluginGui.radioButton_bearingAngle.setChecked(True)
-        elif (s=='polar'):
-            self.pluginGui.radioButton_polorCoordAngle.setChecked(True)
-        else:
-            self.say('invalid angle type: '+s)
-
-    def setHeading(self,  s):
-        #self.say('processing headingType='+s)
-        if (s=='coordinate_system'):
-            self.pluginGui.radioButton_defaultNorth.setChecked(True)
-        elif (s=='magnetic'):
-            self.pluginGui.radioButton_magNorth.setChecked(True)
-        else:
-            self.say('invalid heading type: '+s)
-
-    def setDeclination(self,  s):
-        #self.say('processing declination='+s)
-        self.pluginGui.lineEdit_magNorth.setText(s)
-        self.magDev = float(s)
-
-    def setDistanceUnits(self,  s):
-         #self.say('processing distance units='+s)
-        if (s=='feet'):
-            self.pluginGui.radioButton_englishUnits.setChecked(True)
-        else:
-            self.pluginGui.radioButton_defaultUnits.setChecked(True)
-
-    def setStartAt(self,  s):
-        #self.say('processing startAt='+s)
-        coords=s.split(';')
-        self.pluginGui.lineEdit_vertexX0.setText(coords[0])
-        self.pluginGui.lineEdit_vertexY0.setText(coords[1])
-        self.pluginGui.lineEdit_vertexZ0.setText(coords[2])
-
-    def setSurvey(self, s):
-        #self.say('processing surveyType='+s)
-        if (s=='polygonal'):
-            self.pluginGui.radioButton_boundarySurvey.setChecked(True)
-        elif (s=='radial'):
-            self.pluginGui.radioButton_irrSurvey.setChecked(True)
-        else:
-            self.say('invalid survey type: '+s)
-
-    def say(self, txt):
-        # present a message box on screen
-        warn=QgsMessageViewer()
-        warn.setMessageAsPlainText(txt)
-        warn.showMessage()
-
-    def tell(self, txt):
-        # write to bottom of Note area at top of screen
-        self.notes.appendPlainText(txt)
-
-    # ---------------------------------------------------------------------------------------------------------------------------------
-    #               File handling
-    # This section deals with saving the user data to disk, and loading it
-    #
-    # format:
-    #   line 1: angle=Azimuth|Bearing|Polar
-    #   line 2: heading=Coordinate System|Magnetic
-    #   line 3: declination=[- ]x.xxd[ xx.x'] [E|W]
-    #   line 4: distunits=Default|Feet
-    #   line 5: startAt=xxxxx.xxxxx, xxxxxx.xxxxx
-    #   line 6: survey=Polygonal|Radial
-    #   line 7: [data]
-    #   line 8 through end: Azimuth; dist; zen
-    #
-    #       note: lines 1 through 5 are optional if hand entered, but will always be generated when 'saved'
-    # ---------------------------------------------------------------------------------------------------------------------------------
-    def loadList(self):
-        self.fileName=QFileDialog.getOpenFileName(None,"Load data separated by ';'",self.fPath,"")
-        if not os.path.exists(self.fileName):
-            return 0
-        # update selected file's folder
-        fInfo = QFileInfo(self.fileName)
-        self.fPath = fInfo.absolutePath ()
-        self.saveConf()
-
-        # get saved data
-        try:
-            f=open(self.fileName)
-            lines=f.readlines()
-            f.close()
-            self.clearList()
-            for line in lines:
-                #remove trailing 'new lines', etc and break into parts
-                parts = ((line.strip()).lower()).split("=")
-                if (len(parts)>1):
-                    #self.say("line="+line+'\nparts[0]='+parts[0]+'\nparts[1]='+parts[1])
-                    if (parts[0].lower()=='angle'):
-                        self.setAngle(parts[1].lower())
-                    elif (parts[0].lower()=='heading'):
-                        self.setHeading(parts[1].lower())
-                    elif (parts[0].lower()=='declination'):
-                        self.setDeclination(parts[1].lower())
-                    elif (parts[0].lower()=='dist_units'):
-                        self.setDistanceUnits(parts[1].lower())
-                    elif (parts[0].lower()=='startat'):
-                        self.setStartAt(parts[1].lower())
-                    elif (parts[0].lower()=='survey'):
-                        self.setSurvey(parts[1].lower())
-                else:
-                    coords=(line.strip()).split(";")
-                    if (coords[0].lower()=='[data]'):
-                        pass
-                    else:
-                        self.addrow(coords[0], coords[1], coords[2])
-        except:
-            self.say("Invalid input")
-
-    def saveList(self):
-        #file=QFileDialog.getSaveFileName(None,"Save segment list to file.",self.fPath,"")
-        #self.tell("loaded file name: " + self.fileName)
-        file=QFileDialog.getSaveFileName(None,"Save segment list to file.",self.fileName,"")
-        if (file == ''): return
-        #self.tell('target file: '+file)
-        f=open(file, 'w')
-        # update selected file's folder
-        fInfo = QFileInfo(file)
-        self.fPath = fInfo.absolutePath ()
-        self.saveConf()
-
-        if (self.pluginGui.radioButton_azimuthAngle.isChecked()):
-            s='Azimuth'
-        elif (self.pluginGui.radioButton_bearingAngle.isChecked()):
-            s='Bearing'
-        f.write('angle='+s+'\n')
-
-        if (self.pluginGui.radioButton_defaultNorth.isChecked()):
-            s='Coordinate_System'
-        elif (self.pluginGui.radioButton_magNorth.isChecked()):
-            s='Magnetic'
-        f.write('heading='+s+'\n')
-
-        if (self.magDev!=0.0):
-            f.write('declination='+str(self.magDev)+'\n')
-
-        if (self.pluginGui.radioButton_defaultUnits.isChecked()):
-            s='Default'
-        elif (self.pluginGui.radioButton_englishUnits.isChecked()):
-            s='Feet'
-        f.write('dist_units='+s+'\n')
-
-        f.write('startAt='+str(self.pluginGui.lineEdit_vertexX0.text())+';'+
-                                    str(self.pluginGui.lineEdit_vertexY0.text())+';'+
-                                    str(self.pluginGui.lineEdit_vertexZ0.text())+'\n')
-
-        if (self.pluginGui.radioButton_boundarySurvey.isChecked()):
-            s='Polygonal'
-        elif (self.pluginGui.radioButton_radialSurvey.isChecked()):
-            s='Radial'
-        f.write('survey='+s+'\n')
-
-        f.write('[data]\n')
-        for i in range(self.pluginGui.table_segmentList.rowCount()):
-            line = str(self.pluginGui.table_segmentList.item(i, 0).text()) +';' \
-                    +str(self.pluginGui.table_segmentList.item(i, 1).text()) +';' \
-                    +str(self.pluginGui.table_segmentList.item(i, 2).text())
-            f.write(line+'\n')
-
-        f.close()
-
-    #------------------------
-    def loadConf(self):
-        settings=QSettings()
-        size = settings.value('/Plugin-qgsAzimuth/size', QSize(800, 600), type=QSize)
-        self.pluginGui.resize(size)
-        position = settings.value('/Plugin-qgsAzimuth/position', QPoint(0, 0), type=QPoint)
-        self.pluginGui.move(position)
-        #settings.restoreGeometry(settings.value("Geometry"), QByteArray(), type=QByteArray)
-        self.fPath = settings.value('/Plugin-qgsAzimuth/inp_exp_dir', "", type=unicode)
-        self.fileName = self.fPath
-
-    def saveConf(self):
-        settings=QSettings()
-        #settings.setValue("Geometry", self.saveGeometry())
-        settings.setValue('/Plugin-qgsAzimuth/size',  self.pluginGui.size())
-        settings.setValue('/Plugin-qgsAzimuth/position',  self.pluginGui.pos())
-        settings.setValue('/Plugin-qgsAzimuth/inp_exp_dir', self.fPath)
-
-    def sortedDict(self, adict):
-        keys = adict.keys()
-        keys.sort()
-        return map(adict.get, keys)
-
+#---------------------------------------------------------------------
+#
+# licensed under the terms of GNU GPL 2
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+#---------------------------------------------------------------------
+
+import os,sys
+import time
+import logging
+
+import numpy
+
+from PyQt4.QtCore import *
+from PyQt4.QtGui import *
+from qgis.core import *
+
+from ui_control import ui_Control
+import resources
+from math import *
+from getcoordtool import *
+
+import adjust
+import angles
+import traverse
+import segmentfile
+import segmentbinary
+import projection
+import wkb
+import featurewriter
+import batch
+import backgroundtask
+import diskcache
+import export
+import preview
+import vertexcache
+from segmentmodel import SegmentModel
+
+from pluginlog import logger
+import pluginlog
+
+# segments computed between two progress reports of a drawing task
+PROGRESS_STEP = 1000
+# largest traverse a drawing task computes through a vertex cache the preview can take over
+SEED_LIMIT = 100000
+# wkb.geometries kind of each layer geometry type
+GEOMETRIES = {QGis.Point: 'point', QGis.Line: 'line', QGis.Polygon: 'polygon'}
+
+class qgsazimuth (object):
+    """
+    Base class for the qgsAzimuth plugin
+    - Provides a means to draw a feature by specifying the angle and distance beetween points.
+    - Supports angles in either the conventional 0.0 - 360.0 clockwise from North
+        or the surveyor's 'Easting' system with bearings plus or minus 90 deg. from North or South
+    - Supports magnetic declination as degrees plus or minus for East or West respectively
+    - supports inputs in feet or the current CRS units
+    """
+
+    # just a test to see if mods are taking
+
+    def __init__(self, iface):
+        self.iface = iface
+        self.legend = iface.legendInterface()
+        self.canvas = iface.mapCanvas()
+        self.fPath = ""  # set default working directory, updated from config file & by Import/Export
+        self.tasks = set()
+
+    def initGui(self):
+        # create action that will start plugin configuration
+        self.action = QAction(QIcon(":qgsazimuth.png"), "Azimuth and distance", self.iface.mainWindow())
+        self.action.setWhatsThis("Azimuth and distance")
+        self.action.triggered.connect(self.run)
+
+        # add toolbar button and menu item
+        self.iface.addPluginToMenu("&Topography", self.action)
+        self.iface.addToolBarIcon(self.action)
+        self.pluginGui = ui_Control(self.iface.mainWindow())
+
+        self.tool = GetCoordTool(self.canvas)
+        pluginlog.install_message_log()
+
+    def unload(self):
+        # remove the plugin menu item and icon
+        self.iface.removePluginMenu("&Topography",self.action)
+        self.iface.removeToolBarIcon(self.action)
+        self.tool.cleanup()
+        self.saveConf()
+
+    def run(self):
+        # create and show a configuration dialog or something similar
+        flags = Qt.WindowTitleHint | Qt.WindowSystemMenuHint | Qt.WindowMaximizeButtonHint  # QgisGui.ModalDialogFlags
+        self.pluginGui = ui_Control(self.iface.mainWindow())
+        self.model = SegmentModel(self.pluginGui)
+        self.pluginGui.table_segmentList.setModel(self.model)
+        self.preview = preview.TraversePreview(self.canvas, self.model)
+
+        #misc init
+        self.loadConf() # get config data
+        self.clearList()
+        self.setDeclination('0.0')
+        self.setStartAt("0;0;90")    # remove previous StartAt point
+
+        #INSERT EVERY SIGNAL CONECTION HERE!
+        self.pluginGui.finished.connect(self.cleanup)
+        self.pluginGui.pushButton_vertexAdd.clicked.connect(self.addRow)
+        self.pluginGui.pushButton_vertexInsert.clicked.connect(self.insertRow)
+        self.pluginGui.pushButton_segListRowDel.clicked.connect(self.delRow)
+        self.pluginGui.pushButton_segListRowUp.clicked.connect(self.moveup)
+        self.pluginGui.pushButton_segListRowDn.clicked.connect(self.movedown)
+        self.pluginGui.pushButton_segListLoad.clicked.connect(self.loadList)
+        self.pluginGui.pushButton_segListBatch.clicked.connect(self.batchImport)
+        self.pluginGui.pushButton_segListExport.clicked.connect(self.exportvertices)
+        self.pluginGui.pushButton_segListClear.clicked.connect(self.clearList)
+        self.pluginGui.pushButton_objectDraw.clicked.connect(self.addgeometry)
+        self.pluginGui.pushButton_startCapture.clicked.connect(self.startgetpoint)
+        self.pluginGui.pushButton_segListSave.clicked.connect(self.saveList)
+        self.pluginGui.checkBox_preview.toggled.connect(self.updatepreview)
+        # anything that moves the traverse other than the segment rows
+        for edit in (self.pluginGui.lineEdit_vertexX0, self.pluginGui.lineEdit_vertexY0,
+                     self.pluginGui.lineEdit_vertexZ0, self.pluginGui.lineEdit_magNorth):
+            edit.textChanged.connect(self.updatepreview)
+        for button in (self.pluginGui.radioButton_azimuthAngle, self.pluginGui.radioButton_bearingAngle,
+                       self.pluginGui.radioButton_polarCoordAngle, self.pluginGui.radioButton_magNorth,
+                       self.pluginGui.radioButton_englishUnits, self.pluginGui.radioButton_radialSurvey,
+                       self.pluginGui.radioButton_useActiveLayer, self.pluginGui.checkBox_arcTolerance):
+            button.toggled.connect(self.updatepreview)
+        self.pluginGui.spin_arclines.valueChanged.connect(self.updatepreview)
+        self.pluginGui.spin_arcTolerance.valueChanged.connect(self.updatepreview)
+
+        self.pluginGui.lineEdit_crs.setText(self.iface.mapCanvas().mapRenderer().destinationCrs().description())
+
+        if self.iface.activeLayer():
+            self.updatelayertext(self.iface.activeLayer())
+            self.pluginGui.radioButton_useActiveLayer.setChecked(True)
+        else:
+            self.pluginGui.radioButton_useActiveLayer.setEnabled(False)
+            self.pluginGui.radioButton_useMemoryLayer.setChecked(True)
+        self.legend.currentLayerChanged.connect(self.updatelayertext)
+        self.legend.currentLayerChanged.connect(self.updatepreview)
+        self.pluginGui.show()
+
+        # for debugging convenience
+        self.notes = self.pluginGui.plainTextEdit_note
+        self.updatepreview()
+
+    def cleanup(self):
+        self.tool.cleanup()
+        # run() makes a new preview for the next dialog, so this one goes for good
+        self.legend.currentLayerChanged.disconnect(self.updatepreview)
+        self.preview.remove()
+        for task in list(self.tasks):
+            task.cancel()
+
+    def updatelayertext(self, layer):
+        if not layer:
+            self.pluginGui.radioButton_useActiveLayer.setEnabled(False)
+        else:
+            self.pluginGui.radioButton_useActiveLayer.setEnabled(True)
+            self.pluginGui.radioButton_useActiveLayer.setText("Active Layer ({0})".format(layer.name()))
+
+    @property
+    def useactivelayer(self):
+        return self.pluginGui.radioButton_useActiveLayer.isChecked()
+
+    def currenttraverse(self):
+        """
+        Return the traverse.Traverse entered in the dialog, None after telling
+        the user what is missing.
+        """
+        # if magnetic heading chosen, assure we have a declination angle
+        if (self.pluginGui.radioButton_magNorth.isChecked())  and (str(self.pluginGui.lineEdit_magNorth.text()) == ''):   #magnetic headings
+            self.say("No magnetic declination value entered.")
+            return None
+
+        #Get starting point coordinates
+        X0 = float(str(self.pluginGui.lineEdit_vertexX0.text()))
+        Y0 = float(str(self.pluginGui.lineEdit_vertexY0.text()))
+        Z0 = float(str(self.pluginGui.lineEdit_vertexZ0.text()))
+
+        #check if the starting point is specified
+        if (X0 == 0 and Y0 == 0 and Z0 == 90):
+            self.say("You must supply a starting point.")
+            return None
+
+        # Check if there are any segments
+        if (self.model.rowCount() < 1):
+            self.say("You must enter at least one segment.")
+            return None
+
+        settings = self.surveysettings()
+        self.magDev = settings.declination
+        return traverse.Traverse((X0, Y0, Z0), self.model.segments(), settings)
+
+    def addgeometry(self):
+        #initialization
+        started = time.time()
+        run = self.currenttraverse()
+        if run is None:
+            return 0
+        settings = run.settings
+
+        # a radial survey is a single multi line of its shots, or a line per
+        # shot when drawn as segments or the layer can not hold multi lines
+        as_segments = self.pluginGui.checkBox_asSegments.isChecked()
+        radial = settings.survey == 'radial'
+        vectorlayer = self.targetlayer("MultiLineString" if radial and not as_segments else "LineString")
+        if radial and not QGis.isMultiType(vectorlayer.wkbType()):
+            as_segments = True
+
+        geometry = GEOMETRIES.get(vectorlayer.geometryType())
+        if geometry is None:
+            self.say("Can not draw in {0}, it has no point, line or polygon geometry.".format(vectorlayer.name()))
+            return 0
+
+        # computing and building the geometries runs in the background, the
+        # features are made and committed a chunk at a time back in this thread
+        crs = self.layercrs(vectorlayer)
+        points = self.preview.coordinates(tuple(run.start), settings)
+        changes = self.preview.changes
+        task = backgroundtask.Task("Drawing traverse", self.computedrawing, run, crs, points,
+                                   self.pluginGui.checkBox_close.isChecked() and settings.survey == 'polygonal',
+                                   tuple(str(c.toWkt()) for c in crs) if crs else None, geometry, as_segments,
+                                   points is None and len(run) <= SEED_LIMIT)
+        task.taskCompleted.connect(lambda result: self.finishdrawing(vectorlayer, run, result, started, changes))
+        self.starttask(task)
+
+    def exportvertices(self):
+        """
+        Stream the computed vertices, or the segments when drawing as segments,
+        to a CSV or GeoJSON file without going through a layer.
+        """
+        run = self.currenttraverse()
+        if run is None:
+            return 0
+        path = QFileDialog.getSaveFileName(None, "Export vertices", self.fPath,
+                                           "CSV (*.csv);;GeoJSON (*.geojson);;Newline delimited GeoJSON (*.ndjson)")
+        if not path:
+            return 0
+        path = unicode(path)
+        try:
+            format = export.format_for(path)
+        except ValueError as e:
+            self.say(str(e))
+            return 0
+        self.fPath = QFileInfo(path).absolutePath()
+        self.saveConf()
+
+        kind = 'segments' if self.pluginGui.checkBox_asSegments.isChecked() else 'vertices'
+        name = os.path.splitext(os.path.basename(path))[0]
+        task = backgroundtask.Task("Exporting " + kind, self.exportfile, run, path, format, kind, name)
+        task.taskCompleted.connect(lambda count: self.tell("{0} {1} written to {2}".format(count, kind, path)))
+        self.starttask(task)
+
+    def exportfile(self, task, run, path, format, kind, name):
+        """
+        Write a traverse to path block by block, in a background task.
+        :return: The number of records written, None when canceled
+        """
+        total = max(len(run), 1)
+
+        def blocks():
+            for done, block in enumerate(run.blocks(PROGRESS_STEP), 1):
+                if task.isCanceled():
+                    return
+                task.setProgress(100.0 * min(done * PROGRESS_STEP, total) / total)
+                yield block
+
+        count = export.export_file(path, [(name, run.settings.survey, blocks())], format, kind)
+        if task.isCanceled():
+            os.remove(path)
+            return None
+        return count
+
+    def computedrawing(self, task, run, crs, points=None, close=False, crswkt=None, geometry='line',
+                       as_segments=False, seed=False):
+        """
+        Compute a traverse, reproject it and build the WKB of its geometries.
+        Runs in a background task, so it must not touch the dialog.  The
+        features are only made while finishdrawing commits them, a chunk at
+        a time.
+        :param run: The traverse.Traverse to draw
+        :param crs: The (layer, map) CRS pair to reproject with, or None
+        :param points: The coordinates of run when they are already known
+        :param close: Close the traverse on its start point with the compass rule
+        :param crswkt: The WKT of crs, part of the key of the vertex disk cache
+        :param geometry: The wkb.geometries kind of the layer
+        :param as_segments: Draw lines as one feature per leg
+        :param seed: Compute the vertices through a vertexcache.VertexCache for the preview
+        :return: The coordinate array, the adjust.Closure of the traverse if
+                 closed, the list of WKB geometries and the VertexCache or None,
+                 None when canceled
+        """
+        cache = None
+        key = diskcache.key(run, crswkt, close)
+        cached = self.diskcache.get(key)
+        if cached is None:
+            if seed:
+                cache = vertexcache.VertexCache(run.start, run.segments, run.settings)
+                points = cache.coordinates()
+            result = self.computevertices(task, run, crs, points, close)
+            if result is None:
+                return None
+            vlist, closure = result
+            arrays = {'coords': vlist}
+            if closure is not None:
+                arrays['closure'] = numpy.array(closure)
+            self.diskcache.put(key, **arrays)
+        else:
+            logger.info("vertices of %d segments read from the cache", len(run))
+            vlist = cached['coords']
+            closure = adjust.Closure(*cached['closure'].tolist()) if 'closure' in cached else None
+        if task.isCanceled():
+            return None
+        return vlist, closure, wkb.geometries(vlist, geometry, run.settings.survey, as_segments), cache
+
+    def computevertices(self, task, run, crs, points=None, close=False):
+        """
+        Compute the reprojected (and closed) coordinates of a traverse for computedrawing.
+        :return: The coordinate array and the adjust.Closure if closed, None when canceled
+        """
+        total = max(len(run.segments), 1)
+        parts = []
+        blocks = run.blocks(PROGRESS_STEP) if points is None else [points]
+        for done, part in enumerate(blocks, 1):
+            if task.isCanceled():
+                return None
+            pluginlog.trace_vertices(part)
+            if crs and not close:
+                part = projection.reproject(part, *crs)
+            parts.append(part)
+            task.setProgress(100.0 * min(done * PROGRESS_STEP, total) / total)
+        vlist = numpy.vstack(parts)
+
+        closure = None
+        if close:
+            # adjusted in layer coordinates, before reprojecting
+            closure = adjust.closure(vlist)
+            vlist = adjust.bowditch(vlist)
+            if crs:
+                vlist = projection.reproject(vlist, *crs)
+        return vlist, closure
+
+    def finishdrawing(self, vectorlayer, run, result, started, changes):
+        """
+        Commit the features of a finished drawing task.
+        :param changes: TraversePreview.changes when the task started
+        """
+        vlist, closure, geometries, cache = result
+        if cache is not None:
+            self.preview.seed(cache, changes)
+        if closure is not None:
+            self.tell("Misclosure {0:.4f} (dx {1:.4f}, dy {2:.4f}) over {3:.3f}, precision 1:{4:.0f}, "
+                      "distributed with the compass rule".format(closure.linear, closure.dx, closure.dy,
+                                                                 closure.length, closure.precision))
+        features = self.createfeatures(geometries)
+        result = self.writefeatures(vectorlayer, features)
+        logger.info("%s survey: %d segments, %d vertices, %d features in %.3fs",
+                    run.settings.survey, len(run.segments), len(vlist), result.added, time.time() - started)
+
+    def starttask(self, task):
+        """
+        Start a backgroundtask.Task, showing its progress and a cancel button in the message bar.
+        """
+        bar = self.iface.messageBar()
+        message = bar.createMessage(task.description)
+        progress = QProgressBar()
+        progress.setMaximum(100)
+        cancel = QPushButton("Cancel")
+        cancel.clicked.connect(task.cancel)
+        message.layout().addWidget(progress)
+        message.layout().addWidget(cancel)
+        bar.pushWidget(message, QgsMessageBar.INFO)
+
+        def finished(result):
+            bar.popWidget(message)
+            self.tasks.discard(task)
+            if not self.tasks:
+                self.enabletaskbuttons(True)
+
+        def terminated(error):
+            if error is None:
+                logger.info("%s canceled", task.description)
+            else:
+                self.say("{0} failed: {1}".format(task.description, error))
+
+        task.progressChanged.connect(lambda value: progress.setValue(int(value)))
+        task.taskCompleted.connect(finished)
+        task.taskTerminated.connect(finished)
+        task.taskTerminated.connect(terminated)
+        self.enabletaskbuttons(False)
+        self.tasks.add(task)
+        task.start()
+
+    def enabletaskbuttons(self, enabled):
+        """
+        Enable or disable the buttons that start a drawing, export or batch import;
+        they stay disabled while a task runs.
+        """
+        for button in (self.pluginGui.pushButton_objectDraw, self.pluginGui.pushButton_segListExport,
+                       self.pluginGui.pushButton_segListBatch):
+            button.setEnabled(enabled)
+
+    def targetlayer(self, uri="LineString"):
+        """
+        Return the layer to draw in, the active layer or a new memory layer.
+        """
+        if self.useactivelayer:
+            return self.iface.activeLayer()
+        s = QSettings()
+        oldValidation = s.value("/Projections/defaultBehaviour", "useProject")
+        s.setValue("/Projections/defaultBehaviour", "useProject")
+        vectorlayer=QgsVectorLayer(uri, "tmp_plot", "memory")
+        s.setValue("/Projections/defaultBehaviour", oldValidation)
+        return vectorlayer
+
+    def createfeatures(self, geometries):
+        """
+        Return a generator of the features for the WKB geometries of a traverse,
+        as wkb.geometries builds them.
+        """
+        for data in geometries:
+            geom = QgsGeometry()
+            geom.fromWkb(data)
+            if geom.type() == QGis.Polygon and logger.isEnabledFor(logging.DEBUG):
+                logger.debug("polygon is valid: %s", geom.isGeosValid())
+            feature = QgsFeature()
+            feature.setGeometry(geom)
+            yield feature
+
+    def writefeatures(self, vectorlayer, features):
+        """
+        Commit features to the layer, adding a new memory layer to the map.
+        :return: The featurewriter.CommitResult
+        """
+        result = featurewriter.commit(vectorlayer, features, self.commitChunk)
+        if not result.ok:
+            self.say("{0} of the feature chunks could not be written to {1}.{2}".format(
+                len(result.failed), vectorlayer.name(),
+                " The features already written were removed." if result.rolledback else ""))
+        if not self.useactivelayer:
+            QgsMapLayerRegistry.instance().addMapLayer(vectorlayer)
+
+        self.iface.mapCanvas().refresh()
+        return result
+
+    def batchImport(self):
+        """
+        Draw every traverse of one or more batch files in a single commit,
+        tagging the features with the id of their traverse.
+        """
+        files = QFileDialog.getOpenFileNames(None, "Load batch of segment lists", self.fPath, "")
+        if not files:
+            return 0
+        self.fPath = QFileInfo(files[0]).absolutePath()
+        self.saveConf()
+
+        started = time.time()
+        settings = self.surveysettings()
+        try:
+            jobs = list(batch.read_jobs(files))
+            results = batch.compute_all(jobs, settings.arc_count, settings.arc_tolerance, self.batchWorkers)
+        except (IOError, ValueError) as e:
+            self.say("Invalid input: {0}".format(e))
+            return 0
+
+        vectorlayer = self.targetlayer("LineString?field={0}:string".format(batch.TRAVERSE_ID))
+        field = self.traverseidfield(vectorlayer)
+        if field < 0:
+            self.say("Can not add a {0} field to {1}.".format(batch.TRAVERSE_ID, vectorlayer.name()))
+            return 0
+        fieldcount = vectorlayer.pendingFields().count()
+        geometry = GEOMETRIES.get(vectorlayer.geometryType(), 'line')
+        as_segments = self.pluginGui.checkBox_asSegments.isChecked()
+        # radial surveys are drawn a line per shot unless the layer takes multi lines
+        multi = QGis.isMultiType(vectorlayer.wkbType())
+
+        def features():
+            for tid, surveytype, points in results:
+                attributes = [None] * fieldcount
+                attributes[field] = tid
+                vlist = self.reproject(points, vectorlayer)
+                segments = as_segments or (surveytype == 'radial' and not multi)
+                for feature in self.createfeatures(wkb.geometries(vlist, geometry, surveytype, segments)):
+                    feature.setAttributes(attributes)
+                    yield feature
+
+        result = self.writefeatures(vectorlayer, features())
+        logger.info("batch: %d traverses, %d features in %.3fs",
+                    len(results), result.added, time.time() - started)
+
+    def traverseidfield(self, vectorlayer):
+        """
+        Return the index of the traverse id field, adding the field when missing.
+        :return: The field index, -1 if the layer has none and it can not be added
+        """
+        field = vectorlayer.fieldNameIndex(batch.TRAVERSE_ID)
+        if field >= 0:
+            return field
+        if vectorlayer.isEditable():
+            vectorlayer.addAttribute(QgsField(batch.TRAVERSE_ID, QVariant.String))
+        elif vectorlayer.dataProvider().capabilities() & QgsVectorDataProvider.AddAttributes:
+            vectorlayer.dataProvider().addAttributes([QgsField(batch.TRAVERSE_ID, QVariant.String)])
+            vectorlayer.updateFields()
+        return vectorlayer.fieldNameIndex(batch.TRAVERSE_ID)
+
+    def updatepreview(self, *args):
+        """
+        Follow a new start point or option in the vertex cache and show or hide the preview.
+        Row edits update the cache by themselves.
+        """
+        try:
+            start = tuple(float(str(edit.text())) for edit in (self.pluginGui.lineEdit_vertexX0,
+                                                               self.pluginGui.lineEdit_vertexY0,
+                                                               self.pluginGui.lineEdit_vertexZ0))
+            settings = self.surveysettings()
+        except ValueError:
+            self.preview.invalidate()
+            return
+        layer = self.iface.activeLayer()
+        crs = self.layercrs(layer) if self.useactivelayer and layer else None
+        self.preview.setup(start, settings, crs)
+        self.preview.setVisible(self.pluginGui.checkBox_preview.isChecked())
+
+    def surveysettings(self):
+        """
+        Return the dialog options as a traverse.SurveySettings
+        """
+        if (self.pluginGui.radioButton_azimuthAngle.isChecked()):
+            angle = 'azimuth'
+        elif (self.pluginGui.radioButton_bearingAngle.isChecked()):
+            angle = 'bearing'
+        else:
+            angle = 'polar'
+
+        #correct for magnetic compass headings if necessary
+        if (self.pluginGui.radioButton_magNorth.isChecked()):
+            heading = 'magnetic'
+            declination = str(self.pluginGui.lineEdit_magNorth.text())
+        else:
+            heading = 'coordinate_system'
+            declination = 0.0
+
+        if (self.pluginGui.radioButton_englishUnits.isChecked()):
+            dist_units = 'feet'
+        else:
+            dist_units = 'default'
+
+        if (self.pluginGui.radioButton_radialSurvey.isChecked()):
+            survey = 'radial'
+        else:
+            survey = 'polygonal'
+
+        if (self.pluginGui.checkBox_arcTolerance.isChecked()):
+            arc_tolerance = self.pluginGui.spin_arcTolerance.value()
+        else:
+            arc_tolerance = None
+
+        return traverse.SurveySettings(angle, heading, declination, dist_units, survey,
+                                       self.pluginGui.spin_arclines.value(), arc_tolerance)
+
+    def bearingToDd (self,  dms):
+        #allow survey bearings in form:  - N 25d 34' 40" E
+        #where minus ('-') sign allows handling bearings given in reverse direction
+        return angles.bearing_to_dd(dms)
+
+    def dmsToDd(self,dms):
+        return angles.dms_to_dd(dms)
+
+    def clearList(self):
+        self.model.clear()
+
+    def newVertex(self):
+        #adds a vertex from the gui
+        self.addrow(self.pluginGui.lineEdit_nextAzimuth.text(),
+                        self.pluginGui.lineEdit_nextDistance.text(),
+                        self.pluginGui.lineEdit_nextVertical.text(),
+                        self.pluginGui.spin_radius.value())
+
+    def addRow(self):
+        # this and following must be split to handle both GUI & FILE inputs
+        az = self.pluginGui.lineEdit_nextAzimuth.text()
+        dist = self.pluginGui.lineEdit_nextDistance.text()
+        zen = self.pluginGui.lineEdit_nextVertical.text()
+        radius = self.pluginGui.spin_radius.value()
+        self.addrow(az, dist, zen, radius)
+
+    def addrow(self,  az=0,  dist=0,  zen = 90, radius=None):
+        #add the vertext to the end of the table
+        self.insertrow(self.model.rowCount(), az, dist, zen, radius)
+
+    def insertRow(self):
+        az = self.pluginGui.lineEdit_nextAzimuth.text()
+        dist = self.pluginGui.lineEdit_nextDistance.text()
+        zen = self.pluginGui.lineEdit_nextVertical.text()
+        radius = self.pluginGui.spin_radius.value()
+
+        #insert the vertext into the table at the current position
+        i = self.pluginGui.table_segmentList.currentIndex().row()
+        if i < 0:
+            i = self.model.rowCount()
+        self.insertrow(i, az, dist, zen, radius)
+
+    def insertrow(self, i, az, dist, zen, radius):
+        if self.pluginGui.radio_anticlockwise.isChecked():
+            direction = "anticlockwise"
+        else:
+            direction = "clockwise"
+
+        try:
+            segment = traverse.segment(str(az), float(dist), str(zen) or "90", radius, direction)
+        except ValueError:
+            self.say("Invalid distance: " + str(dist))
+            return
+        self.model.insertSegments(i, [segment])
+
+    def delRow(self):
+        self.model.removeRows(self.pluginGui.table_segmentList.currentIndex().row(), 1)
+
+    def moveup(self):
+        row = self.pluginGui.table_segmentList.currentIndex().row()
+        if row > 0 and self.model.swapRows(row - 1):
+            self.pluginGui.table_segmentList.selectRow(row - 1)
+
+    def movedown(self):
+        row = self.pluginGui.table_segmentList.currentIndex().row()
+        if row >= 0 and self.model.swapRows(row):
+            self.pluginGui.table_segmentList.selectRow(row + 1)
+
+    def startgetpoint(self):
+        #point capture tool
+        self.tool.finished.connect(self.getpoint)
+        self.saveTool = self.canvas.mapTool()
+        self.canvas.setMapTool(self.tool)
+
+    def getpoint(self, pt):
+        self.pluginGui.lineEdit_vertexX0.setText(str(pt.x()))
+        self.pluginGui.lineEdit_vertexY0.setText(str(pt.y()))
+        self.canvas.setMapTool(self.saveTool)
+        self.tool.finished.disconnect(self.getpoint)
+
+    def reproject(self, coords,  vectorlayer):
+        # same as renderer.layerToMapCoordinates for every vertex, done on the whole array
+        crs = self.layercrs(vectorlayer)
+        if crs is None:
+            return coords
+        return projection.reproject(coords, *crs)
+
+    def layercrs(self, vectorlayer):
+        """
+        Return the (layer, map) CRS pair to reproject with, None without on the fly reprojection.
+        """
+        renderer=self.canvas.mapRenderer()
+        if not renderer.hasCrsTransformEnabled():
+            return None
+        return vectorlayer.crs(), renderer.destinationCrs()
+
+    def setAngle(self, s):
+        #self.say('processing angleType='+s)
+        if (s=='azimuth'):
+            self.pluginGui.radioButton_azimuthAngle.setChecked(True)
+        elif (s=='bearing'):
+            self.pluginGui.radioButton_bearingAngle.setChecked(True)
+        elif (s=='polar'):
+            self.pluginGui.radioButton_polarCoordAngle.setChecked(True)
+        else:
+            self.say('invalid angle type: '+s)
+
+    def setHeading(self,  s):
+        #self.say('processing headingType='+s)
+        if (s=='coordinate_system'):
+            self.pluginGui.radioButton_defaultNorth.setChecked(True)
+        elif (s=='magnetic'):
+            self.pluginGui.radioButton_magNorth.setChecked(True)
+        else:
+            self.say('invalid heading type: '+s)
+
+    def setDeclination(self,  s):
+        #self.say('processing declination='+s)
+        self.pluginGui.lineEdit_magNorth.setText(s)
+        self.magDev = float(angles.dms_to_dd(s))
+
+    def setDistanceUnits(self,  s):
+         #self.say('processing distance units='+s)
+        if (s=='feet'):
+            self.pluginGui.radioButton_englishUnits.setChecked(True)
+        else:
+            self.pluginGui.radioButton_defaultUnits.setChecked(True)
+
+    def setStartAt(self,  s):
+        #self.say('processing startAt='+s)
+        # raises ValueError for anything but x;y[;z]
+        segmentfile.parse_start(s)
+        coords = [part.strip() for part in s.split(';') if part.strip()] + ['0']
+        self.pluginGui.lineEdit_vertexX0.setText(coords[0])
+        self.pluginGui.lineEdit_vertexY0.setText(coords[1])
+        self.pluginGui.lineEdit_vertexZ0.setText(coords[2])
+
+    def setSurvey(self, s):
+        #self.say('processing surveyType='+s)
+        if (s=='polygonal'):
+            self.pluginGui.radioButton_boundarySurvey.setChecked(True)
+        elif (s=='radial'):
+            self.pluginGui.radioButton_radialSurvey.setChecked(True)
+        else:
+            self.say('invalid survey type: '+s)
+
+    def say(self, txt):
+        # present a message box on screen
+        warn=QgsMessageViewer()
+        warn.setMessageAsPlainText(txt)
+        warn.showMessage()
+
+    def tell(self, txt):
+        # write to bottom of Note area at top of screen
+        self.notes.appendPlainText(txt)
+
+    # ---------------------------------------------------------------------------------------------------------------------------------
+    #               File handling
+    # This section deals with saving the user data to disk, and loading it
+    #
+    # format:
+    #   line 1: angle=Azimuth|Bearing|Polar
+    #   line 2: heading=Coordinate System|Magnetic
+    #   line 3: declination=[- ]x.xxd[ xx.x'] [E|W]
+    #   line 4: distunits=Default|Feet
+    #   line 5: startAt=xxxxx.xxxxx, xxxxxx.xxxxx
+    #   line 6: survey=Polygonal|Radial
+    #   line 7: [data]
+    #   line 8 through end: Azimuth; dist; zen[; radius; direction]
+    #
+    #       note: lines 1 through 5 are optional if hand entered, but will always be generated when 'saved'
+    #
+    #       saving to a name ending in .qsb writes the binary format of segmentbinary.py instead,
+    #       loading tells the two apart by their first bytes
+    # ---------------------------------------------------------------------------------------------------------------------------------
+    def loadList(self):
+        self.fileName=QFileDialog.getOpenFileName(None,"Load data separated by ';'",self.fPath,"")
+        if not os.path.exists(self.fileName):
+            return 0
+        # update selected file's folder
+        fInfo = QFileInfo(self.fileName)
+        self.fPath = fInfo.absolutePath ()
+        self.saveConf()
+
+        # get saved data
+        self.clearList()
+        try:
+            if segmentbinary.isbinary(self.fileName):
+                # the model holds editable text rows, so the columns are converted
+                # back here; only batch imports keep them memory mapped
+                self.model.appendSegments(self.loadsegments(segmentbinary.read(self.fileName)))
+                return
+            with open(self.fileName) as f:
+                self.model.appendSegments(self.loadsegments(segmentfile.read(f)))
+        except (IOError, ValueError) as e:
+            self.say("Invalid input: {0}".format(e))
+
+    def loadsegments(self, records):
+        """
+        Apply the settings of a parsed segment list to the dialog.
+        :return: A generator of the segments in the list
+        """
+        setters = {'angle': self.setAngle,
+                   'heading': self.setHeading,
+                   'declination': self.setDeclination,
+                   'dist_units': self.setDistanceUnits,
+                   'startat': self.setStartAt,
+                   'survey': self.setSurvey}
+        for record in records:
+            if isinstance(record, segmentfile.Setting):
+                if record.name in setters:
+                    setters[record.name](record.value)
+            else:
+                yield record
+
+    def saveList(self):
+        #file=QFileDialog.getSaveFileName(None,"Save segment list to file.",self.fPath,"")
+        #self.tell("loaded file name: " + self.fileName)
+        file=QFileDialog.getSaveFileName(None,"Save segment list to file.",self.fileName,"")
+        if (file == ''): return
+        #self.tell('target file: '+file)
+        # update selected file's folder
+        fInfo = QFileInfo(file)
+        self.fPath = fInfo.absolutePath ()
+        self.saveConf()
+
+        if str(file).lower().endswith(segmentbinary.SUFFIX):
+            try:
+                start = segmentfile.parse_start(";".join([str(self.pluginGui.lineEdit_vertexX0.text()),
+                                                          str(self.pluginGui.lineEdit_vertexY0.text()),
+                                                          str(self.pluginGui.lineEdit_vertexZ0.text())]))
+                segmentbinary.write(str(file), start, self.surveysettings(), self.model.segments())
+            except (IOError, ValueError) as e:
+                self.say("Can not save {0}: {1}".format(file, e))
+            return
+
+        f=open(file, 'w')
+
+        if (self.pluginGui.radioButton_azimuthAngle.isChecked()):
+            s='Azimuth'
+        elif (self.pluginGui.radioButton_bearingAngle.isChecked()):
+            s='Bearing'
+        f.write('angle='+s+'\n')
+
+        if (self.pluginGui.radioButton_defaultNorth.isChecked()):
+            s='Coordinate_System'
+        elif (self.pluginGui.radioButton_magNorth.isChecked()):
+            s='Magnetic'
+        f.write('heading='+s+'\n')
+
+        if (self.magDev!=0.0):
+            f.write('declination='+str(self.magDev)+'\n')
+
+        if (self.pluginGui.radioButton_defaultUnits.isChecked()):
+            s='Default'
+        elif (self.pluginGui.radioButton_englishUnits.isChecked()):
+            s='Feet'
+        f.write('dist_units='+s+'\n')
+
+        f.write('startAt='+str(self.pluginGui.lineEdit_vertexX0.text())+';'+
+                                    str(self.pluginGui.lineEdit_vertexY0.text())+';'+
+                                    str(self.pluginGui.lineEdit_vertexZ0.text())+'\n')
+
+        if (self.pluginGui.radioButton_boundarySurvey.isChecked()):
+            s='Polygonal'
+        elif (self.pluginGui.radioButton_radialSurvey.isChecked()):
+            s='Radial'
+        f.write('survey='+s+'\n')
+
+        f.write('[data]\n')
+        for segment in self.model.segments():
+            f.write(segmentfile.format_segment(segment)+'\n')
+
+        f.close()
+
+    #------------------------
+    def loadConf(self):
+        settings=QSettings()
+        size = settings.value('/Plugin-qgsAzimuth/size', QSize(800, 600), type=QSize)
+        self.pluginGui.resize(size)
+        position = settings.value('/Plugin-qgsAzimuth/position', QPoint(0, 0), type=QPoint)
+        self.pluginGui.move(position)
+        #settings.restoreGeometry(settings.value("Geometry"), QByteArray(), type=QByteArray)
+        self.fPath = settings.value('/Plugin-qgsAzimuth/inp_exp_dir', "", type=unicode)
+        self.fileName = self.fPath
+        self.commitChunk = settings.value('/Plugin-qgsAzimuth/commitChunk', featurewriter.DEFAULT_CHUNK, type=int)
+        # batch imports run serially in the GUI process by default; a pool would
+        # fork QGIS itself (or start its binary on Windows) from a slot, and has
+        # shown no speedup here.  The command line tool keeps the pool.
+        self.batchWorkers = settings.value('/Plugin-qgsAzimuth/batchWorkers', 1, type=int)
+        # computed vertices are kept in the profile directory, up to cacheSize MB, 0 for no cache
+        self.diskcache = diskcache.DiskCache(os.path.join(QgsApplication.qgisSettingsDirPath(), "qgsazimuth", "cache"),
+                                             settings.value('/Plugin-qgsAzimuth/cacheSize', 256, type=int) * 1024 * 1024)
+        pluginlog.configure(settings.value('/Plugin-qgsAzimuth/logLevel', "WARNING", type=str),
+                            settings.value('/Plugin-qgsAzimuth/traceSample', 0, type=int))
+
+    def saveConf(self):
+        settings=QSettings()
+        #settings.setValue("Geometry", self.saveGeometry())
+        settings.setValue('/Plugin-qgsAzimuth/size',  self.pluginGui.size())
+        settings.setValue('/Plugin-qgsAzimuth/position',  self.pluginGui.pos())
+        settings.setValue('/Plugin-qgsAzimuth/inp_exp_dir', self.fPath)
+
+    def sortedDict(self, adict):
+        keys = adict.keys()
+        keys.sort()
+        return map(adict.get, keys)
+
@@ -0,0 +1,208 @@
+#---------------------------------------------------------------------
+#
+# licensed under the terms of GNU GPL 2
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+#---------------------------------------------------------------------
+"""
+Binary segment list files.
+
+The binary container holds a single traverse with its settings already
+resolved and its segments as parsed columns, so opening one is a memory map
+instead of a parse.  Layout, little endian:
+
+  header, 64 bytes:
+    magic         8s   "QAZSEGS" followed by a zero byte
+    version       H
+    angle         B    index in traverse.SurveySettings.ANGLES
+    heading       B    index in SurveySettings.HEADINGS
+    dist_units    B    index in SurveySettings.DIST_UNITS
+    survey        B    index in SurveySettings.SURVEYS
+    (2 pad bytes)
+    declination   d    decimal degrees
+    startAt       ddd  x, y, z
+    count         Q    number of segments
+    (padding to 64 bytes)
+  columns, count values each:
+    azimuth, distance, zenith, radius   float64
+    direction                           uint8
+
+Angles are stored in decimal degrees as the angle setting parses them and
+without north correction, distances and radii in the file units, a radius of
+0 meaning a straight leg.  Converting to text writes the angles as decimal
+degrees, which read back to the same values, so text -> binary -> text ->
+binary gives the same file.
+
+Only load() keeps the columns memory mapped, which is what batch imports and
+the command line tool use.  The dialog edits segments as text rows, so it
+opens binary files through read(), which converts every segment back.
+"""
+
+import decimal
+import os
+import struct
+
+import numpy
+
+import angles
+import segmentfile
+import traverse
+
+MAGIC = b"QAZSEGS\x00"
+VERSION = 1
+SUFFIX = ".qsb"
+HEADER_SIZE = 64
+
+_HEADER = struct.Struct("<8sHBBBB2xddddQ")
+# header names as saveList writes them
+_NAMES = {'startat': 'startAt'}
+
+
+def isbinary(path):
+    """
+    Return True if path is a binary segment list.
+    """
+    with open(path, 'rb') as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def write(path, start, settings, segments):
+    """
+    Write a binary segment list.
+    :param start: x, y, z of the first vertex
+    :param settings: A traverse.SurveySettings
+    :param segments: Iterable of traverse.Segment records
+    :raises ValueError: If an angle can not be parsed
+    """
+    segments = list(segments)
+    texts = list(zip(*[(seg.azimuth, seg.distance, seg.zenith) for seg in segments])) or [(), (), ()]
+    columns = traverse.Columns(angles.parse_angles(texts[0], settings.angle),
+                               numpy.array(texts[1], dtype=float),
+                               angles.parse_angles(texts[2], settings.angle),
+                               numpy.array([seg.radius or 0.0 for seg in segments], dtype=float),
+                               numpy.array([seg.direction for seg in segments], dtype=int))
+    write_columns(path, start, settings, columns)
+
+
+def write_columns(path, start, settings, columns):
+    """
+    Write already parsed traverse.Columns as a binary segment list.
+    """
+    x, y, z = (tuple(float(value) for value in start) + (0.0,))[:3]
+    header = _HEADER.pack(MAGIC, VERSION,
+                          settings.ANGLES.index(settings.angle),
+                          settings.HEADINGS.index(settings.heading),
+                          settings.DIST_UNITS.index(settings.dist_units),
+                          settings.SURVEYS.index(settings.survey),
+                          settings.declination, x, y, z, len(columns.distance))
+    with open(path, 'wb') as f:
+        f.write(header.ljust(HEADER_SIZE, b"\0"))
+        for column in columns[:4]:
+            f.write(numpy.asarray(column, dtype='<f8').tobytes())
+        f.write(numpy.asarray(columns.direction, dtype='u1').tobytes())
+
+
+def load(path, name=None):
+    """
+    Memory map a binary segment list.
+    :param name: Id of the traverse, the file name without extension by default
+    :return: A segmentfile.Job whose segments are traverse.Columns of read only
+             arrays backed by the file, settings being a dict of header values
+             as read_traverses gives them
+    :raises ValueError: If the file is not a valid binary segment list
+    """
+    if name is None:
+        name = os.path.splitext(os.path.basename(path))[0]
+    data = numpy.memmap(path, dtype='u1', mode='r')
+    if len(data) < HEADER_SIZE:
+        raise ValueError("{0}: not a binary segment list".format(path))
+    (magic, version, angle, heading, dist_units, survey,
+     declination, x, y, z, count) = _HEADER.unpack(data[:_HEADER.size].tobytes())
+    if magic != MAGIC:
+        raise ValueError("{0}: not a binary segment list".format(path))
+    if version != VERSION:
+        raise ValueError("{0}: unsupported version {1}".format(path, version))
+    if len(data) != HEADER_SIZE + 33 * count:
+        raise ValueError("{0}: expected {1} segments".format(path, count))
+
+    settings = traverse.SurveySettings
+    try:
+        header = {'angle': settings.ANGLES[angle],
+                  'heading': settings.HEADINGS[heading],
+                  'declination': _decimal(declination),
+                  'dist_units': settings.DIST_UNITS[dist_units],
+                  'survey': settings.SURVEYS[survey]}
+    except IndexError:
+        raise ValueError("{0}: invalid settings".format(path))
+
+    # the four float columns are back to back, so one view gives them all
+    floats = data[HEADER_SIZE:HEADER_SIZE + 32 * count].view('<f8').reshape(4, count)
+    columns = traverse.Columns(floats[0], floats[1], floats[2], floats[3], data[HEADER_SIZE + 32 * count:])
+    return segmentfile.Job(name, (x, y, z), header, columns)
+
+
+def _decimal(value):
+    """
+    Format a float in the shortest positional notation that reads back to the same value,
+    as the angle parsers do not read exponents.
+    """
+    return format(decimal.Decimal(repr(float(value))), 'f')
+
+
+def read(path):
+    """
+    Read a binary segment list as the same records as segmentfile.read gives
+    for its text form.
+    :return: A generator of segmentfile.Setting and traverse.Segment records
+    """
+    job = load(path)
+    for name in ('angle', 'heading', 'declination', 'dist_units'):
+        yield segmentfile.Setting(name, job.settings[name])
+    yield segmentfile.Setting('startat', ";".join(repr(value) for value in job.start))
+    yield segmentfile.Setting('survey', job.settings['survey'])
+    columns = job.segments
+    for azimuth, distance, zenith, radius, direction in zip(*(column.tolist() for column in columns)):
+        yield traverse.segment(_decimal(azimuth), distance, _decimal(zenith), radius, direction)
+
+
+def to_text(path, f):
+    """
+    Write a binary segment list to the open file f in the text format.
+    """
+    data = False
+    for record in read(path):
+        if isinstance(record, segmentfile.Setting):
+            f.write("{0}={1}\n".format(_NAMES.get(record.name, record.name), record.value))
+            continue
+        if not data:
+            f.write("[data]\n")
+            data = True
+        f.write(segmentfile.format_segment(record) + "\n")
+    if not data:
+        f.write("[data]\n")
+
+
+def from_text(lines, path):
+    """
+    Convert a single traverse text segment list to a binary one.
+    :param lines: Any iterable of lines, e.g. an open file
+    :raises ValueError: If lines can not be parsed or hold several traverses
+    """
+    jobs = list(segmentfile.read_traverses(lines))
+    if len(jobs) != 1:
+        raise ValueError("a binary segment list holds a single traverse, found {0}".format(len(jobs)))
+    job = jobs[0]
+    write(path, job.start, traverse.SurveySettings.from_header(job.settings), job.segments)
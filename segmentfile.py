@@ -0,0 +1,163 @@
+#---------------------------------------------------------------------
+#
+# licensed under the terms of GNU GPL 2
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+#---------------------------------------------------------------------
+"""
+Reader for segment list files.
+
+format:
+  angle=Azimuth|Bearing|Polar
+  heading=Coordinate_System|Magnetic
+  declination=[- ]x.xxd[ xx.x'] [E|W]
+  dist_units=Default|Feet
+  startAt=xxxxx.xxxxx;xxxxxx.xxxxx;zz
+  survey=Polygonal|Radial
+  [data]
+  Azimuth;dist;zen[;radius;direction]
+
+The header lines are optional and blank lines are ignored.
+
+A batch file holds several traverses, each starting with a [traverse <id>]
+line followed by its own header and data lines.  Header lines before the
+first [traverse] line apply to every traverse of the file.
+"""
+
+import re
+from collections import namedtuple
+
+import traverse
+import utils
+
+Setting = namedtuple("Setting", "name value")
+Job = namedtuple("Job", "id start settings segments")
+
+# [traverse] or [traverse <id>]
+TRAVERSE_LINE = re.compile(r"^\[traverse(?:\s+(.+))?\]$", re.IGNORECASE)
+
+
+class ParseError(ValueError):
+    """
+    Raised for a line that can not be parsed.  lineno is 1 based.
+    """
+    def __init__(self, lineno, message):
+        ValueError.__init__(self, "line {0}: {1}".format(lineno, message))
+        self.lineno = lineno
+
+
+def parse_segment(line):
+    """
+    Parse a single data line into a traverse.Segment.
+    :raises ValueError: If the line is not valid
+    """
+    coords = [part.strip() for part in line.split(";")]
+    if len(coords) < 2:
+        raise ValueError("expected at least azimuth;distance")
+    az = coords[0].upper()
+    dist = float(coords[1])
+    zen = coords[2] if len(coords) > 2 and coords[2] else "90"
+    radius = float(coords[3]) if len(coords) > 3 and coords[3] not in ("", "None") else None
+    direction = coords[4].lower() if len(coords) > 4 else None
+    return traverse.segment(az, dist, zen, radius, direction)
+
+
+def read(lines):
+    """
+    Lazily parse a segment list.
+    :param lines: Any iterable of lines, e.g. an open file
+    :return: A generator of Setting records for the header lines (named
+             'traverse' with the id as value for [traverse] lines) and
+             traverse.Segment records for the data lines, in file order.
+    :raises ParseError: On the first line that can not be parsed, including
+                        bracketed lines other than [data] and [traverse]
+    """
+    for lineno, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line or line.lower() == '[data]':
+            continue
+
+        if line.startswith('['):
+            match = TRAVERSE_LINE.match(line)
+            if not match:
+                raise ParseError(lineno, "unknown section {0}".format(line))
+            yield Setting('traverse', (match.group(1) or "").strip())
+            continue
+
+        if "=" in line:
+            name, _, value = line.partition("=")
+            yield Setting(name.strip().lower(), value.strip().lower())
+            continue
+
+        try:
+            yield parse_segment(line)
+        except ValueError as e:
+            raise ParseError(lineno, e)
+
+
+def parse_start(text):
+    """
+    Parse a startAt value into an x, y, z tuple, z defaulting to 0.
+    :raises ValueError: If the value is not valid
+    """
+    coords = [float(part) for part in text.split(";") if part.strip()]
+    if len(coords) not in (2, 3):
+        raise ValueError("invalid startAt: {0}".format(text))
+    return tuple(coords + [0.0] * (3 - len(coords)))
+
+
+def read_traverses(lines, name="traverse"):
+    """
+    Group a segment list into traverses.
+    A file without [traverse] lines holds a single traverse.
+    :param lines: Any iterable of lines, e.g. an open file
+    :param name: Id of the traverses that have none, numbered when there are several
+    :return: A generator of Job records, settings being a dict of the header
+             values without startAt
+    :raises ParseError: On the first line that can not be parsed
+    :raises ValueError: For a traverse without a valid startAt
+    """
+    shared = {}
+    blocks = []
+    for record in read(lines):
+        if isinstance(record, Setting) and record.name == 'traverse':
+            blocks.append((record.value, dict(shared), []))
+        elif isinstance(record, Setting):
+            (blocks[-1][1] if blocks else shared)[record.name] = record.value
+        elif blocks:
+            blocks[-1][2].append(record)
+        else:
+            # data before any [traverse] line, a plain single traverse file
+            blocks.append((None, shared, [record]))
+
+    for number, (tid, settings, segments) in enumerate(blocks, 1):
+        if not tid:
+            tid = name if len(blocks) == 1 else "{0}-{1}".format(name, number)
+        settings = dict(settings)
+        if 'startat' not in settings:
+            raise ValueError("traverse {0} has no startAt".format(tid))
+        start = parse_start(settings.pop('startat'))
+        yield Job(tid, start, settings, segments)
+
+
+def format_segment(segment):
+    """
+    Return the data line for a segment, the inverse of parse_segment.
+    """
+    parts = [segment.azimuth, segment.distance, segment.zenith]
+    if segment.radius:
+        parts.extend([segment.radius, utils.Direction.text(segment.direction)])
+    return ";".join(repr(part) if isinstance(part, float) else str(part) for part in parts)
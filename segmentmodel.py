@@ -0,0 +1,176 @@
+#---------------------------------------------------------------------
+#
+# licensed under the terms of GNU GPL 2
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+#---------------------------------------------------------------------
+
+from array import array
+
+from PyQt4.QtCore import *
+
+import traverse
+import utils
+
+
+class SegmentModel(QAbstractTableModel):
+    """
+    Table model for the segment list.
+    Rows are kept in columns instead of one item per cell: the angle texts in
+    lists (repeated texts such as "90" are shared), distance and radius as
+    doubles and the arc direction as a byte.  A radius of 0 is a straight leg.
+    """
+    AZIMUTH, DISTANCE, ZENITH, RADIUS, DIRECTION = range(5)
+    HEADERS = ["Azimuth", "Distance", "Vertical Angle", "Radius", "Direction"]
+
+    def __init__(self, parent=None):
+        QAbstractTableModel.__init__(self, parent)
+        self._texts = {}
+        self._columns()
+
+    def _columns(self):
+        self.azimuths = []
+        self.distances = array('d')
+        self.zeniths = []
+        self.radii = array('d')
+        self.directions = array('b')
+
+    def _all(self):
+        return self.azimuths, self.distances, self.zeniths, self.radii, self.directions
+
+    def _text(self, value):
+        value = str(value)
+        return self._texts.setdefault(value, value)
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.distances)
+
+    def columnCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation != Qt.Horizontal:
+            return QAbstractTableModel.headerData(self, section, orientation, role)
+        if role == Qt.DisplayRole:
+            return self.HEADERS[section]
+        if role == Qt.ToolTipRole and section == self.DIRECTION:
+            return "Supported values are 'anticlockwise', 'a', 'c', 'clockwise'"
+        return None
+
+    def flags(self, index):
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable | Qt.ItemIsEditable
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role not in (Qt.DisplayRole, Qt.EditRole):
+            return None
+        row, column = index.row(), index.column()
+        if column == self.AZIMUTH:
+            return self.azimuths[row]
+        if column == self.DISTANCE:
+            return repr(self.distances[row])
+        if column == self.ZENITH:
+            return self.zeniths[row]
+        if not self.radii[row]:
+            return ""
+        if column == self.RADIUS:
+            return repr(self.radii[row])
+        return utils.Direction.text(self.directions[row])
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if not index.isValid() or role != Qt.EditRole:
+            return False
+        row, column = index.row(), index.column()
+        value = str(value).strip()
+        try:
+            if column == self.AZIMUTH:
+                self.azimuths[row] = self._text(value.upper())
+            elif column == self.DISTANCE:
+                self.distances[row] = float(value)
+            elif column == self.ZENITH:
+                self.zeniths[row] = self._text(value or "90")
+            elif column == self.RADIUS:
+                self.radii[row] = float(value) if value not in ("", "None") else 0.0
+            elif column == self.DIRECTION:
+                self.directions[row] = utils.Direction.resolve(value.lower())
+        except ValueError:
+            return False
+        self.dataChanged.emit(self.index(row, 0), self.index(row, self.DIRECTION))
+        return True
+
+    def insertSegments(self, row, segments):
+        """
+        Insert segments before row.
+        :param segments: Any iterable of traverse.Segment
+        """
+        new = ([], array('d'), [], array('d'), array('b'))
+        for segment in segments:
+            new[0].append(self._text(str(segment.azimuth).upper()))
+            new[1].append(float(segment.distance))
+            new[2].append(self._text(segment.zenith))
+            new[3].append(float(segment.radius or 0.0))
+            new[4].append(utils.Direction.resolve(segment.direction))
+        if not new[1]:
+            return
+
+        self.beginInsertRows(QModelIndex(), row, row + len(new[1]) - 1)
+        for column, values in zip(self._all(), new):
+            column[row:row] = values
+        self.endInsertRows()
+
+    def appendSegments(self, segments):
+        self.insertSegments(self.rowCount(), segments)
+
+    def removeRows(self, row, count, parent=QModelIndex()):
+        if row < 0 or count < 1 or row + count > self.rowCount():
+            return False
+        self.beginRemoveRows(parent, row, row + count - 1)
+        for column in self._all():
+            del column[row:row + count]
+        self.endRemoveRows()
+        return True
+
+    def swapRows(self, row):
+        """
+        Swap row and row + 1.
+        """
+        if row < 0 or row + 1 >= self.rowCount():
+            return False
+        self.beginMoveRows(QModelIndex(), row + 1, row + 1, QModelIndex(), row)
+        for column in self._all():
+            column[row], column[row + 1] = column[row + 1], column[row]
+        self.endMoveRows()
+        return True
+
+    def clear(self):
+        self.beginResetModel()
+        self._texts = {}
+        self._columns()
+        self.endResetModel()
+
+    def segment(self, row):
+        return traverse.Segment(self.azimuths[row], self.distances[row], self.zeniths[row],
+                                self.radii[row] or None, self.directions[row])
+
+    def segments(self):
+        """
+        Return a generator of all rows as traverse.Segment
+        """
+        for row in range(self.rowCount()):
+            yield self.segment(row)
@@ -0,0 +1,73 @@
+#---------------------------------------------------------------------
+#
+# licensed under the terms of GNU GPL 2
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+#---------------------------------------------------------------------
+"""
+Grid index of snap vertices for hover snapping.
+"""
+
+import numpy
+
+
+class VertexIndex(object):
+    """
+    Vertices bucketed in a regular grid of square cells, sorted by cell so the
+    vertices of a cell are found with a binary search.  A lookup within a
+    tolerance no larger than the cell size checks at most 3 x 3 cells, and at
+    most 2 x 2 when the tolerance is no larger than half the cell size.
+    """
+
+    def __init__(self, coords, cellsize):
+        """
+        :param coords: A (N, 2) array of x, y
+        :param cellsize: Cell size in the units of coords, normally the snapping tolerance
+        """
+        coords = numpy.asarray(coords, dtype=float).reshape(-1, 2)
+        self.cellsize = float(cellsize)
+        keys = self._keys(coords[:, 0], coords[:, 1])
+        order = numpy.argsort(keys, kind='mergesort')
+        self.keys = keys[order]
+        self.coords = coords[order]
+
+    def __len__(self):
+        return len(self.coords)
+
+    def _cells(self, values):
+        return numpy.floor(numpy.asarray(values) / self.cellsize).astype(numpy.int64)
+
+    def _keys(self, x, y):
+        # column in the high and row in the low 32 bits
+        return (self._cells(x) << 32) + (self._cells(y) & 0xffffffff)
+
+    def nearest(self, x, y, tolerance):
+        """
+        Return the x, y of the vertex nearest to x, y, or None if none is within tolerance.
+        """
+        columns = numpy.arange(self._cells(x - tolerance), self._cells(x + tolerance) + 1)
+        rows = numpy.arange(self._cells(y - tolerance), self._cells(y + tolerance) + 1)
+        keys = ((columns[:, numpy.newaxis] << 32) + (rows & 0xffffffff)).ravel()
+        first = numpy.searchsorted(self.keys, keys, 'left')
+        last = numpy.searchsorted(self.keys, keys, 'right')
+        candidates = numpy.concatenate([numpy.arange(a, b) for a, b in zip(first, last)])
+        if not len(candidates):
+            return None
+        distances = numpy.hypot(self.coords[candidates, 0] - x, self.coords[candidates, 1] - y)
+        best = numpy.argmin(distances)
+        if distances[best] > tolerance:
+            return None
+        return tuple(self.coords[candidates[best]])
@@ -0,0 +1,78 @@
+import unittest
+
+import numpy
+
+import adjust
+
+
+class AdjustTests(unittest.TestCase):
+    # a 100 x 50 rectangle that misses its start by (0.03, -0.04)
+    coords = numpy.array([(0.0, 0.0), (100.0, 0.0), (100.0, 50.0), (0.0, 50.0), (0.03, -0.04)])
+
+    def test_closure(self):
+        result = adjust.closure(self.coords)
+        self.assertAlmostEqual(result.dx, 0.03)
+        self.assertAlmostEqual(result.dy, -0.04)
+        self.assertAlmostEqual(result.linear, 0.05)
+        self.assertAlmostEqual(result.precision, result.length / 0.05)
+        self.assertEqual(adjust.closure(self.coords, end=(0.03, -0.04)).precision, numpy.inf)
+
+    def test_bowditch(self):
+        adjusted = adjust.bowditch(self.coords)
+        self.assertTrue(numpy.allclose(adjusted[-1], adjusted[0]))
+        self.assertTrue(numpy.allclose(adjusted[0], self.coords[0]))
+        # the second vertex is a third of the way round
+        length = numpy.hypot(*numpy.diff(self.coords, axis=0).T)
+        ratio = length[0] / length.sum()
+        self.assertTrue(numpy.allclose(adjusted[1], self.coords[1] - ratio * self.coords[-1]))
+
+    def test_transit(self):
+        adjusted = adjust.transit(self.coords)
+        self.assertTrue(numpy.allclose(adjusted[-1], adjusted[0]))
+        # the first leg runs along x only, so gets no correction in y
+        self.assertAlmostEqual(adjusted[1, 1], 0.0)
+
+    def test_least_squares_closes_loop(self):
+        points, distances, azimuths = adjust.leg_observations(self.coords, closed=True)
+        result = adjust.least_squares(points, [0], distances, azimuths)
+        self.assertEqual(len(result.coords), 4)
+        self.assertTrue(numpy.allclose(result.coords[0], (0, 0)))
+        self.assertTrue(numpy.abs(result.distance_residuals).max() < 0.05)
+        # the adjusted figure is close to the compass rule one
+        self.assertTrue(numpy.allclose(result.coords, adjust.bowditch(self.coords)[:-1], atol=0.02))
+
+    def test_least_squares_redundant_network(self):
+        truth = numpy.array([(0.0, 0.0), (100.0, 0.0), (100.0, 100.0), (0.0, 100.0)])
+        start = numpy.array([0, 1, 2, 3, 0, 1])
+        end = numpy.array([1, 2, 3, 0, 2, 3])
+        dx, dy = (truth[end] - truth[start]).T
+        distances = (start, end, numpy.hypot(dx, dy), numpy.full(6, 0.01))
+        azimuths = (start, end, numpy.degrees(numpy.arctan2(dx, dy)), numpy.full(6, 0.001))
+        guess = truth + [(0, 0), (0.5, -0.3), (-0.4, 0.6), (0.2, 0.2)]
+        result = adjust.least_squares(guess, [0], distances, azimuths)
+        self.assertTrue(numpy.allclose(result.coords, truth, atol=1e-6))
+        self.assertTrue(numpy.allclose(result.azimuth_residuals, 0, atol=1e-7))
+
+    def test_band_solve(self):
+        random = numpy.random.RandomState(5)
+        size, width = 40, 6
+        matrix = numpy.zeros((size, size))
+        for k in range(width + 1):
+            values = random.uniform(-1, 1, size - k)
+            matrix += numpy.diag(values, -k) + (numpy.diag(values, k) if k else 0)
+        matrix += numpy.eye(size) * (numpy.abs(matrix).sum(axis=1).max() + 1)
+        band = numpy.array([numpy.concatenate((numpy.zeros(k), numpy.diag(matrix, -k))) for k in range(width + 1)])
+        rhs = random.uniform(-1, 1, size)
+        self.assertTrue(numpy.allclose(adjust._band_solve(band, rhs), numpy.linalg.solve(matrix, rhs)))
+        with self.assertRaises(ValueError):
+            adjust._band_solve(numpy.array([[1.0, 0.0], [0.0, 0.0]]), numpy.ones(2))
+
+    def test_long_traverse(self):
+        random = numpy.random.RandomState(3)
+        coords = numpy.vstack(([0, 0], numpy.cumsum(random.uniform(-10, 10, (20000, 2)), axis=0)))
+        adjusted = adjust.bowditch(coords, end=coords[-1] + (0.5, 0.5))
+        self.assertTrue(numpy.allclose(adjusted[-1], coords[-1] + (0.5, 0.5)))
+
+
+if __name__ == '__main__':
+    unittest.main()
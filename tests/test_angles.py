@@ -0,0 +1,38 @@
+import unittest
+
+import angles
+
+
+class AngleParserTests(unittest.TestCase):
+    def test_dms_to_dd(self):
+        self.assertAlmostEqual(angles.dms_to_dd("25d 34' 48\""), 25.58)
+        self.assertAlmostEqual(angles.dms_to_dd("25;34;48"), 25.58)
+        self.assertEqual(angles.dms_to_dd("90"), 90)
+        self.assertEqual(angles.dms_to_dd(12.25), 12.25)
+
+    def test_negative_dms_applies_to_whole_angle(self):
+        self.assertAlmostEqual(angles.dms_to_dd("-1d30'"), -1.5)
+
+    def test_invalid_angle(self):
+        self.assertRaises(ValueError, angles.dms_to_dd, "abc")
+        self.assertRaises(ValueError, angles.dms_to_dd, "")
+        self.assertRaises(ValueError, angles.bearing_to_dd, "")
+
+    def test_bearing_to_dd(self):
+        self.assertAlmostEqual(angles.bearing_to_dd("N 30d E"), 30)
+        self.assertAlmostEqual(angles.bearing_to_dd("N 30d W"), 330)
+        self.assertAlmostEqual(angles.bearing_to_dd("S 30d E"), 150)
+        self.assertAlmostEqual(angles.bearing_to_dd("s 30d 30' w"), 210.5)
+        self.assertAlmostEqual(angles.bearing_to_dd("- N 30d E"), 210)
+        self.assertAlmostEqual(angles.bearing_to_dd("45"), 45)
+        self.assertEqual(angles.bearing_to_dd("N 30d"), 0)
+
+    def test_parse_angles(self):
+        values = angles.parse_angles(["90", "45d30'", "90"])
+        self.assertEqual(list(values), [90.0, 45.5, 90.0])
+        values = angles.parse_angles(["N 10 E", "S 10 W"], 'bearing')
+        self.assertEqual(list(values), [10.0, 190.0])
+
+
+if __name__ == '__main__':
+    unittest.main()
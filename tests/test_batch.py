@@ -0,0 +1,79 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import batch
+import segmentbinary
+import traverse
+
+
+class BatchTests(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def write(self, name, text):
+        path = os.path.join(self.folder, name)
+        with open(path, 'w') as f:
+            f.write(text)
+        return path
+
+    def test_read_directory(self):
+        self.write("b.txt", "startAt=0;0;0\n[traverse x]\n90;10\n[traverse y]\n0;10\n")
+        self.write("a.txt", "startAt=1;1;0\n[data]\n90;10\n")
+        jobs = list(batch.read_jobs([self.folder]))
+        self.assertEqual([job.id for job in jobs], ["a", "x", "y"])
+
+    def test_error_names_file(self):
+        path = self.write("bad.txt", "startAt=0;0;0\n90;abc\n")
+        try:
+            list(batch.read_jobs([path]))
+        except ValueError as e:
+            self.assertIn("bad.txt", str(e))
+        else:
+            self.fail("ValueError not raised")
+
+    def test_compute_all(self):
+        path = self.write("lots.txt", "[traverse 1]\nstartAt=0;0;0\nsurvey=Radial\n90;10\n0;10\n"
+                                      "[traverse 2]\nstartAt=100;0;0\ndist_units=Feet\n90;3.281\n")
+        results = batch.compute_all(batch.read_jobs([path]))
+        self.assertEqual([(tid, survey) for tid, survey, coords in results],
+                         [("1", 'radial'), ("2", 'polygonal')])
+        self.assertEqual(results[0][2].shape, (3, 3))
+        self.assertAlmostEqual(results[1][2][1][0], 101.0)
+
+    def test_parallel_matches_serial(self):
+        jobs = []
+        for i in range(9):
+            path = self.write("lot{0}.txt".format(i), "startAt={0};0;0\n90;10\n0;10;90;8;clockwise\n".format(i))
+            jobs.extend(batch.read_jobs([path]))
+        serial = batch.compute_all(jobs, workers=1)
+        parallel = batch.compute_all(jobs, workers=3)
+        self.assertEqual([tid for tid, survey, coords in parallel], ["lot{0}".format(i) for i in range(9)])
+        for (_, _, expected), (_, _, coords) in zip(serial, parallel):
+            self.assertTrue((expected == coords).all())
+
+    def test_binary_jobs_are_sent_by_path(self):
+        jobs = []
+        for i in range(4):
+            path = os.path.join(self.folder, "lot{0}.qsb".format(i))
+            segmentbinary.from_text(["startAt={0};0;0".format(i), "90;10", "0;10;90;8;clockwise"], path)
+            jobs.extend(batch.read_jobs([path]))
+        portable = batch._portable(jobs[0])
+        self.assertEqual(portable, batch.BinaryJob(os.path.join(self.folder, "lot0.qsb"), "lot0"))
+        serial = batch.compute_all(jobs, workers=1)
+        parallel = batch.compute_all(jobs, workers=2)
+        self.assertEqual([tid for tid, survey, coords in parallel], ["lot{0}".format(i) for i in range(4)])
+        for (_, _, expected), (_, _, coords) in zip(serial, parallel):
+            self.assertTrue((expected == coords).all())
+
+    def test_settings_from_header(self):
+        settings = traverse.SurveySettings.from_header({'heading': 'magnetic', 'declination': '2', 'startat': '0;0'})
+        self.assertEqual(settings.north_correction, 2.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import cli
+
+LOTS = ["angle=Azimuth\n",
+        "[traverse Lot 1]\n",
+        "startAt=1000;2000;0\n",
+        "0;10;90\n",
+        "90;10;90\n",
+        "180;10;90\n",
+        "[traverse Lot 2]\n",
+        "startAt=2000;2000;0\n",
+        "45;5;90\n"]
+
+
+class CliTests(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.input = os.path.join(self.dir, "lots.txt")
+        with open(self.input, 'w') as f:
+            f.writelines(LOTS)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_driver_from_extension(self):
+        self.assertEqual(cli.driver_name("out/lots.GPKG"), "GPKG")
+        self.assertEqual(cli.driver_name("lots.shp"), "ESRI Shapefile")
+        self.assertEqual(cli.driver_name("lots.geojson"), "GeoJSON")
+        self.assertRaises(ValueError, cli.driver_name, "lots.dxf")
+
+    def test_defaults(self):
+        options = cli.parser().parse_args(["-o", "lots.gpkg", "a.txt", "incoming"])
+        self.assertEqual(options.inputs, ["a.txt", "incoming"])
+        self.assertEqual(options.geometry, 'line')
+        self.assertEqual(options.workers, 0)
+        self.assertFalse(options.segments)
+
+    def test_bad_input_fails(self):
+        output = os.path.join(self.dir, "lots.gpkg")
+        self.assertEqual(cli.main(["-o", output, os.path.join(self.dir, "missing.txt")]), 1)
+        self.assertEqual(cli.main(["-o", os.path.join(self.dir, "lots.dxf"), self.input]), 1)
+
+    def test_export(self):
+        output = os.path.join(self.dir, "lots.csv")
+        self.assertEqual(cli.main(["-o", output, "--export", "vertices", self.input]), 0)
+        with open(output) as f:
+            lines = f.read().splitlines()
+        self.assertEqual(len(lines), 1 + 4 + 2)
+        self.assertTrue(lines[-1].startswith("Lot 2,1,"))
+
+    @unittest.skipIf(cli.ogr is None, "needs the GDAL/OGR Python bindings")
+    def test_writes_features(self):
+        output = os.path.join(self.dir, "lots.geojson")
+        self.assertEqual(cli.main(["-o", output, "--segments", "-j", "1", self.input]), 0)
+        source = cli.ogr.Open(output)
+        layer = source.GetLayer(0)
+        ids = [feature.GetField("traverse_id") for feature in layer]
+        self.assertEqual(ids, ["Lot 1"] * 3 + ["Lot 2"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+import numpy
+
+import diskcache
+import traverse
+
+
+def run(*segments, **settings):
+    return traverse.Traverse((100, 200, 0), [traverse.segment(*segment) for segment in segments],
+                             traverse.SurveySettings(**settings))
+
+
+class KeyTests(unittest.TestCase):
+    def test_same_traverse_same_key(self):
+        self.assertEqual(diskcache.key(run(("10d", 5)), "EPSG:2193"), diskcache.key(run(("10d", 5)), "EPSG:2193"))
+
+    def test_inputs_change_key(self):
+        base = diskcache.key(run(("10d", 5)), "EPSG:2193")
+        others = [diskcache.key(run(("10d", 6)), "EPSG:2193"),
+                  diskcache.key(run(("10d", 5), angle='bearing'), "EPSG:2193"),
+                  diskcache.key(run(("10d", 5), heading='magnetic', declination=2), "EPSG:2193"),
+                  diskcache.key(run(("10d", 5), dist_units='feet'), "EPSG:2193"),
+                  diskcache.key(run(("10d", 5), survey='radial'), "EPSG:2193"),
+                  diskcache.key(run(("10d", 5), arc_count=10), "EPSG:2193"),
+                  diskcache.key(run(("10d", 5)), "EPSG:4326")]
+        self.assertEqual(len(set(others + [base])), len(others) + 1)
+
+    def test_parsed_traverse_key(self):
+        columns = traverse.Columns(*(numpy.array(values) for values in ([10.0], [5.0], [90.0], [0.0], [0])))
+        parsed = traverse.ParsedTraverse((100, 200, 0), columns)
+        changed = traverse.ParsedTraverse((100, 200, 0), columns._replace(distance=numpy.array([6.0])))
+        self.assertNotEqual(diskcache.key(parsed), diskcache.key(changed))
+
+
+class DiskCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.cache = diskcache.DiskCache(os.path.join(self.dir, "cache"))
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_round_trip(self):
+        coords = numpy.arange(12.0).reshape(4, 3)
+        self.assertIsNone(self.cache.get("a"))
+        self.cache.put("a", coords=coords, closure=numpy.array([1.0, 2.0]))
+        entry = self.cache.get("a")
+        self.assertTrue(numpy.array_equal(entry['coords'], coords))
+        self.assertEqual(entry['closure'].tolist(), [1.0, 2.0])
+
+    def test_evicts_least_recently_used(self):
+        coords = numpy.zeros((1000, 3))
+        self.cache.put("a", coords=coords)
+        size = os.path.getsize(self.cache.path("a"))
+        self.cache.limit = 2 * size
+        self.cache.put("b", coords=coords)
+        os.utime(self.cache.path("a"), (time.time() - 20, time.time() - 20))
+        os.utime(self.cache.path("b"), (time.time() - 10, time.time() - 10))
+        self.assertIsNotNone(self.cache.get("a"))
+        self.cache.put("c", coords=coords)
+        self.assertIsNotNone(self.cache.get("a"))
+        self.assertIsNone(self.cache.get("b"))
+        self.assertIsNotNone(self.cache.get("c"))
+
+    def test_unreadable_entry_is_removed(self):
+        self.cache.put("a", coords=numpy.zeros((2, 3)))
+        with open(self.cache.path("a"), 'wb') as f:
+            f.write(b"not an archive")
+        self.assertIsNone(self.cache.get("a"))
+        self.assertFalse(os.path.exists(self.cache.path("a")))
+
+    def test_disabled(self):
+        self.cache.limit = 0
+        self.cache.put("a", coords=numpy.zeros((2, 3)))
+        self.assertIsNone(self.cache.get("a"))
+        self.assertFalse(os.path.exists(self.cache.directory))
+
+
+if __name__ == '__main__':
+    unittest.main()
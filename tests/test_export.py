@@ -0,0 +1,82 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+
+import numpy
+
+import export
+import traverse
+
+
+def square():
+    segments = [traverse.segment(azimuth, 10) for azimuth in ("0", "90", "180", "270")]
+    return traverse.Traverse((100, 200, 0), segments)
+
+
+class ExportTests(unittest.TestCase):
+    def export(self, traverses, format, kind):
+        f = io.BytesIO()
+        count = export.export(f, traverses, format, kind)
+        return count, f.getvalue()
+
+    def test_csv_vertices(self):
+        run = square()
+        count, text = self.export([("lot, 1", 'polygonal', run.blocks(2))], 'csv', 'vertices')
+        lines = text.splitlines()
+        self.assertEqual(count, 5)
+        self.assertEqual(lines[0], "traverse_id,vertex,x,y,z")
+        self.assertEqual(lines[1], '"lot, 1",0,100.0,200.0,0.0')
+        values = numpy.array([[float(v) for v in line.split(",")[-3:]] for line in lines[1:]])
+        self.assertTrue(numpy.array_equal(values, run.coordinates()))
+
+    def test_geojson_segments_across_blocks(self):
+        run = square()
+        count, text = self.export([("a", 'polygonal', run.blocks(1)), ("b", 'polygonal', run.blocks(3))],
+                                  'geojson', 'segments')
+        features = json.loads(text)['features']
+        self.assertEqual(count, 8)
+        coords = run.coordinates().tolist()
+        for feature in features:
+            leg = feature['properties']['segment']
+            self.assertEqual(feature['geometry']['coordinates'], coords[leg:leg + 2])
+        self.assertEqual([f['properties']['traverse_id'] for f in features], ["a"] * 4 + ["b"] * 4)
+
+    def test_ndjson_radial_segments(self):
+        segments = [traverse.segment(azimuth, 10) for azimuth in ("0", "90", "180")]
+        run = traverse.Traverse((0, 0, 0), segments, traverse.SurveySettings(survey='radial'))
+        count, text = self.export([("r", 'radial', run.blocks(2))], 'ndjson', 'segments')
+        features = [json.loads(line) for line in text.splitlines()]
+        self.assertEqual(count, 3)
+        for feature in features:
+            self.assertEqual(feature['geometry']['coordinates'][0], [0.0, 0.0, 0.0])
+
+    def test_empty(self):
+        self.assertEqual(json.loads(self.export([], 'geojson', 'vertices')[1]), {"type": "FeatureCollection",
+                                                                                 "features": []})
+        self.assertEqual(self.export([], 'ndjson', 'vertices'), (0, ""))
+
+    def test_unicode_id(self):
+        count, text = self.export([(u"lot\xe9", 'polygonal', square().blocks(10))], 'csv', 'vertices')
+        self.assertTrue(text.splitlines()[1].startswith("lot\xc3\xa9,0,"))
+
+    def test_failed_export_removes_file(self):
+        path = os.path.join(tempfile.mkdtemp(), "out.csv")
+
+        def blocks():
+            yield square().coordinates()
+            raise ValueError("bad segment")
+
+        self.assertRaises(ValueError, export.export_file, path, [("a", 'polygonal', blocks())])
+        self.assertFalse(os.path.exists(path))
+        os.rmdir(os.path.dirname(path))
+
+    def test_format_for(self):
+        self.assertEqual(export.format_for("out.CSV"), 'csv')
+        self.assertEqual(export.format_for("out.json"), 'geojson')
+        self.assertRaises(ValueError, export.format_for, "out.txt")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import unittest
+
+import featurewriter
+
+
+class FakeFeature(object):
+    def __init__(self, fid):
+        self.fid = fid
+
+    def id(self):
+        return self.fid
+
+
+class FakeProvider(object):
+    """
+    Accepts chunks until fail_at features were written.
+    """
+    DeleteFeatures = 1
+
+    def __init__(self, fail_at=None):
+        self.features = []
+        self.fail_at = fail_at
+
+    def addFeatures(self, chunk):
+        if self.fail_at is not None and len(self.features) + len(chunk) > self.fail_at:
+            return False, []
+        self.features.extend(chunk)
+        return True, chunk
+
+    def hasErrors(self):
+        return False
+
+    def capabilities(self):
+        return self.DeleteFeatures
+
+    def deleteFeatures(self, ids):
+        ids = set(ids)
+        self.features = [f for f in self.features if f.id() not in ids]
+        return True
+
+
+class FakeLayer(object):
+    def __init__(self, provider):
+        self.provider = provider
+
+    def isEditable(self):
+        return False
+
+    def dataProvider(self):
+        return self.provider
+
+    def updateExtents(self):
+        pass
+
+    def name(self):
+        return "fake"
+
+
+class FeatureWriterTests(unittest.TestCase):
+    def test_chunks(self):
+        self.assertEqual(list(featurewriter.chunks(range(5), 2)), [[0, 1], [2, 3], [4]])
+
+    def test_commit_in_chunks(self):
+        provider = FakeProvider()
+        features = (FakeFeature(i) for i in range(25))
+        result = featurewriter.commit(FakeLayer(provider), features, chunk_size=10)
+        self.assertTrue(result.ok)
+        self.assertEqual(result.added, 25)
+        self.assertEqual(len(provider.features), 25)
+
+    def test_failed_chunk_is_rolled_back(self):
+        provider = FakeProvider(fail_at=15)
+        features = (FakeFeature(i) for i in range(25))
+        result = featurewriter.commit(FakeLayer(provider), features, chunk_size=10)
+        self.assertEqual([index for index, error in result.failed], [1])
+        self.assertTrue(result.rolledback)
+        self.assertEqual(result.added, 0)
+        self.assertEqual(provider.features, [])
+
+    def test_failed_chunk_without_rollback(self):
+        provider = FakeProvider(fail_at=15)
+        features = (FakeFeature(i) for i in range(25))
+        result = featurewriter.commit(FakeLayer(provider), features, chunk_size=10, atomic=False)
+        self.assertEqual([index for index, error in result.failed], [1])
+        self.assertEqual(result.added, 15)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy
+
+import batch
+import segmentbinary
+import segmentfile
+import traverse
+
+TEXT = ["angle=Bearing\n",
+        "heading=Magnetic\n",
+        "declination=2d 30'\n",
+        "dist_units=Feet\n",
+        "startAt=1000;2000;5\n",
+        "survey=Polygonal\n",
+        "[data]\n",
+        "N 45d 30' 10\" E;100.25;90\n",
+        "S 10d W;0.00001;88d 30'\n",
+        "N 80d 15' W;40;90;30;anticlockwise\n",
+        "S 5d E;35.5;90;25;clockwise\n"]
+
+
+class SegmentBinaryTests(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, "lot.qsb")
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_columns_are_memory_mapped(self):
+        segmentbinary.from_text(TEXT, self.path)
+        self.assertTrue(segmentbinary.isbinary(self.path))
+        job = segmentbinary.load(self.path)
+        self.assertEqual(job.id, "lot")
+        self.assertEqual(job.start, (1000.0, 2000.0, 5.0))
+        self.assertEqual(job.settings['angle'], 'bearing')
+        self.assertEqual(job.settings['survey'], 'polygonal')
+        self.assertIsInstance(job.segments.azimuth, numpy.memmap)
+        self.assertAlmostEqual(job.segments.azimuth[0], 45 + 30 / 60.0 + 10 / 3600.0)
+        self.assertEqual(job.segments.radius.tolist(), [0, 0, 30, 25])
+        self.assertEqual(job.segments.direction.tolist(), [0, 0, 1, 0])
+
+    def test_same_coordinates_as_text(self):
+        segmentbinary.from_text(TEXT, self.path)
+        text_job = next(segmentfile.read_traverses(TEXT, "lot"))
+        expected = batch.compute(text_job)[2]
+        self.assertTrue(numpy.array_equal(batch.compute(segmentbinary.load(self.path))[2], expected))
+
+    def test_text_round_trip(self):
+        segmentbinary.from_text(TEXT, self.path)
+        text = io.BytesIO()
+        segmentbinary.to_text(self.path, text)
+        copy = os.path.join(self.dir, "copy.qsb")
+        segmentbinary.from_text(text.getvalue().splitlines(), copy)
+        with open(self.path, 'rb') as a, open(copy, 'rb') as b:
+            self.assertEqual(a.read(), b.read())
+
+    def test_blocks_match_coordinates(self):
+        segmentbinary.from_text(TEXT, self.path)
+        job = segmentbinary.load(self.path)
+        run = traverse.ParsedTraverse(job.start, job.segments, traverse.SurveySettings.from_header(job.settings))
+        self.assertEqual(len(run), 4)
+        self.assertTrue(numpy.array_equal(numpy.vstack(list(run.blocks(3))), run.coordinates()))
+
+    def test_rejects_text_and_truncated_files(self):
+        with open(self.path, 'w') as f:
+            f.writelines(TEXT)
+        self.assertFalse(segmentbinary.isbinary(self.path))
+        self.assertRaises(ValueError, segmentbinary.load, self.path)
+        segmentbinary.from_text(TEXT, self.path)
+        with open(self.path, 'rb+') as f:
+            f.truncate(segmentbinary.HEADER_SIZE + 10)
+        self.assertRaises(ValueError, segmentbinary.load, self.path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import unittest
+
+import segmentfile
+import traverse
+import utils
+
+
+class SegmentFileTests(unittest.TestCase):
+    def test_reads_settings_and_segments(self):
+        lines = ["angle=Azimuth\n",
+                 "startAt=100;200;90\n",
+                 "[data]\n",
+                 "45d30';10.5;90\n",
+                 "\n",
+                 "90;20;90;15;anticlockwise\n"]
+        records = list(segmentfile.read(lines))
+        self.assertEqual(records[0], segmentfile.Setting('angle', 'azimuth'))
+        self.assertEqual(records[1], segmentfile.Setting('startat', '100;200;90'))
+        self.assertEqual(records[2], traverse.segment("45D30'", 10.5, "90"))
+        self.assertEqual(records[3].radius, 15)
+        self.assertEqual(records[3].direction, utils.Direction.ANTICLOCKWISE)
+
+    def test_reports_line_number(self):
+        records = segmentfile.read(["[data]", "10;20;90", "10;abc;90"])
+        try:
+            list(records)
+        except segmentfile.ParseError as e:
+            self.assertEqual(e.lineno, 3)
+        else:
+            self.fail("ParseError not raised")
+
+    def test_format_round_trip(self):
+        segment = traverse.segment("N 10D E", 0.1, "90", 12.5, "anticlockwise")
+        self.assertEqual(segmentfile.parse_segment(segmentfile.format_segment(segment)), segment)
+
+    def test_single_traverse_file(self):
+        jobs = list(segmentfile.read_traverses(["angle=Bearing", "startAt=1;2", "10;20"], "lot"))
+        self.assertEqual(len(jobs), 1)
+        self.assertEqual(jobs[0].id, "lot")
+        self.assertEqual(jobs[0].start, (1.0, 2.0, 0.0))
+        self.assertEqual(jobs[0].settings, {'angle': 'bearing'})
+        self.assertEqual(len(jobs[0].segments), 1)
+
+    def test_parse_start(self):
+        self.assertEqual(segmentfile.parse_start("1;2"), (1.0, 2.0, 0.0))
+        self.assertEqual(segmentfile.parse_start("1;2;3"), (1.0, 2.0, 3.0))
+        self.assertRaises(ValueError, segmentfile.parse_start, "1")
+        self.assertRaises(ValueError, segmentfile.parse_start, "")
+
+    def test_batch_file(self):
+        lines = ["angle=Bearing",
+                 "[traverse Lot 1]",
+                 "startAt=0;0;0",
+                 "10;20",
+                 "[traverse]",
+                 "angle=Azimuth",
+                 "startAt=5;5;0",
+                 "10;20",
+                 "30;40"]
+        jobs = list(segmentfile.read_traverses(lines, "plan"))
+        self.assertEqual([job.id for job in jobs], ["Lot 1", "plan-2"])
+        self.assertEqual(jobs[0].settings, {'angle': 'bearing'})
+        self.assertEqual(jobs[1].settings, {'angle': 'azimuth'})
+        self.assertEqual(jobs[1].start, (5.0, 5.0, 0.0))
+        self.assertEqual(len(jobs[1].segments), 2)
+
+    def test_section_lines(self):
+        records = list(segmentfile.read(["[TRAVERSE  Lot 2 ]", "[data]", "[traverse]"]))
+        self.assertEqual(records, [segmentfile.Setting('traverse', "Lot 2"),
+                                   segmentfile.Setting('traverse', "")])
+        for line in ("[traverses]", "[traverse2]", "[survey]"):
+            with self.assertRaises(segmentfile.ParseError) as raised:
+                list(segmentfile.read(["10;20", line]))
+            self.assertEqual(raised.exception.lineno, 2)
+
+    def test_traverse_without_start(self):
+        self.assertRaises(ValueError, list, segmentfile.read_traverses(["[traverse a]", "10;20"]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,25 @@
+import unittest
+
+import numpy
+
+import snapindex
+
+
+class VertexIndexTests(unittest.TestCase):
+    def test_nearest_matches_brute_force(self):
+        random = numpy.random.RandomState(1)
+        coords = random.uniform(-500, 500, (2000, 2))
+        index = snapindex.VertexIndex(coords, 7.5)
+        for x, y in random.uniform(-510, 510, (300, 2)):
+            distances = numpy.hypot(coords[:, 0] - x, coords[:, 1] - y)
+            expected = tuple(coords[numpy.argmin(distances)]) if distances.min() <= 7.5 else None
+            self.assertEqual(index.nearest(x, y, 7.5), expected)
+
+    def test_empty(self):
+        index = snapindex.VertexIndex(numpy.empty((0, 2)), 1.0)
+        self.assertEqual(len(index), 0)
+        self.assertEqual(index.nearest(0, 0, 1.0), None)
+
+
+if __name__ == '__main__':
+    unittest.main()
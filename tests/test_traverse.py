@@ -0,0 +1,131 @@
+import math
+import unittest
+
+import numpy
+
+import traverse
+import utils
+
+
+class TraverseEngineTests(unittest.TestCase):
+    start = utils.Point(1000.0, 2000.0, 50.0)
+    azimuths = [0.0, 45.5, 123.25, 271.0, 359.9]
+    distances = [10.0, 22.5, 3.75, 100.0, 0.5]
+    zeniths = [90.0, 85.0, 90.0, 95.5, 90.0]
+
+    def assertPointsEqual(self, expected, xs, ys, zs):
+        self.assertEqual(len(expected), len(xs))
+        for point, x, y, z in zip(expected, xs, ys, zs):
+            self.assertAlmostEqual(point.x, x, places=9)
+            self.assertAlmostEqual(point.y, y, places=9)
+            self.assertAlmostEqual(point.z, z, places=9)
+
+    def test_polygonal_matches_nextvertex(self):
+        expected = [self.start]
+        for az, dis, zen in zip(self.azimuths, self.distances, self.zeniths):
+            expected.append(utils.nextvertex(expected[-1], dis, az, zen))
+        xs, ys, zs = traverse.polygonal(self.start, self.azimuths, self.distances, self.zeniths)
+        self.assertPointsEqual(expected, xs, ys, zs)
+
+    def test_radial_matches_nextvertex(self):
+        expected = [self.start]
+        for az, dis, zen in zip(self.azimuths, self.distances, self.zeniths):
+            expected.append(utils.nextvertex(self.start, dis, az, zen))
+        xs, ys, zs = traverse.radial(self.start, self.azimuths, self.distances, self.zeniths)
+        self.assertPointsEqual(expected, xs, ys, zs)
+
+    def test_scalar_zenith_is_broadcast(self):
+        xs, ys, zs = traverse.vertices(self.start, self.azimuths, self.distances)
+        self.assertEqual(len(zs), len(self.azimuths) + 1)
+        self.assertAlmostEqual(zs[-1], self.start.z, places=9)
+
+    def test_arcs_match_arc_points(self):
+        start = utils.Point(5.0, 5.0)
+        end = utils.nextvertex(start, 10, 45)
+        for direction in (utils.Direction.CLOCKWISE, utils.Direction.ANTICLOCKWISE):
+            expected = list(utils.arc_points(start, end, 10, 10, 20, direction))[:19]
+            if direction == utils.Direction.ANTICLOCKWISE:
+                expected.reverse()
+            coords, sizes = traverse.arcs(([start.x], [start.y]), ([end.x], [end.y]), [10], [10], 20, [direction])
+            self.assertEqual(list(sizes), [19])
+            for point, (x, y, z) in zip(expected, coords):
+                self.assertAlmostEqual(point.x, x, places=9)
+                self.assertAlmostEqual(point.y, y, places=9)
+
+    def test_arc_across_north(self):
+        # from azimuth 350 to 10 seen from the centre at the origin
+        start = utils.nextvertex((0, 0, 0), 100, 350)
+        end = utils.nextvertex((0, 0, 0), 100, 10)
+        chord = math.hypot(end.x - start.x, end.y - start.y)
+        coords, sizes = traverse.arcs(([start.x], [start.y]), ([end.x], [end.y]), [chord], [100], 4,
+                                      [utils.Direction.CLOCKWISE])
+        centre = utils.calculate_center(start, end, 100, chord)
+        azimuths = [utils.angle_to(utils.Point(x, y), centre) for x, y, z in coords]
+        self.assertEqual(len(azimuths), 3)
+        for azimuth, expected in zip(azimuths, [355, 0, 5]):
+            self.assertAlmostEqual(azimuth % 360, expected)
+
+    def test_radius_too_small(self):
+        self.assertRaises(ValueError, traverse.arcs, ([0], [0]), ([10], [0]), [10], [4], 10, [0])
+
+
+class TraverseTests(unittest.TestCase):
+    def test_settings_are_applied(self):
+        settings = traverse.SurveySettings(angle='bearing', heading='magnetic', declination='1d30\'',
+                                           dist_units='feet')
+        run = traverse.Traverse((0, 0, 0), [traverse.segment("N 45d E", 3.281)], settings)
+        points = run.vertices()
+        expected = utils.nextvertex(points[0], 1.0, 46.5)
+        self.assertEqual(len(points), 2)
+        self.assertAlmostEqual(points[1].x, expected.x, places=9)
+        self.assertAlmostEqual(points[1].y, expected.y, places=9)
+
+    def test_radius_units(self):
+        settings = traverse.SurveySettings(dist_units='feet', arc_count=2)
+        segments = [traverse.segment("90", 2 * 3.281, radius=3.281)]
+        points = traverse.Traverse((0, 0, 0), segments, settings).vertices()
+        self.assertEqual(len(points), 3)
+        self.assertAlmostEqual(points[1].x, 1)
+        self.assertAlmostEqual(abs(points[1].y), 1)
+
+    def test_arc_points_are_inserted(self):
+        settings = traverse.SurveySettings(arc_count=10)
+        segments = [traverse.segment("90", 10, radius=10),
+                    traverse.segment("180", 10)]
+        points = traverse.Traverse((0, 0, 0), segments, settings).vertices()
+        self.assertEqual(len(points), 3 + 9)
+        self.assertAlmostEqual(points[10].x, 10)
+        self.assertAlmostEqual(points[10].y, 0)
+
+    def test_arc_tolerance(self):
+        segments = [traverse.segment("90", 10, radius=5), traverse.segment("90", 1000, radius=1000)]
+        settings = traverse.SurveySettings(arc_count=10, arc_tolerance=0.01)
+        coords = traverse.Traverse((0, 0, 0), segments, settings).coordinates()
+        self.assertEqual(len(coords), 3 + (utils.chord_count(5, 180, 0.01) - 1)
+                         + (utils.chord_count(1000, 60, 0.01) - 1))
+
+    def test_azimuths_are_normalized(self):
+        run = traverse.Traverse((0, 0, 0), [traverse.segment("-90", 1), traverse.segment("1e15", 1)],
+                                traverse.SurveySettings(angle='polar'))
+        azimuths, _, _ = run.columns()
+        self.assertEqual(azimuths[0], 270.0)
+        self.assertTrue(0 <= azimuths[1] < 360)
+
+    def test_blocks_match_coordinates(self):
+        segments = [traverse.segment(str(i * 37 % 360), 1 + i % 7, "85", 10 if i % 4 == 0 else None)
+                    for i in range(23)]
+        for survey in traverse.SurveySettings.SURVEYS:
+            run = traverse.Traverse((5, 6, 7), segments, traverse.SurveySettings(survey=survey))
+            stacked = numpy.vstack(list(run.blocks(5)))
+            self.assertTrue((stacked == run.coordinates()).all())
+
+    def test_settings_equality(self):
+        self.assertEqual(traverse.SurveySettings(declination='1d30\''), traverse.SurveySettings(declination=1.5))
+        self.assertNotEqual(traverse.SurveySettings(), traverse.SurveySettings(survey='radial'))
+
+    def test_invalid_setting(self):
+        self.assertRaises(ValueError, traverse.SurveySettings, survey='zigzag')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,23 +1,21 @@
 __author__ = 'Nathan.Woodrow'
 
+import math
 import unittest
 
 import utils
 
 class PointFunctionTests(unittest.TestCase):
-    def test_pairs_returns_non_matching_tail_head(self):
-        points = [1,2,3,4]
-        pairs = utils.pairs(points, matchtail=False)
-        one = pairs.next()
-        two = pairs.next()
-        self.assertNotEqual(one[1], two[0])
+    def test_chord_count_keeps_within_tolerance(self):
+        for radius in (5.0, 2000.0):
+            count = utils.chord_count(radius, 90.0, 0.01)
+            step = math.radians(90.0 / count)
+            self.assertLessEqual(radius * (1 - math.cos(step / 2)), 0.01)
+            step = math.radians(90.0 / (count - 1))
+            self.assertGreater(radius * (1 - math.cos(step / 2)), 0.01)
 
-    def test_pairs_returns_matching_tail_head(self):
-        points = [1,2,3,4]
-        pairs = utils.pairs(points, matchtail=True)
-        one = pairs.next()
-        two = pairs.next()
-        self.assertEqual(one[1], two[0])
+    def test_chord_count_small_arc(self):
+        self.assertEqual(utils.chord_count(5.0, 90.0, 10.0), 1)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,57 @@
+import unittest
+
+import numpy
+
+import traverse
+import vertexcache
+
+
+def segments(count, offset=0):
+    return [traverse.segment(str((i + offset) * 37 % 360), 1 + i % 7, "85", 10 if i % 4 == 0 else None)
+            for i in range(count)]
+
+
+class VertexCacheTests(unittest.TestCase):
+    def check(self, cache):
+        expected = traverse.Traverse(cache.start, cache.segments, cache.settings).coordinates()
+        self.assertEqual(cache.coordinates().shape, expected.shape)
+        self.assertTrue(numpy.allclose(cache.coordinates(), expected, rtol=0, atol=1e-9))
+
+    def test_edits_match_full_computation(self):
+        for survey in traverse.SurveySettings.SURVEYS:
+            cache = vertexcache.VertexCache((5, 6, 7), segments(20), traverse.SurveySettings(survey=survey))
+            self.check(cache)
+            cache.insert(7, segments(3, 5))
+            self.check(cache)
+            cache.insert(0, segments(1, 9))
+            self.check(cache)
+            cache.insert(len(cache), segments(2))
+            self.check(cache)
+            cache.remove(4, 5)
+            self.check(cache)
+            cache.replace(10, segments(2, 3))
+            self.check(cache)
+            cache.swap(3)
+            self.check(cache)
+            cache.move((-50, 20, 1))
+            self.check(cache)
+            cache.remove(0, len(cache))
+            self.check(cache)
+
+    def test_swap_moves_one_vertex(self):
+        cache = vertexcache.VertexCache((0, 0, 0), segments(6))
+        before = cache.ends.copy()
+        cache.swap(2)
+        self.assertTrue(numpy.allclose(cache.ends[[0, 1, 3, 4, 5]], before[[0, 1, 3, 4, 5]], rtol=0, atol=1e-12))
+        self.assertFalse(numpy.allclose(cache.ends[2], before[2]))
+
+    def test_radial_edit_keeps_other_legs(self):
+        cache = vertexcache.VertexCache((0, 0, 0), segments(5), traverse.SurveySettings(survey='radial'))
+        before = cache.ends.copy()
+        cache.replace(2, [traverse.segment("10", 3)])
+        self.assertTrue((cache.ends[[0, 1, 3, 4]] == before[[0, 1, 3, 4]]).all())
+        self.assertFalse((cache.ends[2] == before[2]).all())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import struct
+import unittest
+
+import numpy
+
+import wkb
+
+
+class WkbTests(unittest.TestCase):
+    coords = [(0.0, 0.0, 0.0), (10.0, 0.0, 1.0), (10.0, 5.0, 2.0)]
+
+    def test_linestring(self):
+        data = wkb.linestring(self.coords)
+        self.assertEqual(struct.unpack('<BII', data[:9]), (1, wkb.LINESTRING, 3))
+        self.assertEqual(struct.unpack('<6d', data[9:]), (0, 0, 10, 0, 10, 5))
+
+    def test_polygon_ring_is_closed(self):
+        data = wkb.polygon(self.coords)
+        self.assertEqual(struct.unpack('<BIII', data[:13]), (1, wkb.POLYGON, 1, 4))
+        self.assertEqual(struct.unpack('<8d', data[13:]), (0, 0, 10, 0, 10, 5, 0, 0))
+
+    def test_points(self):
+        data = wkb.points(self.coords)
+        self.assertEqual(len(data), 3)
+        self.assertEqual(struct.unpack('<BIdd', data[2]), (1, wkb.POINT, 10, 5))
+        self.assertEqual(wkb.multipoint(self.coords)[9:30], data[0])
+
+    def test_segments_and_star(self):
+        lines = wkb.segments(self.coords)
+        self.assertEqual(len(lines), 2)
+        self.assertEqual(struct.unpack('<BII4d', lines[1]), (1, wkb.LINESTRING, 2, 10, 0, 10, 5))
+        star = wkb.star(self.coords[0], self.coords[1:])
+        self.assertEqual(struct.unpack('<BII', star[:9]), (1, wkb.MULTILINESTRING, 2))
+        self.assertEqual(star[9:], b''.join(wkb.rays(self.coords[0], self.coords[1:])))
+        self.assertEqual(struct.unpack('<BII4d', star[50:]), (1, wkb.LINESTRING, 2, 0, 0, 10, 5))
+
+    def test_geometries(self):
+        coords = numpy.array(self.coords)
+        self.assertEqual(wkb.geometries(coords), [wkb.linestring(coords)])
+        self.assertEqual(wkb.geometries(coords, 'line', as_segments=True), wkb.segments(coords))
+        self.assertEqual(wkb.geometries(coords, 'line', 'radial', True), wkb.rays(coords[0], coords[1:]))
+        self.assertEqual(wkb.geometries(coords, 'line', 'radial'), [wkb.star(coords[0], coords[1:])])
+        self.assertEqual(wkb.geometries(coords, 'line', 'radial', multi=False), wkb.rays(coords[0], coords[1:]))
+        self.assertEqual(wkb.geometries(coords, 'point'), wkb.points(coords))
+        self.assertEqual(wkb.geometries(coords, 'polygon'), [wkb.polygon(coords)])
+
+    def test_vertices_round_trip(self):
+        xy = [list(row[:2]) for row in self.coords]
+        self.assertEqual(wkb.vertices(wkb.linestring(self.coords)).tolist(), xy)
+        self.assertEqual(wkb.vertices(wkb.polygon(self.coords)).tolist(), xy + [xy[0]])
+        self.assertEqual(wkb.vertices(wkb.multipoint(self.coords)).tolist(), xy)
+        self.assertEqual(wkb.vertices(wkb.star(self.coords[0], self.coords[1:])).tolist(),
+                         [xy[0], xy[1], xy[0], xy[2]])
+
+    def test_vertices_25d_big_endian(self):
+        data = struct.pack('>BII6d', 0, wkb.LINESTRING | wkb.WKB25D, 2, 1, 2, 3, 4, 5, 6)
+        self.assertEqual(wkb.vertices(data).tolist(), [[1, 2], [4, 5]])
+
+    def test_vertices_unknown_type(self):
+        self.assertRaises(ValueError, wkb.vertices, struct.pack('<BII', 1, 8, 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,371 @@
+#---------------------------------------------------------------------
+#
+# licensed under the terms of GNU GPL 2
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+#---------------------------------------------------------------------
+"""
+Array based traverse engine.
+
+Works on whole columns of azimuths, distances and zenith angles at once instead
+of calling utils.nextvertex once per leg.  All angles are in decimal degrees and
+are assumed to already include any north correction.
+
+Traverse and SurveySettings wrap the engine in a small API that does not need
+Qt or the plugin dialog, so traverses can be computed headless.
+"""
+
+from collections import namedtuple
+
+import numpy
+
+import angles
+import utils
+
+
+def offsets(azimuth, distance, zenith=90.0):
+    """
+    Return the x, y, z offsets of each leg.
+    :param azimuth: Array of azimuths
+    :param distance: Array of slope distances
+    :param zenith: Array (or scalar) of zenith angles
+    :return: A tuple of three float arrays
+    """
+    azimuth = numpy.radians(numpy.asarray(azimuth, dtype=float))
+    zenith = numpy.radians(numpy.asarray(zenith, dtype=float))
+    distance = numpy.asarray(distance, dtype=float)
+    horizontal = distance * numpy.sin(zenith)
+    dx = horizontal * numpy.sin(azimuth)
+    dy = horizontal * numpy.cos(azimuth)
+    dz = distance * numpy.cos(zenith)
+    return dx, dy, numpy.broadcast_to(dz, dx.shape)
+
+
+def _chain(origin, delta):
+    """
+    Running sum of delta starting at origin, the first item being origin itself.
+    The additions happen in the same order as repeated nextvertex calls so
+    the results match them exactly.
+    """
+    values = numpy.empty(len(delta) + 1)
+    values[0] = origin
+    values[1:] = delta
+    return numpy.cumsum(values)
+
+
+def polygonal(start, azimuth, distance, zenith=90.0):
+    """
+    Compute a polygonal traverse where each leg starts at the end of the previous one.
+    :param start: x, y, z of the first vertex
+    :return: x, y, z arrays holding the start point followed by every computed vertex
+    """
+    dx, dy, dz = offsets(azimuth, distance, zenith)
+    return _chain(start[0], dx), _chain(start[1], dy), _chain(start[2], dz)
+
+
+def radial(start, azimuth, distance, zenith=90.0):
+    """
+    Compute a radial survey where every shot is taken from the start point.
+    :param start: x, y, z of the station
+    :return: x, y, z arrays holding the station followed by every shot
+    """
+    dx, dy, dz = offsets(azimuth, distance, zenith)
+    return tuple(numpy.concatenate(([origin], origin + delta))
+                 for origin, delta in zip(start, (dx, dy, dz)))
+
+
+def vertices(start, azimuth, distance, zenith=90.0, surveytype='polygonal'):
+    """
+    Compute the vertices of a traverse.
+    :param surveytype: 'polygonal' or 'radial'
+    :return: x, y, z arrays, the first item of each being the start point
+    """
+    if surveytype == 'radial':
+        return radial(start, azimuth, distance, zenith)
+    return polygonal(start, azimuth, distance, zenith)
+
+
+def arcs(start, end, distance, radius, count, direction, tolerance=None):
+    """
+    Compute the inner vertices of circular arcs for many legs at once.
+    The centre of each arc is placed as utils.calculate_center does and the
+    vertices are spaced evenly on the sweep from the start to the end point,
+    going round through north when the arc crosses it.
+    :param start: x, y arrays of the arc start points
+    :param end: x, y arrays of the arc end points
+    :param distance: Array of leg distances
+    :param radius: Array of radii
+    :param count: Number of lines to draw each arc with (scalar or array)
+    :param direction: Array of utils.Direction values
+    :param tolerance: If given, count is ignored and each arc gets as many lines
+                      as needed to stay within this distance of the arc
+    :return: A (N, 3) array of the arc vertices of every leg in drawing order,
+             and an array with the number of vertices of each leg.
+    """
+    sx, sy = (numpy.asarray(v, dtype=float) for v in start)
+    ex, ey = (numpy.asarray(v, dtype=float) for v in end)
+    distance = numpy.asarray(distance, dtype=float)
+    radius = numpy.asarray(radius, dtype=float)
+    count = numpy.broadcast_to(numpy.asarray(count, dtype=int), distance.shape)
+    anticlockwise = numpy.asarray(direction) == utils.Direction.ANTICLOCKWISE
+
+    half = distance / 2.0
+    if numpy.any(radius < half):
+        leg = numpy.flatnonzero(radius < half)[0]
+        raise ValueError("radius {0} is too small for a distance of {1}".format(radius[leg], distance[leg]))
+    offset = numpy.sqrt(radius ** 2 - half ** 2) / distance
+    cx = (sx + ex) / 2 - offset * (sy - ey)
+    cy = (sy + ey) / 2 - offset * (ex - sx)
+
+    first = numpy.degrees(numpy.arctan2(sx - cx, sy - cy))
+    last = numpy.degrees(numpy.arctan2(ex - cx, ey - cy))
+    first, last = numpy.where(anticlockwise, last, first), numpy.where(anticlockwise, first, last)
+    sweep = numpy.mod(last - first, 360.0)
+    if tolerance:
+        count = utils.chord_count(radius, sweep, tolerance)
+
+    sizes = numpy.where(sweep > 0, numpy.maximum(count - 1, 0), 0)
+    leg = numpy.repeat(numpy.arange(len(sizes)), sizes)
+    # step number of each vertex along its own arc, 1 to count - 1
+    step = numpy.arange(len(leg)) - numpy.repeat(numpy.cumsum(sizes) - sizes, sizes) + 1
+    step = numpy.where(anticlockwise[leg], count[leg] - step, step)
+    angle = numpy.radians(first[leg] + sweep[leg] * step / count[leg])
+
+    coords = numpy.zeros((len(leg), 3))
+    coords[:, 0] = cx[leg] + radius[leg] * numpy.sin(angle)
+    coords[:, 1] = cy[leg] + radius[leg] * numpy.cos(angle)
+    return coords, sizes
+
+
+def merge(start, ends, arc_coords, arc_sizes):
+    """
+    Put the start point, leg end vertices and arc vertices of a traverse together,
+    the arc vertices of each leg going just before the leg's end vertex.
+    :return: A (N, 3) array of x, y, z, the first row being the start point
+    """
+    legs = len(ends)
+    positions = numpy.arange(1, legs + 1) + numpy.cumsum(arc_sizes, dtype=int)
+    coords = numpy.empty((legs + 1 + len(arc_coords), 3))
+    coords[0] = start
+    coords[positions] = ends
+    on_arc = numpy.ones(len(coords), dtype=bool)
+    on_arc[0] = False
+    on_arc[positions] = False
+    coords[on_arc] = arc_coords
+    return coords
+
+
+Segment = namedtuple("Segment", "azimuth distance zenith radius direction")
+# the segments of a traverse as already parsed arrays: decimal degree angles of
+# the angle setting without north correction, distances and radii (0 for a
+# straight leg) in the file units and utils.Direction values
+Columns = namedtuple("Columns", "azimuth distance zenith radius direction")
+
+
+def segment(azimuth, distance, zenith=90, radius=None, direction=utils.Direction.CLOCKWISE):
+    """
+    Create a Segment, resolving the direction and treating a radius of 0 as a straight leg.
+    """
+    if not radius:
+        radius = None
+    return Segment(azimuth, distance, zenith, radius, utils.Direction.resolve(direction))
+
+
+class SurveySettings(object):
+    """
+    The options that control how segments are turned into vertices.
+    Values use the same names as the segment list file header.
+    """
+    ANGLES = ('azimuth', 'bearing', 'polar')
+    HEADINGS = ('coordinate_system', 'magnetic')
+    DIST_UNITS = ('default', 'feet')
+    SURVEYS = ('polygonal', 'radial')
+
+    def __init__(self, angle='azimuth', heading='coordinate_system', declination=0.0,
+                 dist_units='default', survey='polygonal', arc_count=20, arc_tolerance=None):
+        self.angle = self._check('angle', angle, self.ANGLES)
+        self.heading = self._check('heading', heading, self.HEADINGS)
+        self.dist_units = self._check('dist_units', dist_units, self.DIST_UNITS)
+        self.survey = self._check('survey', survey, self.SURVEYS)
+        self.declination = float(angles.dms_to_dd(declination))
+        self.arc_count = int(arc_count)
+        # arc_tolerance picks the lines of each arc from a max. deviation instead of arc_count
+        self.arc_tolerance = float(arc_tolerance) if arc_tolerance else None
+
+        # resolved once so computing a traverse does not test the options per leg
+        self.unit_factor = 3.281 if self.dist_units == 'feet' else 1.0
+        self.north_correction = self.declination if self.heading == 'magnetic' else 0.0
+
+    def __eq__(self, other):
+        return isinstance(other, SurveySettings) and self.__dict__ == other.__dict__
+
+    def __ne__(self, other):
+        return not self == other
+
+    @classmethod
+    def from_header(cls, header, arc_count=20, arc_tolerance=None):
+        """
+        Create the settings from the header values of a segment list.
+        :param header: Dict of header names to values, missing ones taking the defaults
+        """
+        names = ('angle', 'heading', 'declination', 'dist_units', 'survey')
+        options = dict((name, header[name]) for name in names if name in header)
+        return cls(arc_count=arc_count, arc_tolerance=arc_tolerance, **options)
+
+    @staticmethod
+    def _check(name, value, allowed):
+        value = str(value).lower()
+        if value not in allowed:
+            raise ValueError("invalid {0}: {1}".format(name, value))
+        return value
+
+
+class Traverse(object):
+    """
+    A traverse made of a start point and a list of segments, independent of the dialog.
+    """
+
+    def __init__(self, start, segments, settings=None):
+        self.start = utils.Point(*start)
+        self.segments = list(segments)
+        self.settings = settings or SurveySettings()
+
+    def columns(self, segments=None):
+        """
+        Return the azimuth, distance in map units and zenith arrays of the segments
+        with the angle, heading and unit settings applied.
+        :param segments: The segments to convert, all of the traverse by default
+        """
+        settings = self.settings
+        if segments is None:
+            segments = self.segments
+        texts = list(zip(*[(seg.azimuth, seg.distance, seg.zenith) for seg in segments])) or [(), (), ()]
+
+        azimuth = angles.parse_angles(texts[0], settings.angle) + settings.north_correction
+        distance = numpy.array(texts[1], dtype=float) / settings.unit_factor
+        zenith = angles.parse_angles(texts[2], settings.angle)
+
+        #correct for angles outside of 0.0-360.0
+        numpy.mod(azimuth, 360.0, out=azimuth)
+        return azimuth, distance, zenith
+
+    def curves(self):
+        """
+        Return the radius in map units (0 for a straight leg) and the direction arrays of the segments.
+        """
+        radius = numpy.array([seg.radius or 0.0 for seg in self.segments]) / self.settings.unit_factor
+        return radius, numpy.array([seg.direction for seg in self.segments])
+
+    def __len__(self):
+        return len(self.segments)
+
+    def part(self, first, last, start):
+        """
+        Return a traverse of the segments first to last starting at start.
+        """
+        return Traverse(start, self.segments[first:last], self.settings)
+
+    def legs(self):
+        """
+        Compute the vertices of every leg.
+        :return: A (legs, 3) array of the end vertex of each leg, a (N, 3) array
+                 of the arc vertices of all legs in order and an array with the
+                 number of arc vertices of each leg
+        """
+        start = self.start
+        azimuth, distance, zenith = self.columns()
+        xs, ys, zs = vertices(start, azimuth, distance, zenith, self.settings.survey)
+        legs = len(distance)
+
+        radius, directions = self.curves()
+        curved = numpy.flatnonzero(radius)
+        if self.settings.survey == 'radial':
+            # every arc starts at the first vertex
+            sx, sy = numpy.full(legs, start.x), numpy.full(legs, start.y)
+        else:
+            sx, sy = xs[:-1], ys[:-1]
+        arc_coords, sizes = arcs((sx[curved], sy[curved]), (xs[1:][curved], ys[1:][curved]),
+                                 distance[curved], radius[curved], self.settings.arc_count,
+                                 directions[curved], self.settings.arc_tolerance)
+
+        arc_sizes = numpy.zeros(legs, dtype=int)
+        arc_sizes[curved] = sizes
+        return numpy.column_stack((xs[1:], ys[1:], zs[1:])), arc_coords, arc_sizes
+
+    def coordinates(self):
+        """
+        Compute the full run, arcs included.
+        :return: A (N, 3) array of x, y, z, the first row being the start point
+        """
+        return merge(self.start, *self.legs())
+
+    def blocks(self, size):
+        """
+        Compute the traverse size segments at a time, so long runs can report
+        progress or stop between blocks.
+        :return: A generator of (N, 3) arrays which stacked together are the same
+                 as coordinates(), the first one starting with the start point
+        """
+        if not len(self):
+            yield self.coordinates()
+            return
+        start = self.start
+        for first in range(0, len(self), size):
+            part = self.part(first, first + size, start).coordinates()
+            yield part if first == 0 else part[1:]
+            if self.settings.survey != 'radial':
+                # the chain goes on from the last vertex, adding up in the same order
+                start = part[-1]
+
+    def vertices(self):
+        """
+        Return the list of calculated points for the full run, arcs included.
+        """
+        return [utils.Point(*row) for row in self.coordinates().tolist()]
+
+
+class ParsedTraverse(Traverse):
+    """
+    A traverse computed straight from Columns, e.g. the memory mapped columns
+    of a binary segment list, without parsing any angle text.
+    """
+
+    def __init__(self, start, columns, settings=None):
+        self.start = utils.Point(*start)
+        self.table = columns
+        self.settings = settings or SurveySettings()
+
+    @property
+    def segments(self):
+        table = self.table
+        return [segment(*row) for row in zip(*(numpy.asarray(column).tolist() for column in table))]
+
+    def columns(self, segments=None):
+        if segments is not None:
+            return Traverse.columns(self, segments)
+        settings = self.settings
+        azimuth = numpy.mod(self.table.azimuth + settings.north_correction, 360.0)
+        distance = self.table.distance / settings.unit_factor
+        return azimuth, distance, numpy.asarray(self.table.zenith, dtype=float)
+
+    def curves(self):
+        return self.table.radius / self.settings.unit_factor, numpy.asarray(self.table.direction)
+
+    def __len__(self):
+        return len(self.table.distance)
+
+    def part(self, first, last, start):
+        return ParsedTraverse(start, Columns(*(column[first:last] for column in self.table)), self.settings)
@@ -1,53 +1,23 @@
 __author__ = 'Nathan.Woodrow'
 
 import math
-from qgis.core import QgsPoint
 from collections import namedtuple
 
+import numpy
+
+from pluginlog import logger
+
 PointT = namedtuple("Point", "x y z")
 
 def Point(x, y, z=0):
     return PointT(x,y,z)
 
-def to_qgspoints(points, repeatfirst=False):
+def to_qgspoints(points):
     """
     Generate a QgsPoint list from a list of x,y pairs
-    :param repeatfirst: Repeat the first item in the list for each other point
-    :return:
-    """
-    if not repeatfirst:
-        # Just return a full list like normal
-        return [QgsPoint(point[0], point[1]) for point in points]
-    else:
-        pointlist = []
-
-        # Pop the first point
-        points = iter(points)
-        v0 = points.next()
-        v0 = QgsPoint(v0[0], v0[1])
-
-        # Loop the rest
-        for point in points:
-            p = QgsPoint(point[0], point[1])
-            pointlist.append(v0)
-            pointlist.append(p)
-        return pointlist
-
-
-def pairs(points, matchtail):
-    """
-    Return a list of pairs from a list of points
-    :param matchtail: The HEAD of the next pair will be the TAIL of the current pair e.g pair[1] == next[0]
-    :param points: List of points to process
-    :return:
     """
-    if matchtail:
-        it = zip(points, points[1:])
-    else:
-        it = zip(points[::2], points[1::2])
-
-    for start, end in it:
-        yield [start, end]
+    from qgis.core import QgsPoint
+    return [QgsPoint(point[0], point[1]) for point in points]
 
 
 def nextvertex(reference_point, distance, angle, virtical_anagle=90):
@@ -111,11 +81,36 @@ class Direction:
 
     @classmethod
     def resolve(cls, value):
-        if value == 'a' or value == "anticlockwise":
+        if value == 'a' or value == "anticlockwise" or value == Direction.ANTICLOCKWISE:
             return Direction.ANTICLOCKWISE
         else:
             return Direction.CLOCKWISE
 
+    @classmethod
+    def text(cls, value):
+        if value == Direction.ANTICLOCKWISE:
+            return "anticlockwise"
+        else:
+            return "clockwise"
+
+
+def chord_count(radius, sweep, tolerance):
+    """
+    Return the number of lines needed to draw an arc so that no line is further
+    than tolerance from the arc, i.e. the sagitta r * (1 - cos(step / 2)) of
+    every line stays within tolerance.  Works on scalars or arrays.
+    :param radius: Radius of the arc
+    :param sweep: Central angle of the arc in degrees
+    :param tolerance: Largest allowed distance between a line and the arc, in map units
+    :return: The number of lines, at least 1
+    """
+    if tolerance <= 0:
+        raise ValueError("tolerance must be positive")
+    radius = numpy.asarray(radius, dtype=float)
+    ratio = numpy.clip(1.0 - tolerance / radius, -1.0, 1.0)
+    step = 2.0 * numpy.degrees(numpy.arccos(ratio))
+    return numpy.maximum(numpy.ceil(numpy.asarray(sweep) / step), 1).astype(int)
+
 
 def arc_points(start, end, distance, radius, point_count=20, direction=Direction.CLOCKWISE):
     center = calculate_center(start, end, radius, distance)
@@ -137,10 +132,7 @@ def arc_points(start, end, distance, radius, point_count=20, direction=Direction
     if sweep < 0:
         alpha *= -1.0
 
-    print "First:", first_angle
-    print "Last:", last_angle
-    print "Sweep", sweep
-    print "Alpha", alpha
+    logger.debug("arc from %s to %s, sweep %s, step %s", first_angle, last_angle, sweep, alpha)
 
     a = first_angle
     for i in range(point_count + 1):
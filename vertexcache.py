@@ -0,0 +1,158 @@
+#---------------------------------------------------------------------
+#
+# licensed under the terms of GNU GPL 2
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+#---------------------------------------------------------------------
+"""
+Vertices of a traverse kept up to date while its segments are edited.
+"""
+
+import copy
+
+import numpy
+
+import traverse
+
+
+class VertexCache(object):
+    """
+    Cumulative vertex cache of a traverse.
+
+    Every leg is kept as its offset from its own start vertex, with its arc
+    vertices relative to that start vertex too, and the end vertices are the
+    running sum of the offsets.  Only new or edited legs go through the angle
+    parsing and trigonometry; inserting, removing, editing or swapping legs of
+    a polygonal traverse then moves every later vertex by one constant delta,
+    and changing the start point moves them all.
+
+    Vertices match traverse.Traverse.coordinates() up to rounding in the last
+    digits.
+    """
+
+    def __init__(self, start=(0, 0, 0), segments=(), settings=None):
+        self.reset(start, segments, settings)
+
+    def reset(self, start, segments, settings=None):
+        """
+        Compute everything again for new settings or a new segment list.
+        """
+        self.start = numpy.array(start, dtype=float)
+        self.settings = settings or traverse.SurveySettings()
+        self.segments = []
+        self.offsets = numpy.empty((0, 3))
+        self.ends = numpy.empty((0, 3))
+        self.arcs = []
+        self.insert(0, segments)
+
+    def __len__(self):
+        return len(self.segments)
+
+    @property
+    def radial(self):
+        return self.settings.survey == 'radial'
+
+    def move(self, start):
+        """
+        Move the start point, and every vertex with it.
+        """
+        start = numpy.array(start, dtype=float)
+        self.ends += start - self.start
+        self.start = start
+
+    def insert(self, row, segments):
+        """
+        Insert segments before row.
+        """
+        segments = list(segments)
+        offsets, arcs = self._legs(segments)
+        self.segments[row:row] = segments
+        self.offsets = numpy.concatenate((self.offsets[:row], offsets, self.offsets[row:]))
+        self.ends = numpy.concatenate((self.ends[:row], numpy.empty((len(segments), 3)), self.ends[row:]))
+        self.arcs[row:row] = arcs
+        self._changed(row, row + len(segments), offsets.sum(axis=0))
+
+    def remove(self, row, count):
+        """
+        Remove count segments starting at row.
+        """
+        delta = -self.offsets[row:row + count].sum(axis=0)
+        del self.segments[row:row + count]
+        self.offsets = numpy.concatenate((self.offsets[:row], self.offsets[row + count:]))
+        self.ends = numpy.concatenate((self.ends[:row], self.ends[row + count:]))
+        del self.arcs[row:row + count]
+        self._changed(row, row, delta)
+
+    def replace(self, row, segments):
+        """
+        Replace the segments starting at row.
+        """
+        segments = list(segments)
+        last = row + len(segments)
+        offsets, arcs = self._legs(segments)
+        delta = offsets.sum(axis=0) - self.offsets[row:last].sum(axis=0)
+        self.segments[row:last] = segments
+        self.offsets[row:last] = offsets
+        self.arcs[row:last] = arcs
+        self._changed(row, last, delta)
+
+    def swap(self, row):
+        """
+        Swap the legs at row and row + 1, which only moves the vertex between them.
+        """
+        legs = slice(row, row + 2)
+        self.segments[legs] = self.segments[legs][::-1]
+        self.offsets[legs] = self.offsets[legs][::-1].copy()
+        self.arcs[legs] = self.arcs[legs][::-1]
+        self._changed(row, row + 2, 0.0)
+
+    def coordinates(self):
+        """
+        Return the (N, 3) array of the whole traverse, the first row being the start point.
+        """
+        sizes = [len(arc) for arc in self.arcs]
+        arc_coords = numpy.concatenate(self.arcs) if self.arcs else numpy.empty((0, 3))
+        # arc vertices are kept relative to the start vertex of their leg, in x and y
+        # only as traverse.arcs leaves z at 0
+        if self.radial:
+            arc_coords[:, :2] += self.start[:2]
+        elif self.arcs:
+            origins = numpy.vstack((self.start, self.ends[:-1]))
+            arc_coords[:, :2] += numpy.repeat(origins[:, :2], sizes, axis=0)
+        return traverse.merge(self.start, self.ends, arc_coords, sizes)
+
+    def _legs(self, segments):
+        """
+        Compute the offsets and relative arc vertices of segments, as shots from the origin.
+        """
+        if not segments:
+            return numpy.empty((0, 3)), []
+        settings = copy.copy(self.settings)
+        settings.survey = 'radial'
+        offsets, arc_coords, sizes = traverse.Traverse((0, 0, 0), segments, settings).legs()
+        return offsets, numpy.split(arc_coords, numpy.cumsum(sizes)[:-1])
+
+    def _changed(self, first, last, delta):
+        """
+        Set the end vertices of the legs first to last - 1 and move the ones after by delta.
+        """
+        if self.radial:
+            self.ends[first:last] = self.start + self.offsets[first:last]
+            return
+        origin = self.start if first == 0 else self.ends[first - 1]
+        # summed from the origin on, in the same order as traverse.polygonal
+        self.ends[first:last] = numpy.cumsum(numpy.vstack((origin, self.offsets[first:last])), axis=0)[1:]
+        self.ends[last:] += delta
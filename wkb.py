@@ -0,0 +1,202 @@
+#---------------------------------------------------------------------
+#
+# licensed under the terms of GNU GPL 2
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+#---------------------------------------------------------------------
+"""
+Little endian 2D WKB built straight from coordinate arrays.
+
+Every function takes an (N, 2) or (N, 3) array of x, y[, z]; only x and y are
+written.  The results can be passed to QgsGeometry.fromWkb.  vertices() goes
+the other way and reads the coordinates back out of any simple geometry.
+"""
+
+import struct
+
+import numpy
+
+POINT, LINESTRING, POLYGON, MULTIPOINT, MULTILINESTRING = 1, 2, 3, 4, 5
+MULTIPOLYGON, GEOMETRYCOLLECTION = 6, 7
+# flag of the 2.5D types written by QGIS 2 and GEOS
+WKB25D = 0x80000000
+
+_POINTS = numpy.dtype([('order', 'u1'), ('type', '<u4'), ('x', '<f8'), ('y', '<f8')])
+_SEGMENTS = numpy.dtype([('order', 'u1'), ('type', '<u4'), ('count', '<u4'), ('xy', '<f8', (4,))])
+
+
+def _header(geomtype, count):
+    return struct.pack('<BII', 1, geomtype, count)
+
+
+def _xy(coords):
+    return numpy.ascontiguousarray(numpy.asarray(coords, dtype='<f8')[:, :2]).tobytes()
+
+
+def _points(coords):
+    """
+    Return an array of packed point records, one per row of coords.
+    """
+    coords = numpy.asarray(coords, dtype=float)
+    records = numpy.empty(len(coords), dtype=_POINTS)
+    records['order'] = 1
+    records['type'] = POINT
+    records['x'] = coords[:, 0]
+    records['y'] = coords[:, 1]
+    return records
+
+
+def points(coords):
+    """
+    Return a list with the WKB of a point for every row.
+    """
+    return _split(_points(coords))
+
+
+def linestring(coords):
+    return _header(LINESTRING, len(coords)) + _xy(coords)
+
+
+def polygon(coords):
+    """
+    Return the WKB of a polygon with a single ring, closing the ring if needed.
+    """
+    coords = numpy.asarray(coords, dtype=float)[:, :2]
+    if len(coords) and (coords[0] != coords[-1]).any():
+        coords = numpy.vstack((coords, coords[:1]))
+    return _header(POLYGON, 1) + struct.pack('<I', len(coords)) + _xy(coords)
+
+
+def multipoint(coords):
+    return _header(MULTIPOINT, len(coords)) + _points(coords).tobytes()
+
+
+def _segments(starts, ends):
+    records = numpy.empty(len(ends), dtype=_SEGMENTS)
+    records['order'] = 1
+    records['type'] = LINESTRING
+    records['count'] = 2
+    records['xy'][:, 0:2] = starts[:, :2]
+    records['xy'][:, 2:4] = ends[:, :2]
+    return records
+
+
+def _split(records):
+    size = records.dtype.itemsize
+    data = records.tobytes()
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+def segments(coords):
+    """
+    Return a list with the WKB of a two point line between each vertex and the next.
+    """
+    coords = numpy.asarray(coords, dtype=float)
+    return _split(_segments(coords[:-1], coords[1:]))
+
+
+def rays(origin, coords):
+    """
+    Return a list with the WKB of a two point line from origin to each row of coords.
+    """
+    coords = numpy.asarray(coords, dtype=float)
+    starts = numpy.broadcast_to(numpy.asarray(origin, dtype=float)[:2], (len(coords), 2))
+    return _split(_segments(starts, coords))
+
+
+def star(origin, coords):
+    """
+    Return the WKB of a multi line made of a two point line from origin to each row of coords.
+    """
+    coords = numpy.asarray(coords, dtype=float)
+    starts = numpy.broadcast_to(numpy.asarray(origin, dtype=float)[:2], (len(coords), 2))
+    return _header(MULTILINESTRING, len(coords)) + _segments(starts, coords).tobytes()
+
+
+def geometries(coords, geometry='line', survey='polygonal', as_segments=False, multi=True):
+    """
+    Return the WKB of the features a traverse is drawn with.
+    :param coords: The (N, 3) coordinate array of the traverse
+    :param geometry: 'point', 'line' or 'polygon'
+    :param survey: 'polygonal' or 'radial' as in traverse.SurveySettings
+    :param as_segments: Draw lines as one feature per leg
+    :param multi: False for layers that can not hold multi lines, radial
+                  surveys then always get a line per shot
+    :return: A list of WKB strings
+    """
+    if geometry == 'point':
+        return points(coords)
+    if geometry == 'polygon':
+        return [polygon(coords)]
+    if survey == 'radial' and (as_segments or not multi):
+        # one line from the first vertex to each of the others
+        return rays(coords[0], coords[1:])
+    if survey == 'radial':
+        # a single multi line of all the shots
+        return [star(coords[0], coords[1:])]
+    if as_segments:
+        # If the line is to be draw as segments then we create a line for each pair of vertices.
+        return segments(coords)
+    return [linestring(coords)]
+
+
+def vertices(data):
+    """
+    Return the x, y of every vertex of a WKB geometry.
+    Reads (multi) points, lines, polygons and collections of them, in either
+    byte order, with 2.5D or ISO Z/M coordinates.
+    :return: A (N, 2) array
+    :raises ValueError: For curved or otherwise unknown geometry types
+    """
+    parts = []
+    _read(bytes(data), 0, parts)
+    return numpy.concatenate(parts) if parts else numpy.empty((0, 2))
+
+
+def _read(data, offset, parts):
+    """
+    Append the coordinates of the geometry at offset to parts and return the offset after it.
+    """
+    endian = '<' if struct.unpack_from('B', data, offset)[0] == 1 else '>'
+    geomtype, = struct.unpack_from(endian + 'I', data, offset + 1)
+    offset += 5
+    if geomtype & WKB25D:
+        geomtype, dims = geomtype & ~WKB25D, 3
+    else:
+        # ISO types: 1000 + type for Z, 2000 + type for M, 3000 + type for ZM
+        geomtype, dims = geomtype % 1000, (2, 3, 3, 4)[min(geomtype // 1000, 3)]
+
+    def coords(offset, count):
+        values = numpy.frombuffer(data, endian + 'f8', count * dims, offset)
+        parts.append(values.reshape(count, dims)[:, :2].astype(float))
+        return offset + 8 * dims * count
+
+    if geomtype == POINT:
+        return coords(offset, 1)
+    count, = struct.unpack_from(endian + 'I', data, offset)
+    offset += 4
+    if geomtype == LINESTRING:
+        return coords(offset, count)
+    if geomtype == POLYGON:
+        for _ in range(count):
+            points, = struct.unpack_from(endian + 'I', data, offset)
+            offset = coords(offset + 4, points)
+        return offset
+    if geomtype in (MULTIPOINT, MULTILINESTRING, MULTIPOLYGON, GEOMETRYCOLLECTION):
+        for _ in range(count):
+            offset = _read(data, offset, parts)
+        return offset
+    raise ValueError("unsupported WKB geometry type {0}".format(geomtype))